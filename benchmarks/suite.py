@@ -0,0 +1,423 @@
+"""
+Reproducible benchmarks for maze generation, BFS engines, solving and scene
+construction.
+
+    python -m benchmarks.suite --profile quick --out bench.json
+    python -m benchmarks.suite --profile full --baseline bench.json
+
+Each case records its best wall time over `--repeats` runs, its peak traced
+memory (a separate run under tracemalloc) and the number of cells expanded
+by BFS. With --baseline, cases slower than --threshold times the baseline are
+reported and the exit code is 1.
+
+The core modules are also imported in fresh interpreters: importing one may
+take at most --import-budget milliseconds on top of NumPy and must not load
+any other third-party package, or the exit code is 1.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from lib.distance import UNREACHABLE, DistanceCalculator
+from lib.maze import Maze
+from lib.maze3d import Maze3D
+from lib.multires import MultiResolutionSolver
+from lib.search import SearchEngine
+from lib.solver import GridSolver, MazeSolver
+
+PROFILES = {
+    "quick": {
+        "sizes": [(100, 100), (300, 300)],
+        "fills": [0.25],
+        "targets": [16],
+        "sizes_3d": [(20, 20, 40)],
+    },
+    "full": {
+        "sizes": [(100, 100), (300, 300), (1000, 1000), (2000, 2000)],
+        "fills": [0.1, 0.25, 0.4],
+        "targets": [4, 16, 64],
+        "sizes_3d": [(20, 20, 40), (50, 50, 100), (100, 100, 200)],
+    },
+}
+
+# Modules that must import with only NumPy and the standard library.
+CORE_MODULES = ["lib.maze", "lib.maze3d", "lib.distance", "lib.solver"]
+
+
+@dataclass
+class Case:
+    name: str
+    params: dict
+    # Builds the inputs, not timed.
+    setup: Callable[[], object]
+    # The measured work on the inputs.
+    run: Callable[[object], object]
+    # Number of cells the work expands by BFS, counted outside the timing.
+    count: Callable[[object], int] = lambda _: 0
+
+
+def _reached(dist: np.ndarray) -> int:
+    return int(np.count_nonzero(dist != UNREACHABLE))
+
+
+def _maze(rows, cols, n_targets=16, fill=0.25, seed=0) -> Maze:
+    return Maze(
+        rows=rows, cols=cols, n_targets=n_targets, fill_fraction=fill, random_seed=seed
+    )
+
+
+def _solve(solver) -> None:
+    solver.find_optimal_point()
+
+
+def _count_solve_2d(solver: MazeSolver) -> int:
+    _, reached = solver.distance_calculator.multi_source_distance_sum(solver.targets)
+    return int(reached.sum())
+
+
+def _count_solve_grid(solver: GridSolver) -> int:
+    return int(solver.distance_calculator.distance_sum(solver.targets)[1].sum())
+
+
+def _first_target(maze: Maze) -> tuple[int, int]:
+    return maze.get_target_cells()[0]
+
+
+def build_cases(profile: dict) -> list[Case]:
+    cases = []
+    for rows, cols in profile["sizes"]:
+        cases.append(
+            Case(
+                "generate_2d",
+                {"rows": rows, "cols": cols},
+                lambda: None,
+                lambda _, r=rows, c=cols: _maze(r, c),
+            )
+        )
+        # The "auto" backend is the numba kernel when numba is installed.
+        for name, backend in (("bfs_wavefront", "numpy"), ("bfs_kernel", "auto")):
+            cases.append(
+                Case(
+                    name,
+                    {"rows": rows, "cols": cols},
+                    lambda r=rows, c=cols: _maze(r, c),
+                    lambda m, b=backend: DistanceCalculator(
+                        m, backend=b
+                    ).bfs_distance_array(*_first_target(m)),
+                    lambda m: _reached(
+                        DistanceCalculator(m).bfs_distance_array(*_first_target(m))[0]
+                    ),
+                )
+            )
+        # Includes building the maze's graph index on first use.
+        cases.append(
+            Case(
+                "bfs_graph",
+                {"rows": rows, "cols": cols},
+                lambda r=rows, c=cols: _maze(r, c),
+                lambda m: DistanceCalculator(m).bfs_distance_graph(*_first_target(m)),
+                lambda m: _reached(
+                    DistanceCalculator(m).bfs_distance_graph(*_first_target(m))[0]
+                ),
+            )
+        )
+
+        # Single-pair queries between the first two targets.
+        for name in ("astar", "bidirectional"):
+            cases.append(
+                Case(
+                    f"search_{name}",
+                    {"rows": rows, "cols": cols},
+                    lambda r=rows, c=cols: SearchEngine(_maze(r, c)),
+                    lambda e, n=name: getattr(e, n)(*e.maze.get_target_cells()[:2]),
+                    lambda e, n=name: getattr(e, n)(
+                        *e.maze.get_target_cells()[:2]
+                    ).expanded,
+                )
+            )
+
+    for (rows, cols), fill, k in itertools.product(
+        profile["sizes"], profile["fills"], profile["targets"]
+    ):
+        params = {"rows": rows, "cols": cols, "fill_fraction": fill, "n_targets": k}
+        cases.append(
+            Case(
+                "solve_2d",
+                params,
+                lambda r=rows, c=cols, k=k, f=fill: MazeSolver(_maze(r, c, k, f)),
+                _solve,
+                _count_solve_2d,
+            )
+        )
+
+        cases.append(
+            Case(
+                "objectives_2d",
+                params,
+                lambda r=rows, c=cols, k=k, f=fill: MazeSolver(_maze(r, c, k, f)),
+                lambda solver: solver.distance_objectives(top_k=10),
+                _count_solve_2d,
+            )
+        )
+
+    # Branch and bound only pays off on mostly open mazes.
+    for rows, cols in profile["sizes"][:2]:
+        cases.append(
+            Case(
+                "solve_2d_pruned",
+                {"rows": rows, "cols": cols, "fill_fraction": 0.05, "n_targets": 16},
+                lambda r=rows, c=cols: MazeSolver(_maze(r, c, 16, 0.05), pruned=True),
+                _solve,
+            )
+        )
+
+    for rows, cols in profile["sizes"]:
+        cases.append(
+            Case(
+                "solve_2d_multires",
+                {"rows": rows, "cols": cols, "n_targets": 16, "max_checks": 1},
+                lambda r=rows, c=cols: MultiResolutionSolver(_maze(r, c), max_checks=1),
+                _solve,
+            )
+        )
+
+    for (rows, cols), connectivity in itertools.product(profile["sizes"][:2], (4, 8)):
+        cases.append(
+            Case(
+                "solve_grid_2d",
+                {"rows": rows, "cols": cols, "connectivity": connectivity},
+                lambda r=rows, c=cols, n=connectivity: GridSolver(_maze(r, c), n),
+                _solve,
+                _count_solve_grid,
+            )
+        )
+
+    for shape in profile["sizes_3d"]:
+        layers, rows, cols = shape
+        params = {"layers": layers, "rows": rows, "cols": cols}
+        cases.append(
+            Case(
+                "generate_3d",
+                params,
+                lambda: None,
+                lambda _, s=shape: Maze3D(*s, random_seed=0),
+            )
+        )
+        for connectivity in (6, 18, 26):
+            cases.append(
+                Case(
+                    "solve_3d",
+                    {**params, "connectivity": connectivity},
+                    lambda s=shape, n=connectivity: GridSolver(
+                        Maze3D(*s, random_seed=0), n
+                    ),
+                    _solve,
+                    _count_solve_grid,
+                )
+            )
+    return cases
+
+
+def scene_cases() -> list[Case]:
+    """
+    Mobject construction of the manim scenes with rendering disabled, empty
+    when manim is not installed.
+    """
+    try:
+        from manim import tempconfig
+        from manim.renderer.cairo_renderer import CairoRenderer
+    except ImportError:
+        return []
+
+    def construct(scene_cls):
+        with tempconfig({"dry_run": True, "disable_caching": True}):
+            scene = scene_cls(renderer=CairoRenderer(skip_animations=True))
+            scene.setup()
+            scene.construct()
+
+    import scene
+    import scene_3d
+
+    return [
+        Case("scene_2d_construct", {}, lambda: scene.AnimateMaze, construct),
+        Case("scene_3d_construct", {}, lambda: scene_3d.AnimateMaze3d, construct),
+    ]
+
+
+def _import_in_subprocess(module: str) -> tuple[float, list[str]]:
+    """
+    Imports NumPy and then module in a fresh interpreter. Returns the
+    seconds spent importing module on top of NumPy, from -X importtime, and
+    the installed packages other than NumPy that the import loaded.
+    """
+    code = f"""
+import sys, numpy
+before = set(sys.modules)
+import {module}
+loaded = {{
+    name.split(".")[0]
+    for name in set(sys.modules) - before
+    if "site-packages" in (getattr(sys.modules[name], "__file__", None) or "")
+}}
+print(" ".join(sorted(loaded - {{"numpy"}})))
+"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative_us = int(fields[1])
+    return cumulative_us / 1e6, proc.stdout.split()
+
+
+def check_imports(budget: float, repeats: int) -> tuple[list[dict], list[str]]:
+    """
+    Times the import of every core module, best of repeats, and returns the
+    records and a description of every module over budget seconds or
+    loading an installed package besides NumPy.
+    """
+    records, violations = [], []
+    for module in CORE_MODULES:
+        runs = [_import_in_subprocess(module) for _ in range(repeats)]
+        seconds = min(t for t, _ in runs)
+        extra = runs[0][1]
+        records.append({"module": module, "seconds": seconds, "extra": extra})
+        print(f"import {module:<73} {seconds:9.4f}s {' '.join(extra)}", flush=True)
+        if seconds > budget:
+            violations.append(
+                f"import {module} takes {seconds * 1e3:.1f} ms, "
+                f"over the {budget * 1e3:.0f} ms budget"
+            )
+        if extra:
+            violations.append(f"import {module} loads {', '.join(extra)}")
+    return records, violations
+
+
+def measure(case: Case, repeats: int) -> dict:
+    timings = []
+    for _ in range(repeats):
+        inputs = case.setup()
+        start = time.perf_counter()
+        case.run(inputs)
+        timings.append(time.perf_counter() - start)
+
+    inputs = case.setup()
+    tracemalloc.start()
+    case.run(inputs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "name": case.name,
+        "params": case.params,
+        "seconds": min(timings),
+        "peak_bytes": peak,
+        "cells_expanded": case.count(case.setup()),
+    }
+
+
+def case_key(record: dict) -> str:
+    return record["name"] + json.dumps(record["params"], sort_keys=True)
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[dict]:
+    """
+    Returns the results slower than threshold times their baseline record,
+    each with a `ratio` field.
+    """
+    base = {case_key(r): r for r in baseline}
+    regressions = []
+    for record in results:
+        old = base.get(case_key(record))
+        if old is None:
+            continue
+        ratio = record["seconds"] / max(old["seconds"], 1e-9)
+        print(f"{case_key(record):<80} {ratio:6.2f}x")
+        if ratio > threshold:
+            regressions.append({**record, "ratio": ratio})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profile", choices=PROFILES, default="quick")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--filter", default="", help="Only run cases containing this.")
+    parser.add_argument("--out", help="Write results as JSON to this file.")
+    parser.add_argument("--baseline", help="JSON results to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--no-scenes", action="store_true")
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=50.0,
+        help="Milliseconds a core module may take to import on top of NumPy.",
+    )
+    parser.add_argument("--no-imports", action="store_true")
+    args = parser.parse_args(argv)
+
+    imports, violations = [], []
+    if not args.no_imports:
+        imports, violations = check_imports(args.import_budget / 1e3, args.repeats)
+
+    cases = build_cases(PROFILES[args.profile])
+    if not args.no_scenes:
+        cases += scene_cases()
+    cases = [c for c in cases if args.filter in c.name]
+
+    results = []
+    for case in cases:
+        record = measure(case, args.repeats)
+        results.append(record)
+        print(
+            f"{case_key(record):<80} {record['seconds']:9.4f}s "
+            f"{record['peak_bytes'] / 2**20:9.1f} MiB "
+            f"{record['cells_expanded']:>12} cells",
+            flush=True,
+        )
+
+    report = {
+        "meta": {
+            "profile": args.profile,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+        "imports": imports,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    for violation in violations:
+        print(f"IMPORT {violation}")
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for record in regressions:
+            print(f"REGRESSION {case_key(record)}: {record['ratio']:.2f}x slower")
+    return 1 if regressions or violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
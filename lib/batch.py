@@ -0,0 +1,204 @@
+import itertools
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from lib.maze import Maze
+from lib.solver import MazeSolver
+
+
+@dataclass(frozen=True)
+class BatchConfig:
+    index: int
+    rows: int
+    cols: int
+    n_targets: int
+    fill_fraction: float
+    seed: int
+    # Neighbours under which all targets must reach each other, or None.
+    connectivity: int | None = None
+
+
+def expand_configs(
+    rows: list[int],
+    cols: list[int],
+    n_targets: list[int],
+    fill_fractions: list[float],
+    n_seeds: int = 1,
+    base_seed: int = 0,
+    connectivity: int | None = None,
+) -> Iterator[BatchConfig]:
+    """
+    Lazily yields one config per combination of the parameter lists and seed.
+    Every config gets its own seed derived from (base_seed, index), so each
+    maze has an independent, reproducible random stream no matter which
+    worker solves it or in which order.
+    """
+    grid = itertools.product(rows, cols, n_targets, fill_fractions, range(n_seeds))
+    for index, (r, c, k, fill, _) in enumerate(grid):
+        seed = np.random.SeedSequence([base_seed, index]).generate_state(1)[0]
+        yield BatchConfig(index, r, c, k, fill, int(seed), connectivity)
+
+
+def solve_config(config: BatchConfig) -> dict:
+    """
+    Generates and solves one maze, returning a flat, JSON friendly record.
+    """
+    start = time.perf_counter()
+    try:
+        maze = Maze(
+            rows=config.rows,
+            cols=config.cols,
+            n_targets=config.n_targets,
+            fill_fraction=config.fill_fraction,
+            random_seed=config.seed,
+            connectivity=config.connectivity,
+        )
+    except ValueError as e:
+        return {**asdict(config), **_EMPTY_RESULT, "error": str(e)}
+    generated = time.perf_counter()
+
+    solver = MazeSolver(maze)
+    best_cell, best_dist_sum = solver.find_optimal_point()
+    solved = time.perf_counter()
+
+    reachable = best_dist_sum != float("inf")
+    return {
+        **asdict(config),
+        "optimal_cell": list(best_cell) if reachable else None,
+        "distance_sum": best_dist_sum if reachable else None,
+        "reachable": reachable,
+        "generate_seconds": generated - start,
+        "solve_seconds": solved - generated,
+        "error": None,
+    }
+
+
+_EMPTY_RESULT = {
+    "optimal_cell": None,
+    "distance_sum": None,
+    "reachable": False,
+    "generate_seconds": None,
+    "solve_seconds": None,
+}
+
+
+def run_batch(
+    configs: Iterable[BatchConfig],
+    out=None,
+    workers: int = 1,
+    max_pending: int | None = None,
+) -> int:
+    """
+    Solves configs on a pool of `workers` processes and streams one record
+    per maze to `out` as soon as it finishes, in completion order (records
+    carry the config index). `out` is a path ending in .jsonl or .parquet, a
+    writable text file, or None for stdout.
+
+    Configs are consumed lazily with at most `max_pending` (default
+    2 * workers) mazes in flight, so neither configs nor results are all held
+    in memory. Returns the number of records written.
+    """
+    writer = _open_writer(out)
+    max_pending = max_pending or 2 * workers
+    configs = iter(configs)
+    written = 0
+    try:
+        if workers <= 1:
+            for config in configs:
+                writer.write(solve_config(config))
+                written += 1
+            return written
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {
+                pool.submit(solve_config, c)
+                for c in itertools.islice(configs, max_pending)
+            }
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    writer.write(future.result())
+                    written += 1
+                for config in itertools.islice(configs, len(done)):
+                    pending.add(pool.submit(solve_config, config))
+        return written
+    finally:
+        writer.close()
+
+
+class _JsonlWriter:
+    def __init__(self, out):
+        self._owned = isinstance(out, str)
+        self._file = open(out, "w") if self._owned else (out or sys.stdout)
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._owned:
+            self._file.close()
+
+
+class _ParquetWriter:
+    """
+    Buffers records into row groups of `batch_size` rows, needs pyarrow.
+    """
+
+    def __init__(self, path: str, batch_size: int = 1024):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("Writing .parquet results requires pyarrow.") from e
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._path = path
+        self._writer = None
+        self._rows = []
+        self._batch_size = batch_size
+
+    def write(self, record: dict) -> None:
+        self._rows.append(record)
+        if len(self._rows) >= self._batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        pa = self._pa
+        schema = pa.schema(
+            [(name, pa.int64()) for name in ("index", "rows", "cols", "n_targets")]
+            + [
+                ("fill_fraction", pa.float64()),
+                ("seed", pa.int64()),
+                ("connectivity", pa.int64()),
+                ("optimal_cell", pa.list_(pa.int64())),
+                ("distance_sum", pa.int64()),
+                ("reachable", pa.bool_()),
+                ("generate_seconds", pa.float64()),
+                ("solve_seconds", pa.float64()),
+                ("error", pa.string()),
+            ]
+        )
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._path, schema)
+        self._writer.write_table(pa.Table.from_pylist(self._rows, schema=schema))
+        self._rows = []
+
+    def close(self) -> None:
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _open_writer(out):
+    if isinstance(out, str) and out.endswith(".parquet"):
+        return _ParquetWriter(out)
+    return _JsonlWriter(out)
@@ -0,0 +1,96 @@
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+
+class DistanceFieldCache:
+    """
+    LRU cache of BFS results (distance and parent arrays) keyed by the content
+    hash of a maze's walls, the source cell and the connectivity.
+
+    Entries are kept in memory up to `max_bytes`, least recently used first
+    out. With a `spill_dir`, every entry is also written there as `.npy`
+    files and later looked up with memory mapping, so another process (or
+    this one after eviction) skips the BFS entirely. Entries found on disk
+    are kept in memory again.
+
+    Cached arrays are read-only and shared between callers.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024**2, spill_dir: str | None = None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.nbytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[np.ndarray, ...]] = OrderedDict()
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(maze, source: tuple[int, ...], connectivity: int) -> str:
+        cell = "_".join(str(int(x)) for x in source)
+        return f"{maze.content_hash()}-{cell}-c{connectivity}"
+
+    def _paths(self, key: str, n_arrays: int) -> list[str]:
+        return [os.path.join(self.spill_dir, f"{key}.{i}.npy") for i in range(n_arrays)]
+
+    def get(self, key: str, n_arrays: int = 2) -> tuple[np.ndarray, ...] | None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        if self.spill_dir is not None:
+            paths = self._paths(key, n_arrays)
+            if all(os.path.exists(p) for p in paths):
+                self.disk_hits += 1
+                arrays = tuple(np.load(p, mmap_mode="r") for p in paths)
+                self._insert(key, arrays)
+                return arrays
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, arrays: tuple[np.ndarray, ...]) -> None:
+        for array in arrays:
+            array.setflags(write=False)
+        if self.spill_dir is not None:
+            for path, array in zip(self._paths(key, len(arrays)), arrays):
+                if not os.path.exists(path):
+                    _save_atomic(path, array)
+        self._insert(key, arrays)
+
+    def _insert(self, key: str, arrays: tuple[np.ndarray, ...]) -> None:
+        size = sum(array.nbytes for array in arrays)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.nbytes -= sum(array.nbytes for array in self._entries.pop(key))
+        self._entries[key] = arrays
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= sum(array.nbytes for array in evicted)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+
+def _save_atomic(path: str, array: np.ndarray) -> None:
+    # Write next to the target and rename, readers never see a partial file.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".npy")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,108 @@
+import numpy as np
+
+from lib.distance import neighbour_offsets
+
+
+def label_components(is_open: np.ndarray, connectivity: int) -> np.ndarray:
+    """
+    Labels the connected regions of open cells with a vectorized union-find:
+    every round hooks the root of each edge's larger end onto the smaller
+    root, then compresses all paths by pointer jumping, until no edge joins
+    two roots. Edges are collected once, between runs of open cells.
+    Returns an int32 array shaped like is_open holding the component of each
+    open cell, numbered 0, 1, ... in row-major order of their first cell, and
+    -1 for walls.
+    """
+    shape = is_open.shape
+    if is_open.size == 0:
+        return np.full(shape, -1, dtype=np.int32)
+    # Start from runs of open cells along the last axis, which are connected
+    # for every connectivity, so the union-find works on runs, not cells.
+    run_starts = is_open.copy()
+    run_starts[..., 1:] &= ~is_open[..., :-1]
+    roots = np.cumsum(run_starts.reshape(-1), dtype=np.int32).reshape(shape) - 1
+    roots[~is_open] = -1
+
+    # Offsets come in +/- pairs, the second half covers every edge once. Its
+    # first one is the step along a run.
+    directions = neighbour_offsets(is_open.ndim, connectivity)
+    ends_a, ends_b = [], []
+    for delta in directions[len(directions) // 2 + 1 :]:
+        a = roots[tuple(slice(max(-d, 0), n - max(d, 0)) for d, n in zip(delta, shape))]
+        b = roots[tuple(slice(max(d, 0), n - max(-d, 0)) for d, n in zip(delta, shape))]
+        joins = (a >= 0) & (b >= 0) & (a != b)
+        a, b = a[joins], b[joins]
+        # Neighbouring runs touch along many cells, keep one edge per stretch.
+        fresh = np.ones(a.size, dtype=bool)
+        fresh[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1])
+        ends_a.append(a[fresh])
+        ends_b.append(b[fresh])
+    a, b = np.concatenate(ends_a), np.concatenate(ends_b)
+
+    parent = np.arange(int(roots.max()) + 1, dtype=np.int32)
+    while True:
+        # parent is fully compressed here, so these are the current roots.
+        root_a, root_b = parent[a], parent[b]
+        joins = root_a != root_b
+        if not joins.any():
+            break
+        # Edges inside a component never join anything again.
+        a, b, root_a, root_b = a[joins], b[joins], root_a[joins], root_b[joins]
+        # Parents only ever point to smaller ids, so no cycles form. When a
+        # root has several smaller neighbours, one wins this round and the
+        # others are joined by later rounds.
+        parent[np.maximum(root_a, root_b)] = np.minimum(root_a, root_b)
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    # Roots are the smallest run id of their component, so numbering them in
+    # order numbers components by their first cell.
+    component = np.cumsum(parent == np.arange(parent.size), dtype=np.int32) - 1
+    labels = np.full(shape, -1, dtype=np.int32)
+    labels[is_open] = component[parent[roots[is_open]]]
+    return labels
+
+
+class ComponentIndex:
+    """
+    The connected regions of open cells of a grid for one connectivity, see
+    `label_components`.
+    """
+
+    def __init__(self, is_open: np.ndarray, connectivity: int = 8):
+        self.shape = is_open.shape
+        self.connectivity = connectivity
+        self.labels = label_components(is_open, connectivity)
+        self.sizes = np.bincount(self.labels[is_open])
+        self.count = self.sizes.size
+
+    def label_of(self, cell: tuple[int, ...]) -> int:
+        """
+        Returns the component of a cell, or -1 for a wall.
+        """
+        return int(self.labels[tuple(cell)])
+
+    def same_component(self, cells: list[tuple[int, ...]]) -> bool:
+        """
+        Returns True if all cells are open and in one component.
+        """
+        labels = {self.label_of(cell) for cell in cells}
+        return len(labels) <= 1 and -1 not in labels
+
+    def bounding_box(self, label: int) -> tuple[slice, ...]:
+        """
+        Returns the slices of the smallest box holding every cell of the
+        component. Every shortest path between two of its cells stays inside.
+        """
+        mask = self.labels == label
+        box = []
+        for axis in range(mask.ndim):
+            others = tuple(a for a in range(mask.ndim) if a != axis)
+            hits = np.flatnonzero(mask.any(axis=others))
+            if hits.size == 0:
+                raise ValueError(f"No component {label}.")
+            box.append(slice(int(hits[0]), int(hits[-1]) + 1))
+        return tuple(box)
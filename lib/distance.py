@@ -1,12 +1,54 @@
 from collections import deque
+from itertools import chain, product
+
+import numpy as np
+
+from lib.instrument import phase
 from lib.maze import Maze
 
+# Distance value of cells that cannot be reached from the BFS source.
+UNREACHABLE = -1
+# Direction value of the BFS source and of unreached cells.
+NO_PARENT = -1
+# 8-connected neighbour offsets, a direction array stores indices into this list.
+DIRECTIONS = [(x, y) for x in [-1, 0, 1] for y in [-1, 0, 1] if (x, y) != (0, 0)]
+
+# Engines behind `DistanceCalculator.bfs_distance_array`, fastest first:
+# a numba-compiled scalar BFS (see lib.kernels), the wavefront BFS on whole
+# numpy masks, and the scalar BFS run by the interpreter.
+BFS_BACKENDS = ("numba", "numpy", "python")
+
+
+def neighbour_offsets(ndim: int, connectivity: int) -> list[tuple[int, ...]]:
+    """
+    Returns the neighbour offsets of an ndim grid, in the same order as
+    DIRECTIONS. connectivity counts the neighbours of a cell, e.g. 4 or 8 in
+    2D and 6, 18 or 26 in 3D.
+    """
+    deltas = [d for d in product((-1, 0, 1), repeat=ndim) if any(d)]
+    for max_nonzero in range(1, ndim + 1):
+        allowed = [d for d in deltas if np.count_nonzero(d) <= max_nonzero]
+        if len(allowed) == connectivity:
+            return allowed
+    raise ValueError(f"Unsupported connectivity {connectivity} for {ndim}D grids.")
+
 
-def reconstruct_path(parent_map, start, goal):
+def reconstruct_path(parent_map, start, goal, directions=None, graph=None):
     """
     Reconstructs a path from start -> goal using parent_map.
+    parent_map is either the dict returned by `bfs_distance_with_parents`,
+    a direction array returned by `bfs_distance_array`, in which case
+    directions lists the offsets it indexes (DIRECTIONS by default), or the
+    node parents returned by `GraphIndex.bfs` when graph is given.
     Returns a list of cells (row, col) in order, or an empty list if unreachable.
     """
+    if graph is not None:
+        return _reconstruct_path_from_graph(parent_map, start, goal, graph)
+    if isinstance(parent_map, np.ndarray):
+        return _reconstruct_path_from_directions(
+            parent_map, start, goal, DIRECTIONS if directions is None else directions
+        )
+
     if goal not in parent_map:
         return []
 
@@ -19,14 +61,196 @@ def reconstruct_path(parent_map, start, goal):
     return path if path and path[0] == start else []
 
 
+def _reconstruct_path_from_graph(parents: np.ndarray, start, goal, graph):
+    start_id, node = graph.node_id(start), graph.node_id(goal)
+    if start_id < 0 or node < 0:
+        return []
+    nodes = [node]
+    for _ in range(parents.size):
+        if node == start_id:
+            return [graph.cell_of(n) for n in reversed(nodes)]
+        node = parents[node]
+        if node == NO_PARENT:
+            return []
+        nodes.append(node)
+    return []
+
+
+def _reconstruct_path_from_directions(parent_dirs: np.ndarray, start, goal, directions):
+    start, current = tuple(start), tuple(goal)
+    path = [current]
+    # A BFS tree path never visits more cells than the grid holds.
+    for _ in range(parent_dirs.size):
+        if current == start:
+            path.reverse()
+            return path
+        k = parent_dirs[current]
+        if k == NO_PARENT:
+            return []
+        current = tuple(x - d for x, d in zip(current, directions[k]))
+        path.append(current)
+    return []
+
+
+def path_tree(
+    fields: np.ndarray, start: tuple[int, ...], directions=None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Walks the distance fields of several sources (a (k, *shape) array, e.g.
+    one BFS field per target) downhill from start back to each source, all
+    walkers at once, without any new search. Each step takes the lowest
+    index in directions (DIRECTIONS by default) that goes one level down.
+    Every walk is a shortest path from start, so a cell lies at the same
+    step on every walk through it and shared cells are kept once, forming a
+    tree rooted at start (a cell's parent comes from the lowest source).
+    Returns:
+        cells, parents
+    where cells is an (n, ndim) int64 array of the distinct cells ordered by
+    distance from start (start first), and parents is an (n,) int32 array
+    with the index into cells of each cell's predecessor, NO_PARENT for
+    start. Sources that cannot reach start add no cells.
+    """
+    directions = DIRECTIONS if directions is None else directions
+    k, shape = fields.shape[0], fields.shape[1:]
+    # Pad with unreachable cells so neighbours never leave the array.
+    padded = np.full((k,) + tuple(n + 2 for n in shape), UNREACHABLE, np.int32)
+    padded[(slice(None),) + (slice(1, -1),) * len(shape)] = fields
+    flat = padded.reshape(k, -1)
+    strides = np.array(padded.strides[1:]) // padded.itemsize
+    offsets = np.array(directions) @ strides
+
+    root = np.ravel_multi_index(tuple(x + 1 for x in start), padded.shape[1:])
+    position = np.full(k, root, dtype=np.int64)
+    level = flat[:, root].copy()
+    step_cells, step_parents = [np.array([root])], [np.array([-1])]
+    walkers = np.flatnonzero(level > 0)
+    while walkers.size:
+        current, wanted = position[walkers], level[walkers] - 1
+        step = np.full(walkers.size, -1, dtype=np.int64)
+        for offset in offsets:
+            hit = (step < 0) & (flat[walkers, current + offset] == wanted)
+            step[hit] = current[hit] + offset
+        # Walkers are in source order, so the first of a cell is the lowest.
+        cells, first = np.unique(step, return_index=True)
+        step_cells.append(cells)
+        step_parents.append(current[first])
+        position[walkers], level[walkers] = step, wanted
+        walkers = walkers[wanted > 0]
+
+    flat_cells = np.concatenate(step_cells)
+    flat_parents = np.concatenate(step_parents)
+    order = np.argsort(flat_cells)
+    parents = order[np.searchsorted(flat_cells[order], flat_parents)].astype(np.int32)
+    parents[0] = NO_PARENT
+    cells = np.stack(np.unravel_index(flat_cells, padded.shape[1:]), axis=1) - 1
+    return cells, parents
+
+
+def seeded_bfs(
+    distances: np.ndarray, is_open: np.ndarray, seeds: np.ndarray, offsets
+) -> None:
+    """
+    BFS on flat arrays from many seed cells at once, each starting at the
+    distance it already holds. Open cells are lowered in place to the
+    smallest seed distance plus the steps from that seed, where this beats
+    what they hold (UNREACHABLE counts as infinite). Seeds need not be open,
+    but open cells need a ring of closed cells around them so that the
+    offsets stay in bounds.
+    """
+    seed_dist = distances[seeds]
+    order = np.argsort(seed_dist, kind="stable")
+    seeds, seed_dist = seeds[order], seed_dist[order]
+    levels, starts = np.unique(seed_dist, return_index=True)
+    buckets = {
+        int(level): [part] for level, part in zip(levels, np.split(seeds, starts[1:]))
+    }
+
+    while buckets:
+        level = min(buckets)
+        frontier = np.concatenate(buckets.pop(level))
+        # Cells lowered below this level since they were bucketed are done.
+        frontier = frontier[distances[frontier] == level]
+        reached = []
+        for offset in offsets:
+            candidates = frontier + offset
+            candidates = candidates[is_open[candidates]]
+            d = distances[candidates]
+            candidates = candidates[(d == UNREACHABLE) | (d > level + 1)]
+            distances[candidates] = level + 1
+            reached.append(candidates)
+        reached = np.concatenate(reached)
+        if reached.size:
+            buckets.setdefault(level + 1, []).append(reached)
+
+
+def best_candidate(
+    dist_sum: np.ndarray, candidates: np.ndarray
+) -> tuple[tuple[int, ...], float]:
+    """
+    Returns the first candidate cell in row-major order with the smallest sum,
+    or ((-1, ...), inf) when there is no candidate.
+    """
+    candidate_idx = np.flatnonzero(candidates)
+    if candidate_idx.size == 0:
+        return (-1,) * dist_sum.ndim, float("inf")
+    best = candidate_idx[np.argmin(dist_sum.reshape(-1)[candidate_idx])]
+    cell = np.unravel_index(best, dist_sum.shape)
+    return tuple(int(x) for x in cell), int(dist_sum.reshape(-1)[best])
+
+
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount64(words: np.ndarray) -> np.ndarray:
+    """
+    Returns the number of set bits of each uint64 word as a uint8 array.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    as_bytes = words.view(np.uint8).reshape(words.shape + (8,))
+    return _BYTE_POPCOUNT[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+def resolve_backend(backend: str) -> str:
+    """
+    Returns the BFS backend to use for a requested one, see BFS_BACKENDS.
+    """
+    if backend not in ("auto", *BFS_BACKENDS):
+        raise ValueError(
+            f"Unknown BFS backend {backend!r}, expected 'auto' or one of {BFS_BACKENDS}."
+        )
+    if backend in ("auto", "numba"):
+        from lib.kernels import compiled_bfs_kernel
+
+        return "numba" if compiled_bfs_kernel() is not None else "numpy"
+    return backend
+
+
 class DistanceCalculator:
-    def __init__(self, maze: Maze):
+    def __init__(self, maze: Maze, cache=None, stats=None, backend: str = "auto"):
+        """
+        :param maze: The maze to compute distances on.
+        :param cache: Optional `DistanceFieldCache` consulted by
+                      `bfs_distance_array` before running a BFS.
+        :param stats: Optional `SolverStats` collecting the time of every BFS
+                      and the nodes expanded, peak frontier size and bytes of
+                      the arrays it holds.
+        :param backend: Engine of `bfs_distance_array`, one of BFS_BACKENDS or
+                        "auto" for the fastest one available. "numba" falls
+                        back to "numpy" when numba is not installed.
+        """
         self.maze = maze
+        self.cache = cache
+        self.stats = stats
+        self.backend = resolve_backend(backend)
         self.num_rows = maze.num_rows
         self.num_cols = maze.num_cols
-        self.directions = [
-            (x, y) for x in [-1, 0, 1] for y in [-1, 0, 1] if (x, y) != (0, 0)
-        ]
+        self.directions = DIRECTIONS
+        # Cells reached by all `bounded_distance_sum` calls so far.
+        self.bounded_cells_reached = 0
+        # Arrays reused by the compiled `bounded_distance_sum`, see
+        # `_bounded_kernel_sum`.
+        self._bounded_scratch = None
 
     def bfs_distance_with_parents(
         self, start_row: int, start_col: int
@@ -39,6 +263,9 @@ class DistanceCalculator:
             distance_map[(r,c)] = BFS distance from start -> (r,c)
             parent_map[(r,c)] = (prev_r, prev_c) in the BFS tree
                                 or None if (r,c) is the start node.
+
+        This is the reference implementation, see `bfs_distance_array` for the
+        vectorized engine.
         """
         visited = set()
         distance_map = {}
@@ -63,6 +290,356 @@ class DistanceCalculator:
 
         return distance_map, parent_map
 
+    def bfs_distance_array(
+        self, start_row: int, start_col: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Performs a wavefront BFS from (start_row, start_col), growing the whole
+        frontier one level at a time with shifted boolean masks.
+        Returns:
+            distances, parent_dirs
+        where:
+            distances is a (rows, cols) int32 array of BFS distances, with
+                UNREACHABLE for walls and cells that cannot be reached.
+            parent_dirs is a (rows, cols) int8 array holding the index into
+                DIRECTIONS of the step that reached each cell, or NO_PARENT
+                for the start and unreached cells. It can be passed to
+                `reconstruct_path` in place of a parent_map.
+        Among frontier cells that can reach a new cell, the one in the lowest
+        direction index becomes its parent.
+        With a cache, the returned arrays are read-only and may be shared.
+        """
+        with phase(self.stats, "bfs", source=(start_row, start_col)):
+            return self._bfs_distance_array(start_row, start_col)
+
+    def _bfs_distance_array(
+        self, start_row: int, start_col: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if self.cache is not None:
+            key = self.cache.key(
+                self.maze, (start_row, start_col), len(self.directions)
+            )
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        rows, cols = self.num_rows, self.num_cols
+        # Pad by one blocked cell on every side so shifted slices stay in bounds.
+        is_open = np.zeros((rows + 2, cols + 2), dtype=bool)
+        is_open[1:-1, 1:-1] = self.maze.grid != ord(self.maze.wall_cell)
+        if self.backend == "numpy":
+            distances, parent_dirs = self._wavefront(is_open, start_row, start_col)
+        else:
+            distances, parent_dirs = self._scalar_bfs(is_open, start_row, start_col)
+        result = (
+            np.ascontiguousarray(distances[1:-1, 1:-1]),
+            np.ascontiguousarray(parent_dirs[1:-1, 1:-1]),
+        )
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
+
+    def _wavefront(
+        self, is_open: np.ndarray, start_row: int, start_col: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        rows, cols = self.num_rows, self.num_cols
+        distances = np.full((rows + 2, cols + 2), UNREACHABLE, dtype=np.int32)
+        parent_dirs = np.full((rows + 2, cols + 2), NO_PARENT, dtype=np.int8)
+        frontier = np.zeros((rows + 2, cols + 2), dtype=bool)
+
+        r, c = start_row + 1, start_col + 1
+        distances[r, c] = 0
+        frontier[r, c] = True
+        top, bottom, left, right = r, r + 1, c, c + 1
+
+        level = 0
+        while True:
+            # Only the frontier's bounding box grown by one cell can change.
+            top, left = max(top - 1, 1), max(left - 1, 1)
+            bottom, right = min(bottom + 1, rows + 1), min(right + 1, cols + 1)
+            window = np.s_[top:bottom, left:right]
+
+            todo = is_open[window] & (distances[window] == UNREACHABLE)
+            reached = np.zeros_like(todo)
+            window_dirs = parent_dirs[window]
+            for k, (dr, dc) in enumerate(self.directions):
+                hit = frontier[top - dr : bottom - dr, left - dc : right - dc] & todo
+                window_dirs[hit] = k
+                todo &= ~hit
+                reached |= hit
+
+            level += 1
+            frontier[window] = reached
+            hit_rows = np.flatnonzero(reached.any(axis=1))
+            if hit_rows.size == 0:
+                break
+            if self.stats is not None:
+                n_reached = np.count_nonzero(reached)
+                self.stats.count("nodes_expanded", n_reached)
+                self.stats.peak("peak_queue", n_reached)
+            distances[window][reached] = level
+            hit_cols = np.flatnonzero(reached.any(axis=0))
+            top, bottom = top + hit_rows[0], top + hit_rows[-1] + 1
+            left, right = left + hit_cols[0], left + hit_cols[-1] + 1
+
+        if self.stats is not None:
+            self.stats.peak(
+                "bytes_held",
+                is_open.nbytes
+                + distances.nbytes
+                + parent_dirs.nbytes
+                + frontier.nbytes,
+            )
+        return distances, parent_dirs
+
+    def _scalar_bfs(
+        self, is_open: np.ndarray, start_row: int, start_col: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        from lib.kernels import run_bfs_kernel
+
+        width = self.num_cols + 2
+        offsets = np.array([dr * width + dc for dr, dc in self.directions])
+        distances, parent_dirs, reached, peak = run_bfs_kernel(
+            is_open.reshape(-1),
+            (start_row + 1) * width + start_col + 1,
+            offsets,
+            compiled=self.backend == "numba",
+        )
+        if self.stats is not None:
+            self.stats.count("nodes_expanded", reached - 1)
+            self.stats.peak("peak_queue", peak)
+            # The queue holds one int64 per open cell.
+            self.stats.peak(
+                "bytes_held",
+                is_open.nbytes + distances.nbytes + parent_dirs.nbytes + 8 * reached,
+            )
+        return distances.reshape(is_open.shape), parent_dirs.reshape(is_open.shape)
+
+    def bfs_distance_graph(
+        self, start_row: int, start_col: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Performs BFS from (start_row, start_col) on the maze's cached
+        `GraphIndex` (see `Maze.graph_index`).
+        Returns:
+            distances, parents
+        indexed by node id, see `GraphIndex.bfs`. Pass graph=self.graph to
+        `reconstruct_path` to turn parents into a path of cells.
+        """
+        graph = self.graph
+        source = graph.node_id((start_row, start_col))
+        if source < 0:
+            raise ValueError(f"Cell {(start_row, start_col)} is a wall.")
+        with phase(self.stats, "bfs", source=(start_row, start_col)):
+            return graph.bfs(source, stats=self.stats)
+
+    def bounded_distance_sum(
+        self, start_row: int, start_col: int, targets: np.ndarray, bound: float
+    ) -> int | None:
+        """
+        Returns the sum of BFS distances from (start_row, start_col) to the
+        (k, 2) array of targets, or None as soon as it is known to exceed
+        bound or a target turns out to be unreachable.
+        After each level, every target not reached yet is at least one level
+        further and at least its Chebyshev distance away (a lower bound on
+        8-connected grids), so the BFS stops once the distances found so far
+        plus those bounds go over bound. It runs on the compiled kernel with
+        the "numba" backend, and on the maze's `GraphIndex` otherwise.
+        """
+        if self.backend == "numba":
+            return self._bounded_kernel_sum(start_row, start_col, targets, bound)
+        graph = self.graph
+        source = graph.node_id((start_row, start_col))
+        if source < 0:
+            raise ValueError(f"Cell {(start_row, start_col)} is a wall.")
+        target_nodes = graph.cell_ids[
+            np.ravel_multi_index((targets[:, 0], targets[:, 1]), graph.shape)
+        ]
+        chebyshev = np.maximum(
+            np.abs(targets[:, 0] - start_row), np.abs(targets[:, 1] - start_col)
+        )
+        pending = target_nodes >= 0
+        if not pending.all():
+            return None
+        total = 0
+
+        distances = np.full(graph.num_nodes, UNREACHABLE, dtype=np.int32)
+        parents = np.full(graph.num_nodes, NO_PARENT, dtype=np.int32)
+        levels = graph.bfs_levels(source, distances, parents, self.stats)
+        # Level 0 is checked before the generator starts.
+        distances[source] = 0
+        try:
+            for level in chain([0], levels):
+                arrived = pending & (distances[target_nodes] == level)
+                total += level * int(np.count_nonzero(arrived))
+                pending &= ~arrived
+                if not pending.any():
+                    return total
+                lower = total + int(np.maximum(chebyshev[pending], level + 1).sum())
+                if lower > bound:
+                    return None
+            return None
+        finally:
+            self.bounded_cells_reached += int(
+                np.count_nonzero(distances != UNREACHABLE)
+            )
+
+    def _bounded_kernel_sum(
+        self, start_row: int, start_col: int, targets: np.ndarray, bound: float
+    ) -> int | None:
+        from lib.kernels import compiled_bounded_sum_kernel
+
+        width = self.num_cols + 2
+        key = (self.maze.content_hash(), targets.tobytes())
+        if self._bounded_scratch is None or self._bounded_scratch[0] != key:
+            # Built once per maze and targets, the BFS then only touches the
+            # cells it reaches.
+            is_open = np.zeros((self.num_rows + 2, width), dtype=bool)
+            is_open[1:-1, 1:-1] = self.maze.grid != ord(self.maze.wall_cell)
+            is_open = is_open.reshape(-1)
+            cells, weights = np.unique(
+                (targets[:, 0] + 1) * width + targets[:, 1] + 1, return_counts=True
+            )
+            target_at = np.full(is_open.size, -1, dtype=np.int32)
+            target_at[cells] = np.arange(len(cells))
+            self._bounded_scratch = (
+                key,
+                is_open,
+                np.array([dr * width + dc for dr, dc in self.directions]),
+                np.full(is_open.size, UNREACHABLE, dtype=np.int32),
+                np.empty(is_open.size, dtype=np.int64),
+                cells,
+                target_at,
+                weights.astype(np.int64),
+            )
+        _, is_open, offsets, distances, queue, cells, target_at, weights = (
+            self._bounded_scratch
+        )
+        source = (start_row + 1) * width + start_col + 1
+        if not is_open[source]:
+            raise ValueError(f"Cell {(start_row, start_col)} is a wall.")
+        if not is_open[cells].all():
+            return None
+        rows, cols = np.divmod(cells, width)
+        chebyshev = np.maximum(
+            np.abs(rows - 1 - start_row), np.abs(cols - 1 - start_col)
+        )
+        # An infinite bound never cuts, a sum of distances fits in an int64.
+        limit = np.iinfo(np.int64).max if bound == float("inf") else int(bound)
+        total, queued = compiled_bounded_sum_kernel()(
+            is_open,
+            source,
+            offsets,
+            distances,
+            queue,
+            target_at,
+            weights,
+            chebyshev,
+            limit,
+        )
+        distances[queue[:queued]] = UNREACHABLE
+        self.bounded_cells_reached += int(queued)
+        if self.stats is not None:
+            self.stats.count("nodes_expanded", int(queued) - 1)
+        return None if total < 0 else int(total)
+
+    @property
+    def graph(self):
+        return self.maze.graph_index(len(self.directions))
+
+    def multi_source_distance_sum(
+        self, sources: list[tuple[int, int]]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Runs one BFS per source simultaneously, keeping for every cell a bitmask
+        (in uint64 words) of the sources that have reached it. Each level adds
+        popcount(newly arrived sources) * level into a running sum.
+        Returns:
+            dist_sum, reached_count
+        where:
+            dist_sum is a (rows, cols) int64 array with the sum of the BFS
+                distances from the sources that reach each cell.
+            reached_count is a (rows, cols) int32 array with the number of
+                sources that reach each cell, the sum is only complete where it
+                equals len(sources).
+        Memory is O(cells * ceil(len(sources) / 64)) instead of one distance
+        map per source.
+        """
+        with phase(self.stats, "multi_source_bfs", n_sources=len(sources)):
+            return self._multi_source_distance_sum(sources)
+
+    def _multi_source_distance_sum(
+        self, sources: list[tuple[int, int]]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        rows, cols = self.num_rows, self.num_cols
+        n_words = max(1, -(-len(sources) // 64))
+        open_bits = np.zeros((rows + 2, cols + 2), dtype=np.uint64)
+        open_bits[1:-1, 1:-1][self.maze.grid != ord(self.maze.wall_cell)] = ~np.uint64(
+            0
+        )
+        seen = np.zeros((n_words, rows + 2, cols + 2), dtype=np.uint64)
+        # Bits that arrived at each cell on the previous level.
+        frontier = np.zeros_like(seen)
+        dist_sum = np.zeros((rows + 2, cols + 2), dtype=np.int64)
+        reached_count = np.zeros((rows + 2, cols + 2), dtype=np.int32)
+
+        for i, (r, c) in enumerate(sources):
+            frontier[i // 64, r + 1, c + 1] |= np.uint64(1) << np.uint64(i % 64)
+        seen |= frontier
+        reached_count += _popcount64(frontier).sum(axis=0, dtype=np.int32)
+        if not sources:
+            return dist_sum[1:-1, 1:-1].copy(), reached_count[1:-1, 1:-1].copy()
+        src_rows, src_cols = zip(*sources)
+        top, bottom = min(src_rows) + 1, max(src_rows) + 2
+        left, right = min(src_cols) + 1, max(src_cols) + 2
+
+        level = 0
+        while True:
+            # Only the last arrivals' bounding box grown by one cell can change.
+            top, left = max(top - 1, 1), max(left - 1, 1)
+            bottom, right = min(bottom + 1, rows + 1), min(right + 1, cols + 1)
+            window = np.s_[:, top:bottom, left:right]
+
+            # The 8-neighbour OR is separable: dilate along rows, then columns.
+            # It also ORs in the cell itself, whose bits are already seen.
+            band = frontier[:, top - 1 : bottom + 1, left - 1 : right + 1]
+            rows_or = band[:, :-2] | band[:, 1:-1]
+            rows_or |= band[:, 2:]
+            arrived = rows_or[:, :, :-2] | rows_or[:, :, 1:-1]
+            arrived |= rows_or[:, :, 2:]
+            arrived &= open_bits[window[1:]]
+            arrived &= ~seen[window]
+
+            level += 1
+            frontier[window] = arrived
+            counts = _popcount64(arrived).sum(axis=0, dtype=np.int32)
+            hit_rows = np.flatnonzero(counts.any(axis=1))
+            if hit_rows.size == 0:
+                break
+            seen[window] |= arrived
+            reached_count[window[1:]] += counts
+            dist_sum[window[1:]] += counts * np.int64(level)
+            if self.stats is not None:
+                # One node per (cell, source) pair, as in separate BFS runs.
+                self.stats.count("nodes_expanded", counts.sum())
+                self.stats.peak("peak_queue", np.count_nonzero(counts))
+            hit_cols = np.flatnonzero(counts.any(axis=0))
+            top, bottom = top + hit_rows[0], top + hit_rows[-1] + 1
+            left, right = left + hit_cols[0], left + hit_cols[-1] + 1
+
+        if self.stats is not None:
+            self.stats.peak(
+                "bytes_held",
+                sum(
+                    a.nbytes
+                    for a in (open_bits, seen, frontier, dist_sum, reached_count)
+                ),
+            )
+        return (
+            np.ascontiguousarray(dist_sum[1:-1, 1:-1]),
+            np.ascontiguousarray(reached_count[1:-1, 1:-1]),
+        )
+
     def _is_valid_cell(self, r, c):
         """
         Returns True if in-bounds and not a wall ('#').
@@ -70,3 +647,126 @@ class DistanceCalculator:
         if 0 <= r < self.num_rows and 0 <= c < self.num_cols:
             return self.maze[r][c] != self.maze.wall_cell
         return False
+
+
+class GridDistanceCalculator:
+    """
+    BFS distances on an N-dimensional grid (e.g. a Maze3D), on flat indices
+    into the grid padded by one blocked cell, so a neighbour is a single
+    integer offset away and never out of bounds.
+    """
+
+    def __init__(self, is_open: np.ndarray, connectivity: int | None = None):
+        """
+        :param is_open: Boolean grid, True where a cell can be walked through.
+        :param connectivity: Number of neighbours per cell, defaults to all
+                             3**ndim - 1 of them (8 in 2D, 26 in 3D).
+        """
+        self.shape = is_open.shape
+        self.connectivity = connectivity or 3**is_open.ndim - 1
+        self.directions = neighbour_offsets(is_open.ndim, self.connectivity)
+
+        padded = np.zeros(tuple(n + 2 for n in self.shape), dtype=bool)
+        padded[(slice(1, -1),) * is_open.ndim] = is_open
+        self.padded_shape = padded.shape
+        self.is_open = padded.reshape(-1)
+        strides = np.array(padded.strides) // padded.itemsize
+        self.offsets = np.array(self.directions) @ strides
+
+    def flat_index(self, cell: tuple[int, ...]) -> int:
+        return int(np.ravel_multi_index(tuple(x + 1 for x in cell), self.padded_shape))
+
+    def _unpad(self, flat: np.ndarray) -> np.ndarray:
+        inner = (slice(1, -1),) * len(self.shape)
+        return np.ascontiguousarray(flat.reshape(self.padded_shape)[inner])
+
+    def bfs_distance_array(
+        self, start: tuple[int, ...]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Performs a level-synchronous BFS from the start cell, expanding the
+        frontier (an array of flat indices) by one neighbour offset at a time.
+        Returns distances and parent_dirs arrays shaped like the grid, with the
+        same conventions as `DistanceCalculator.bfs_distance_array`, where
+        parent_dirs indexes `self.directions`.
+        """
+        distances = np.full(self.is_open.size, UNREACHABLE, dtype=np.int32)
+        parent_dirs = np.full(self.is_open.size, NO_PARENT, dtype=np.int8)
+
+        frontier = np.array([self.flat_index(start)])
+        distances[frontier] = 0
+        level = 0
+        while frontier.size:
+            level += 1
+            reached = []
+            # Cells hit along one direction are distinct, and marking them
+            # before the next direction leaves each cell the lowest direction.
+            for k, offset in enumerate(self.offsets):
+                candidates = frontier + offset
+                candidates = candidates[self.is_open[candidates]]
+                candidates = candidates[distances[candidates] == UNREACHABLE]
+                distances[candidates] = level
+                parent_dirs[candidates] = k
+                reached.append(candidates)
+            frontier = np.concatenate(reached)
+
+        return self._unpad(distances), self._unpad(parent_dirs)
+
+    def distance_sum(
+        self, sources: list[tuple[int, ...]]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (dist_sum, reached_count) arrays shaped like the grid, with the
+        same meaning as `DistanceCalculator.multi_source_distance_sum`. One BFS
+        runs per source and is folded into the sum before the next one starts.
+        """
+        dist_sum = np.zeros(self.shape, dtype=np.int64)
+        reached_count = np.zeros(self.shape, dtype=np.int32)
+        for source in sources:
+            dist, _ = self.bfs_distance_array(source)
+            is_reached = dist != UNREACHABLE
+            np.add(dist_sum, dist, out=dist_sum, where=is_reached)
+            reached_count += is_reached
+        return dist_sum, reached_count
+
+    def multi_source_distance_sum(
+        self, sources: list[tuple[int, ...]]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Bit-parallel counterpart of `distance_sum`, see
+        `DistanceCalculator.multi_source_distance_sum`. Every level shifts the
+        whole flat grid once per neighbour offset.
+        """
+        n_words = max(1, -(-len(sources) // 64))
+        open_bits = np.where(self.is_open, ~np.uint64(0), np.uint64(0))
+        seen = np.zeros((n_words, self.is_open.size), dtype=np.uint64)
+        frontier = np.zeros_like(seen)
+        for i, source in enumerate(sources):
+            frontier[i // 64, self.flat_index(source)] |= np.uint64(1) << np.uint64(
+                i % 64
+            )
+        seen |= frontier
+        dist_sum = np.zeros(self.is_open.size, dtype=np.int64)
+        reached_count = _popcount64(frontier).sum(axis=0, dtype=np.int32)
+
+        level = 0
+        arrived = np.empty_like(seen)
+        while True:
+            level += 1
+            arrived[...] = 0
+            for offset in self.offsets:
+                if offset > 0:
+                    arrived[:, offset:] |= frontier[:, :-offset]
+                else:
+                    arrived[:, :offset] |= frontier[:, -offset:]
+            arrived &= open_bits
+            arrived &= ~seen
+            counts = _popcount64(arrived).sum(axis=0, dtype=np.int32)
+            if not counts.any():
+                break
+            seen |= arrived
+            frontier, arrived = arrived, frontier
+            reached_count += counts
+            dist_sum += counts * np.int64(level)
+
+        return self._unpad(dist_sum), self._unpad(reached_count)
@@ -0,0 +1,171 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+from lib.maze import Maze
+from lib.distance import UNREACHABLE, DistanceCalculator, best_candidate
+
+
+class DynamicMazeSolver:
+    """
+    Keeps one distance field per target and their running sum, and repairs
+    them in place when walls are added/removed or a target moves, instead of
+    re-running every BFS.
+
+    Removing a wall can only shorten distances, so the improvement is pushed
+    outwards from the opened cell (dynamic BFS). Adding a wall can only
+    lengthen them: the cells that lose every shortest-path parent are found
+    first and only that region is re-solved, seeded from its unaffected
+    border (decremental SSSP).
+    """
+
+    def __init__(self, maze: Maze):
+        self.maze = maze
+        self.distance_calculator = DistanceCalculator(maze)
+        self.directions = self.distance_calculator.directions
+        self.targets = maze.get_target_cells()
+
+        shape = (maze.num_rows, maze.num_cols)
+        self.fields = np.empty((len(self.targets),) + shape, dtype=np.int32)
+        self.dist_sum = np.zeros(shape, dtype=np.int64)
+        self.reached_count = np.zeros(shape, dtype=np.int32)
+        graph = self.distance_calculator.graph
+        for k, (tr, tc) in enumerate(self.targets):
+            distances, _ = self.distance_calculator.bfs_distance_graph(tr, tc)
+            self.fields[k] = graph.to_grid(distances, UNREACHABLE)
+            self._add_field(self.fields[k], sign=1)
+
+    def _add_field(self, field: np.ndarray, sign: int) -> None:
+        is_reached = field != UNREACHABLE
+        np.add(self.dist_sum, sign * field, out=self.dist_sum, where=is_reached)
+        self.reached_count += sign * is_reached
+
+    def _set_distance(self, field: np.ndarray, cell: tuple[int, int], d: int) -> None:
+        old = field[cell]
+        if old != UNREACHABLE:
+            self.dist_sum[cell] -= old
+            self.reached_count[cell] -= 1
+        if d != UNREACHABLE:
+            self.dist_sum[cell] += d
+            self.reached_count[cell] += 1
+        field[cell] = d
+
+    def find_optimal_point(self) -> tuple[tuple[int, int], float]:
+        """
+        Returns (best_cell, min_sum_of_distances) from the maintained fields.
+        """
+        candidates = self.maze.get_cell_mask(self.maze.empty_cell)
+        candidates &= self.reached_count == len(self.targets)
+        return best_candidate(self.dist_sum, candidates)
+
+    def _open_neighbours(self, r: int, c: int):
+        for dr, dc in self.directions:
+            nr, nc = r + dr, c + dc
+            if self.distance_calculator._is_valid_cell(nr, nc):
+                yield nr, nc
+
+    def add_wall(self, cell: tuple[int, int]) -> None:
+        """
+        Turns an open cell into a wall and repairs every distance field.
+        """
+        r, c = cell
+        if self.maze[r][c] == self.maze.wall_cell:
+            return
+        if self.maze[r][c] == self.maze.target_cell:
+            raise ValueError(f"Cell {cell} holds a target, move it first.")
+        self.maze[r][c] = self.maze.wall_cell
+        for field in self.fields:
+            self._repair_after_block(field, (r, c))
+
+    def remove_wall(self, cell: tuple[int, int]) -> None:
+        """
+        Turns a wall into an empty cell and repairs every distance field.
+        """
+        r, c = cell
+        if self.maze[r][c] != self.maze.wall_cell:
+            return
+        self.maze[r][c] = self.maze.empty_cell
+        for field in self.fields:
+            self._repair_after_open(field, (r, c))
+
+    def move_target(self, old: tuple[int, int], new: tuple[int, int]) -> None:
+        """
+        Moves the target at `old` to the empty cell `new`. The moved target's
+        field is recomputed, the other fields are not affected.
+        """
+        k = self.targets.index(tuple(old))
+        if self.maze[new[0]][new[1]] != self.maze.empty_cell:
+            raise ValueError(f"Cell {new} is not empty.")
+        self.maze[old[0]][old[1]] = self.maze.empty_cell
+        self.maze[new[0]][new[1]] = self.maze.target_cell
+        self.targets[k] = tuple(new)
+
+        self._add_field(self.fields[k], sign=-1)
+        self.fields[k], _ = self.distance_calculator.bfs_distance_array(*new)
+        self._add_field(self.fields[k], sign=1)
+
+    def _repair_after_open(self, field: np.ndarray, cell: tuple[int, int]) -> None:
+        best = min(
+            (field[n] for n in self._open_neighbours(*cell) if field[n] != UNREACHABLE),
+            default=UNREACHABLE,
+        )
+        if best == UNREACHABLE:
+            return
+        self._set_distance(field, cell, best + 1)
+
+        # Distances only shrink, and FIFO order settles each cell once.
+        queue = deque([cell])
+        while queue:
+            r, c = queue.popleft()
+            d = field[r, c] + 1
+            for n in self._open_neighbours(r, c):
+                if field[n] == UNREACHABLE or field[n] > d:
+                    self._set_distance(field, n, d)
+                    queue.append(n)
+
+    def _repair_after_block(self, field: np.ndarray, cell: tuple[int, int]) -> None:
+        if field[cell] == UNREACHABLE:
+            return
+
+        # Cells whose every shortest-path parent is affected, level by level.
+        # FIFO order means a level is complete before the next one is checked.
+        affected = {cell}
+        queue = deque([cell])
+        while queue:
+            u = queue.popleft()
+            for v in self._open_neighbours(*u):
+                if v in affected or field[v] != field[u] + 1:
+                    continue
+                supported = any(
+                    field[w] == field[v] - 1 and w not in affected
+                    for w in self._open_neighbours(*v)
+                )
+                if not supported:
+                    affected.add(v)
+                    queue.append(v)
+
+        self._set_distance(field, cell, UNREACHABLE)
+        affected.discard(cell)
+        for v in affected:
+            self._set_distance(field, v, UNREACHABLE)
+
+        # Re-solve the affected region from its unaffected border.
+        heap = []
+        for v in affected:
+            border = [
+                field[w]
+                for w in self._open_neighbours(*v)
+                if w not in affected and field[w] != UNREACHABLE
+            ]
+            if border:
+                heap.append((min(border) + 1, v))
+        heapq.heapify(heap)
+        while heap:
+            d, v = heapq.heappop(heap)
+            if field[v] != UNREACHABLE and field[v] <= d:
+                continue
+            self._set_distance(field, v, d)
+            for w in self._open_neighbours(*v):
+                if w in affected and (field[w] == UNREACHABLE or field[w] > d + 1):
+                    heapq.heappush(heap, (d + 1, w))
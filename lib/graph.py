@@ -0,0 +1,151 @@
+import numpy as np
+
+from lib.distance import NO_PARENT, UNREACHABLE, neighbour_offsets
+
+
+class GraphIndex:
+    """
+    The open cells of a grid compiled into a graph: open cells get dense
+    integer ids (in row-major order) and the adjacency for a connectivity is
+    stored in CSR form, the neighbours of node i being
+    indices[indptr[i]:indptr[i + 1]], ordered by direction.
+    """
+
+    def __init__(self, is_open: np.ndarray, connectivity: int = 8):
+        """
+        :param is_open: Boolean grid, True where a cell can be walked through.
+        :param connectivity: Number of neighbours per cell (4 or 8 in 2D).
+        """
+        self.shape = is_open.shape
+        self.connectivity = connectivity
+        self.directions = neighbour_offsets(is_open.ndim, connectivity)
+
+        # node id -> flat grid index, and flat grid index -> node id (or -1).
+        self.cells = np.flatnonzero(is_open)
+        self.num_nodes = self.cells.size
+        self.cell_ids = np.full(is_open.size, -1, dtype=np.int32)
+        self.cell_ids[self.cells] = np.arange(self.num_nodes, dtype=np.int32)
+
+        # Edges per direction, each list sorted by (unique) source id.
+        ids = self.cell_ids.reshape(self.shape)
+        edges = []
+        for delta in self.directions:
+            src = ids[
+                tuple(
+                    slice(max(-d, 0), n - max(d, 0)) for d, n in zip(delta, self.shape)
+                )
+            ]
+            dst = ids[
+                tuple(
+                    slice(max(d, 0), n - max(-d, 0)) for d, n in zip(delta, self.shape)
+                )
+            ]
+            valid = (src >= 0) & (dst >= 0)
+            edges.append((src[valid], dst[valid]))
+
+        degree = np.zeros(self.num_nodes, dtype=np.int64)
+        for src, _ in edges:
+            degree[src] += 1
+        self.indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(degree, out=self.indptr[1:])
+        self.indices = np.empty(self.indptr[-1], dtype=np.int32)
+        self.edge_dirs = np.empty(self.indptr[-1], dtype=np.int8)
+        fill = self.indptr[:-1].copy()
+        for k, (src, dst) in enumerate(edges):
+            self.indices[fill[src]] = dst
+            self.edge_dirs[fill[src]] = k
+            fill[src] += 1
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            a.nbytes
+            for a in (
+                self.cells,
+                self.cell_ids,
+                self.indptr,
+                self.indices,
+                self.edge_dirs,
+            )
+        )
+
+    def node_id(self, cell: tuple[int, ...]) -> int:
+        """
+        Returns the node id of a cell, or -1 for a wall.
+        """
+        return int(self.cell_ids[np.ravel_multi_index(cell, self.shape)])
+
+    def cell_of(self, node: int) -> tuple[int, ...]:
+        return tuple(int(x) for x in np.unravel_index(self.cells[node], self.shape))
+
+    def neighbours(self, node: int) -> np.ndarray:
+        return self.indices[self.indptr[node] : self.indptr[node + 1]]
+
+    def bfs(self, source: int, stats=None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Level-synchronous BFS over node ids from the source node.
+        Returns:
+            distances, parents
+        where distances is a (num_nodes,) int32 array (UNREACHABLE if not
+        reached) and parents is a (num_nodes,) int32 array of parent node ids
+        (NO_PARENT for the source and unreached nodes). As in the grid
+        engines, a node's parent is the frontier node reaching it along the
+        lowest direction index. An optional `SolverStats` counts the nodes
+        expanded and the peak frontier size.
+        """
+        distances = np.full(self.num_nodes, UNREACHABLE, dtype=np.int32)
+        parents = np.full(self.num_nodes, NO_PARENT, dtype=np.int32)
+        for _ in self.bfs_levels(source, distances, parents, stats):
+            pass
+        if stats is not None:
+            stats.peak("bytes_held", distances.nbytes + parents.nbytes)
+        return distances, parents
+
+    def bfs_levels(
+        self, source: int, distances: np.ndarray, parents: np.ndarray, stats=None
+    ):
+        """
+        Runs the BFS of `bfs` on the given distances and parents arrays
+        (initialised to UNREACHABLE and NO_PARENT), filling them in place and
+        yielding each level number once that level is complete, so callers
+        can stop early.
+        """
+        n_dirs = len(self.directions)
+        frontier = np.array([source], dtype=np.int64)
+        distances[source] = 0
+        level = 0
+        while frontier.size:
+            level += 1
+            starts = self.indptr[frontier]
+            counts = self.indptr[frontier + 1] - starts
+            owners = np.repeat(frontier, counts)
+            # Edge positions: starts[i], starts[i] + 1, ... for each frontier node.
+            edge_pos = np.arange(counts.sum()) + np.repeat(
+                starts - np.cumsum(counts) + counts, counts
+            )
+            nbrs = self.indices[edge_pos]
+            is_new = distances[nbrs] == UNREACHABLE
+            nbrs, owners = nbrs[is_new], owners[is_new]
+            order = np.argsort(
+                nbrs.astype(np.int64) * n_dirs + self.edge_dirs[edge_pos[is_new]]
+            )
+            nbrs = nbrs[order]
+            first = np.ones(nbrs.size, dtype=bool)
+            first[1:] = nbrs[1:] != nbrs[:-1]
+            frontier = nbrs[first].astype(np.int64)
+            if frontier.size == 0:
+                return
+            distances[frontier] = level
+            parents[frontier] = owners[order][first]
+            if stats is not None:
+                stats.count("nodes_expanded", frontier.size)
+                stats.peak("peak_queue", frontier.size)
+            yield level
+
+    def to_grid(self, values: np.ndarray, fill) -> np.ndarray:
+        """
+        Scatters a per-node array back onto the grid, walls get `fill`.
+        """
+        grid = np.full(int(np.prod(self.shape)), fill, dtype=values.dtype)
+        grid[self.cells] = values
+        return grid.reshape(self.shape)
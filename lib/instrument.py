@@ -0,0 +1,68 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Callable
+
+# Shared no-op context returned by `phase` when instrumentation is off.
+_NO_PHASE = nullcontext()
+
+
+class SolverStats:
+    """
+    Per-phase timings and counters collected by `DistanceCalculator` and
+    `MazeSolver` when passed as their `stats`.
+
+    timings[phase] and calls[phase] accumulate wall time and call counts.
+    counters holds totals (nodes_expanded) and high-water marks (peak_queue,
+    bytes_held). An optional tracer is called as
+    tracer(phase, seconds, data) at the end of every phase.
+    """
+
+    def __init__(self, tracer: Callable[[str, float, dict], None] | None = None):
+        self.tracer = tracer
+        self.timings = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    @contextmanager
+    def phase(self, name: str, **data):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.timings[name] += seconds
+            self.calls[name] += 1
+            if self.tracer is not None:
+                self.tracer(name, seconds, data)
+
+    def count(self, name: str, n: int) -> None:
+        self.counters[name] += int(n)
+
+    def peak(self, name: str, value: int) -> None:
+        self.counters[name] = max(self.counters[name], int(value))
+
+    def as_dict(self) -> dict:
+        return {
+            "timings": dict(self.timings),
+            "calls": dict(self.calls),
+            "counters": dict(self.counters),
+        }
+
+    def __str__(self) -> str:
+        lines = [
+            f"{name:<20} {self.timings[name]:10.4f}s  x{self.calls[name]}"
+            for name in sorted(self.timings, key=self.timings.get, reverse=True)
+        ]
+        lines += [f"{name:<20} {value:>12}" for name, value in self.counters.items()]
+        return "\n".join(lines)
+
+
+def phase(stats: SolverStats | None, name: str, **data):
+    """
+    Returns stats.phase(name, **data), or a shared no-op context when stats
+    is None.
+    """
+    if stats is None:
+        return _NO_PHASE
+    return stats.phase(name, **data)
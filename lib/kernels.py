@@ -0,0 +1,229 @@
+"""
+Scalar BFS kernels behind the "numba" and "python" backends of
+`DistanceCalculator` and its bounded distance sums, and a conformance check
+of all backends.
+
+The kernel works on flat arrays of a grid padded by one wall cell on every
+side, so neighbours are plain index offsets and need no bounds checks. It is
+compiled with numba when that is installed, and otherwise run by the
+interpreter on Python lists.
+
+    python -m lib.kernels  # exits 1 if the backends disagree
+"""
+
+from functools import cache
+
+import numpy as np
+
+from lib.distance import BFS_BACKENDS, DistanceCalculator, NO_PARENT, UNREACHABLE
+from lib.maze import Maze
+
+
+def bfs_kernel(is_open, source, offsets, distances, parent_dirs, queue):
+    """
+    BFS from the flat index source, filling distances and parent_dirs
+    (initialised to UNREACHABLE and NO_PARENT) in place, with queue as a
+    preallocated FIFO of one slot per open cell. A cell's parent direction is
+    the lowest index k of offsets for which a cell one level closer reaches it,
+    as in the wavefront engine: a later, lower k from the same level replaces
+    the one it was discovered by.
+    Returns:
+        reached, peak_queue
+    the number of cells reached (including the source) and the largest
+    number of cells queued at once.
+    """
+    distances[source] = 0
+    queue[0] = source
+    head, tail, peak = 0, 1, 1
+    n_dirs = len(offsets)
+    while head < tail:
+        cell = queue[head]
+        head += 1
+        level = distances[cell] + 1
+        for k in range(n_dirs):
+            nbr = cell + offsets[k]
+            if not is_open[nbr]:
+                continue
+            if distances[nbr] == UNREACHABLE:
+                distances[nbr] = level
+                parent_dirs[nbr] = k
+                queue[tail] = nbr
+                tail += 1
+            elif distances[nbr] == level and k < parent_dirs[nbr]:
+                parent_dirs[nbr] = k
+        if tail - head > peak:
+            peak = tail - head
+    return tail, peak
+
+
+def bounded_sum_kernel(
+    is_open, source, offsets, distances, queue, target_at, weights, chebyshev, bound
+):
+    """
+    BFS from the flat index source until every target cell is reached, with
+    target_at holding the index of the target cell at each cell, or -1,
+    weights the number of targets on each target cell and chebyshev a lower
+    bound on the distance of each. Once a level is expanded, every target not
+    reached yet is at least one level further and at least its bound away,
+    and the BFS stops as soon as the distances found plus those bounds go
+    over bound.
+    distances must hold UNREACHABLE everywhere, and queue have one slot per
+    open cell.
+    Returns:
+        total, queued
+    the sum of the targets' distances, or -1 if it exceeds bound or a target
+    cannot be reached, and the number of cells set in distances, listed in
+    queue[:queued] so that the caller can reset just those.
+    """
+    n_dirs = len(offsets)
+    n_targets = len(chebyshev)
+    pending = np.ones(n_targets, dtype=np.bool_)
+    remaining = n_targets
+    total = 0
+    distances[source] = 0
+    queue[0] = source
+    if target_at[source] >= 0:
+        # At distance 0, adds nothing to the total.
+        pending[target_at[source]] = False
+        remaining -= 1
+    head, tail = 0, 1
+    # Cells up to queue[level_end] are at distance `level`.
+    level, level_end = 0, 1
+    while remaining > 0:
+        if head == tail:
+            return -1, tail
+        cell = queue[head]
+        head += 1
+        for k in range(n_dirs):
+            nbr = cell + offsets[k]
+            if is_open[nbr] and distances[nbr] == UNREACHABLE:
+                distances[nbr] = level + 1
+                queue[tail] = nbr
+                tail += 1
+                t = target_at[nbr]
+                if t >= 0:
+                    pending[t] = False
+                    remaining -= 1
+                    total += weights[t] * (level + 1)
+        if head == level_end:
+            # All cells at level + 1 are queued, the pending targets are
+            # further.
+            level += 1
+            level_end = tail
+            lower = total
+            for t in range(n_targets):
+                if pending[t]:
+                    lower += weights[t] * max(chebyshev[t], level + 1)
+            if lower > bound:
+                return -1, tail
+    if total > bound:
+        return -1, tail
+    return total, tail
+
+
+@cache
+def compiled_bounded_sum_kernel():
+    """
+    Returns `bounded_sum_kernel` compiled by numba, or None if numba is not
+    installed.
+    """
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba.njit(cache=True, nogil=True)(bounded_sum_kernel)
+
+
+@cache
+def compiled_bfs_kernel():
+    """
+    Returns `bfs_kernel` compiled by numba, or None if numba is not
+    installed. Compiled code is cached on disk, so only the first use on a
+    machine pays for compilation.
+    """
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba.njit(cache=True, nogil=True)(bfs_kernel)
+
+
+def run_bfs_kernel(
+    is_open: np.ndarray, source: int, offsets: np.ndarray, compiled: bool
+) -> tuple[np.ndarray, np.ndarray, int, int]:
+    """
+    Runs `bfs_kernel` on a flat padded is_open array, compiled or on lists.
+    Returns distances (int32) and parent_dirs (int8) shaped like is_open,
+    followed by the kernel's reached and peak_queue counts.
+    """
+    n_open = int(np.count_nonzero(is_open))
+    if compiled:
+        distances = np.full(is_open.size, UNREACHABLE, dtype=np.int32)
+        parent_dirs = np.full(is_open.size, NO_PARENT, dtype=np.int8)
+        queue = np.empty(max(n_open, 1), dtype=np.int64)
+        reached, peak = compiled_bfs_kernel()(
+            is_open, source, offsets, distances, parent_dirs, queue
+        )
+        return distances, parent_dirs, reached, peak
+
+    # Indexing lists is several times faster than numpy scalars in Python.
+    distances = [UNREACHABLE] * is_open.size
+    parent_dirs = [NO_PARENT] * is_open.size
+    reached, peak = bfs_kernel(
+        is_open.tolist(),
+        source,
+        offsets.tolist(),
+        distances,
+        parent_dirs,
+        [0] * max(n_open, 1),
+    )
+    return (
+        np.array(distances, dtype=np.int32),
+        np.array(parent_dirs, dtype=np.int8),
+        reached,
+        peak,
+    )
+
+
+def check_backends(n_mazes: int = 50, seed: int = 0) -> list[str]:
+    """
+    Solves BFS from random open cells of random mazes with every available
+    backend and compares distances and parent directions with the "numpy"
+    wavefront engine. Returns a description of every mismatch.
+    """
+    rng = np.random.default_rng(seed)
+    backends = [b for b in BFS_BACKENDS if b != "numpy"]
+    if compiled_bfs_kernel() is None:
+        backends.remove("numba")
+    mismatches = []
+    for i in range(n_mazes):
+        rows, cols = rng.integers(4, 40, size=2)
+        fill = float(rng.uniform(0.0, 0.6))
+        maze = Maze(
+            rows=int(rows),
+            cols=int(cols),
+            n_targets=1,
+            fill_fraction=fill,
+            random_seed=int(rng.integers(2**32)),
+        )
+        source = maze.get_target_cells()[0]
+        expected = DistanceCalculator(maze, backend="numpy").bfs_distance_array(*source)
+        for backend in backends:
+            result = DistanceCalculator(maze, backend=backend).bfs_distance_array(
+                *source
+            )
+            for name, want, got in zip(("distances", "parents"), expected, result):
+                if not np.array_equal(want, got):
+                    mismatches.append(
+                        f"maze {i} ({rows}x{cols}, fill {fill:.2f}) from {source}: "
+                        f"{backend} {name} differ from numpy"
+                    )
+    return mismatches
+
+
+if __name__ == "__main__":
+    import sys
+
+    mismatches = check_backends()
+    print("\n".join(mismatches) or "All BFS backends agree.")
+    sys.exit(1 if mismatches else 0)
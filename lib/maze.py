@@ -1,23 +1,37 @@
-import random
+import hashlib
+
+import numpy as np
+
+# Number of cells drawn from the RNG per block while filling the interior,
+# keeps the float32 scratch buffer bounded for very large mazes.
+_FILL_BLOCK_CELLS = 1 << 22
 
 
 class MazeRow:
-    def __init__(self, num_cols: int, wall_cell: str, empty_cell: str):
-        self.row = [wall_cell for _ in range(num_cols)]
-        self.wall_cell = wall_cell
-        self.empty_cell = empty_cell
+    """
+    A view over a single row of the maze grid, so that `maze[r][c]` reads and
+    writes single-character cells on top of the uint8 grid.
+    """
+
+    def __init__(self, maze: "Maze", row_idx: int):
+        self.maze = maze
+        self.row_idx = row_idx
+        self.row = maze.grid[row_idx]
+        self.wall_cell = maze.wall_cell
+        self.empty_cell = maze.empty_cell
 
     def __setitem__(self, col: int, value: str):
-        self.row[col] = value
+        self.row[col] = ord(value)
+        self.maze.invalidate_caches()
 
     def __getitem__(self, col: int) -> str:
-        return self.row[col]
+        return chr(self.row[col])
 
     def __str__(self) -> str:
-        return "".join(self.row)
+        return self.row.tobytes().decode("ascii")
 
     def get_empty_cells(self) -> list[int]:
-        return [i for i, cell in enumerate(self.row) if cell == self.empty_cell]
+        return np.flatnonzero(self.row == ord(self.empty_cell)).tolist()
 
 
 class Maze:
@@ -31,6 +45,7 @@ class Maze:
         empty_cell=" ",
         target_cell="*",
         random_seed=None,
+        connectivity=None,
     ):
         """
         :param rows:    Total number of rows in the maze (including boundary).
@@ -38,7 +53,15 @@ class Maze:
         :param n_targets: How many '*' cells to place in the maze.
         :param fill_fraction: Fraction of interior cells to remain walls (0 <= fill_fraction <= 1).
                              e.g. 0.3 means ~30% of interior cells will be walls.
-        :param random_seed:  If given, sets the random seed for reproducibility.
+        :param random_seed:  If given, seeds the maze's own random generator for reproducibility,
+                             an int, a numpy SeedSequence or a Generator.
+        :param connectivity: If given (4 or 8), all targets are placed in one connected
+                             region of empty cells for this many neighbours, so every
+                             target can reach every other. Walls are placed as usual.
+
+        Cells are stored as ASCII codes in a contiguous (rows, cols) uint8 array,
+        `maze[r][c]` still reads and writes one-character strings. Code writing
+        to `grid` directly must call `invalidate_caches` afterwards.
         """
         self.num_rows = rows
         self.num_cols = cols
@@ -47,65 +70,151 @@ class Maze:
         self.wall_cell = wall_cell
         self.empty_cell = empty_cell
         self.target_cell = target_cell
+        self.connectivity = connectivity
 
-        if random_seed is not None:
-            random.seed(random_seed)
+        self.rng = np.random.default_rng(random_seed)
+        # Derived data (e.g. graph indexes), dropped whenever a cell changes.
+        self._cache = {}
 
-        self.grid = [
-            MazeRow(self.num_cols, self.wall_cell, self.empty_cell)
-            for _ in range(self.num_rows)
-        ]
+        self.grid = np.full(
+            (self.num_rows, self.num_cols), ord(self.wall_cell), dtype=np.uint8
+        )
         self._random_fill_interior()
         self._place_targets(self.n_targets)
 
+    @classmethod
+    def from_grid(
+        cls,
+        grid: np.ndarray,
+        wall_cell="#",
+        empty_cell=" ",
+        target_cell="*",
+    ) -> "Maze":
+        """
+        Wraps an existing (rows, cols) uint8 grid of ASCII cells without
+        copying it or generating anything.
+        """
+        maze = cls.__new__(cls)
+        maze.num_rows, maze.num_cols = grid.shape
+        maze.fill_fraction = None
+        maze.connectivity = None
+        maze.wall_cell = wall_cell
+        maze.empty_cell = empty_cell
+        maze.target_cell = target_cell
+        maze.rng = np.random.default_rng()
+        maze.grid = grid
+        maze._cache = {}
+        maze.n_targets = int(np.count_nonzero(maze.get_cell_mask(target_cell)))
+        return maze
+
     def __repr__(self) -> str:
         return f"MazeGenerator(rows={self.num_rows}, cols={self.num_cols}, n_targets={self.n_targets}, fill_fraction={self.fill_fraction})"
 
     def __str__(self) -> str:
-        return "\n".join([str(row) for row in self.grid])
+        lines = np.empty((self.num_rows, self.num_cols + 1), dtype=np.uint8)
+        lines[:, :-1] = self.grid
+        lines[:, -1] = ord("\n")
+        return lines.tobytes()[:-1].decode("ascii")
 
     def __getitem__(self, row: int) -> MazeRow:
-        return self.grid[row]
+        return MazeRow(self, row)
 
     def _random_fill_interior(self) -> None:
         """
         Randomly assign each interior cell (not on the boundary) to be a wall_cell.
         or a empty_cell based on the fill_fraction.
         """
-        for r in range(1, self.num_rows - 1):
-            for c in range(1, self.num_cols - 1):
-                if random.random() > self.fill_fraction:
-                    self.grid[r][c] = self.empty_cell
-                else:
-                    self.grid[r][c] = self.wall_cell
+        if self.num_rows < 3 or self.num_cols < 3:
+            return
+
+        interior = self.grid[1:-1, 1:-1]
+        block_rows = max(1, _FILL_BLOCK_CELLS // (self.num_cols - 2))
+        for start in range(0, interior.shape[0], block_rows):
+            _fill_block(
+                interior[start : start + block_rows],
+                self.rng,
+                self.fill_fraction,
+                ord(self.empty_cell),
+                ord(self.wall_cell),
+            )
+
+    def invalidate_caches(self) -> None:
+        self._cache.clear()
+
+    def graph_index(self, connectivity: int = 8):
+        """
+        Returns the `GraphIndex` of the open cells for the given connectivity,
+        built on first use and kept until a cell changes.
+        """
+        from lib.graph import GraphIndex
+
+        key = ("graph", connectivity)
+        if key not in self._cache:
+            self._cache[key] = GraphIndex(
+                self.grid != ord(self.wall_cell), connectivity
+            )
+        return self._cache[key]
+
+    def components(self, connectivity: int = 8):
+        """
+        Returns the `ComponentIndex` of the open cells for the given
+        connectivity, built on first use and kept until a cell changes.
+        """
+        from lib.components import ComponentIndex
+
+        key = ("components", connectivity)
+        if key not in self._cache:
+            self._cache[key] = ComponentIndex(
+                self.grid != ord(self.wall_cell), connectivity
+            )
+        return self._cache[key]
+
+    def content_hash(self) -> str:
+        """
+        Returns a hex digest of the maze shape and wall layout, which is all
+        that BFS distances depend on.
+        """
+        if "content_hash" not in self._cache:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(np.array(self.grid.shape, dtype=np.int64).tobytes())
+            digest.update(np.packbits(self.grid == ord(self.wall_cell)).tobytes())
+            self._cache["content_hash"] = digest.hexdigest()
+        return self._cache["content_hash"]
+
+    def get_cell_mask(self, cell_type: str) -> np.ndarray:
+        """
+        Returns a boolean (rows, cols) mask of the cells equal to cell_type.
+        """
+        return self.grid == ord(cell_type)
 
     def _get_cell_type(self, cell_type: str) -> list[tuple[int, int]]:
-        return [
-            (r, c)
-            for r in range(self.num_rows)
-            for c in range(self.num_cols)
-            if self.grid[r][c] == cell_type
-        ]
+        rows, cols = np.nonzero(self.get_cell_mask(cell_type))
+        return list(zip(rows.tolist(), cols.tolist()))
 
     def _place_targets(self, n_targets) -> None:
         """
         Randomly choose n_targets empty cells and mark them as '*'.
         If there aren't enough empty cells, some targets won't be placed.
+        With a connectivity, the cells are chosen from one connected region.
         """
-        # Find all empty cells
-        empty_cells = self.get_empty_cells()
+        if self.connectivity is not None:
+            labels = self.components(self.connectivity).labels
+            empty_mask, num_empty = _pick_region(self.rng, labels, n_targets)
+        else:
+            empty_mask = self.get_cell_mask(self.empty_cell).ravel()
+            num_empty = int(np.count_nonzero(empty_mask))
 
-        num_cells_to_fill = min(n_targets, len(empty_cells))
+        num_cells_to_fill = min(n_targets, num_empty)
 
         if num_cells_to_fill < n_targets:
             raise ValueError(
                 f"Warning: Only {num_cells_to_fill} empty cells available."
             )
 
-        cell_to_fill = random.sample(empty_cells, num_cells_to_fill)
-        for cell in cell_to_fill:
-            (r, c) = cell
-            self.grid[r][c] = self.target_cell
+        cells_to_fill = _sample_flat_indices(
+            self.rng, empty_mask, num_empty, num_cells_to_fill
+        )
+        self.grid.reshape(-1)[cells_to_fill] = ord(self.target_cell)
 
     def get_empty_cells(self) -> list[tuple[int, int]]:
         return self._get_cell_type(self.empty_cell)
@@ -129,4 +238,68 @@ class Maze:
         return wall_corners
 
     def get_all_cell_values(self) -> list[str]:
-        return [cell for row in self.grid for cell in row.row]
+        return list(self.grid.tobytes().decode("ascii"))
+
+
+def _fill_block(
+    block: np.ndarray,
+    rng: np.random.Generator,
+    fill_fraction: float,
+    empty: int,
+    wall: int,
+) -> None:
+    """
+    Writes `empty` into each cell of the uint8 block with probability
+    1 - fill_fraction and `wall` otherwise.
+    """
+    is_empty = rng.random(block.shape, dtype=np.float32) > fill_fraction
+    # empty if is_empty else wall, without a masked (slow) assignment.
+    np.multiply(is_empty.view(np.uint8), empty ^ wall, out=block)
+    block ^= wall
+
+
+def _pick_region(
+    rng: np.random.Generator, labels: np.ndarray, n: int
+) -> tuple[np.ndarray, int]:
+    """
+    Picks one of the connected regions of `label_components` labels holding
+    more than n cells, so that an empty cell is left to reach all n targets
+    from, with probability proportional to its size, as if drawing a random
+    cell among those regions. Returns the flat mask of its cells and their
+    count.
+    """
+    labels = labels.reshape(-1)
+    sizes = np.bincount(labels + 1)[1:]
+    eligible = np.flatnonzero(sizes > n)
+    if eligible.size == 0:
+        raise ValueError(
+            f"No connected region has room for {n} targets and an empty cell, "
+            f"the largest has {sizes.max(initial=0)} empty cells."
+        )
+    weights = sizes[eligible] / sizes[eligible].sum()
+    label = eligible[rng.choice(eligible.size, p=weights)]
+    return labels == label, int(sizes[label])
+
+
+def _sample_flat_indices(
+    rng: np.random.Generator, mask: np.ndarray, num_set: int, n: int
+) -> np.ndarray:
+    """
+    Samples n distinct flat indices where the flat boolean mask is set.
+
+    When the set cells are plentiful, rejection sampling avoids materialising
+    the index list of every set cell.
+    """
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    if num_set < 4 * n or num_set < mask.size // 64:
+        return rng.choice(np.flatnonzero(mask), n, replace=False)
+
+    chosen = np.empty(0, dtype=np.intp)
+    while chosen.size < n:
+        draws = rng.integers(0, mask.size, size=2 * (n - chosen.size))
+        draws = draws[mask[draws]]
+        chosen = np.concatenate([chosen, draws])
+        _, first = np.unique(chosen, return_index=True)
+        chosen = chosen[np.sort(first)]
+    return chosen[:n]
@@ -1,6 +1,10 @@
 import numpy as np
-import random
-import matplotlib.pyplot as plt
+from lib.maze import (
+    _FILL_BLOCK_CELLS,
+    _fill_block,
+    _pick_region,
+    _sample_flat_indices,
+)
 
 
 class Maze3D:
@@ -15,7 +19,13 @@ class Maze3D:
         empty_cell=" ",
         target_cell="*",
         random_seed=None,
+        connectivity=None,
     ):
+        """
+        :param connectivity: If given (6, 18 or 26), all targets are placed in
+                             one connected region of empty cells for this many
+                             neighbours, so every target can reach every other.
+        """
         self.num_layers = layers
         self.num_rows = rows
         self.num_cols = cols
@@ -24,57 +34,107 @@ class Maze3D:
         self.wall_cell = wall_cell
         self.empty_cell = empty_cell
         self.target_cell = target_cell
+        self.connectivity = connectivity
 
-        if random_seed is not None:
-            random.seed(random_seed)
-            np.random.seed(random_seed)
+        self.rng = np.random.default_rng(random_seed)
 
+        # ASCII code per cell, one byte each.
         self.grid = np.full(
-            (self.num_layers, self.num_rows, self.num_cols), self.empty_cell, dtype=str
+            (self.num_layers, self.num_rows, self.num_cols),
+            ord(self.empty_cell),
+            dtype=np.uint8,
         )
 
         self._random_fill_interior()
         self._place_targets(self.n_targets)
 
+    @classmethod
+    def from_grid(
+        cls,
+        grid: np.ndarray,
+        wall_cell="#",
+        empty_cell=" ",
+        target_cell="*",
+    ) -> "Maze3D":
+        """
+        Wraps an existing (layers, rows, cols) uint8 grid of ASCII cells
+        without copying it or generating anything.
+        """
+        maze = cls.__new__(cls)
+        maze.num_layers, maze.num_rows, maze.num_cols = grid.shape
+        maze.fill_fraction = None
+        maze.connectivity = None
+        maze.wall_cell = wall_cell
+        maze.empty_cell = empty_cell
+        maze.target_cell = target_cell
+        maze.rng = np.random.default_rng()
+        maze.grid = grid
+        maze.n_targets = int(np.count_nonzero(maze.get_cell_mask(target_cell)))
+        return maze
+
     def __str__(self) -> str:
         return "\n\n".join(
             [
-                f"Layer {l}:\n" + "\n".join("".join(row) for row in self.grid[l])
+                f"Layer {l}:\n"
+                + "\n".join(row.tobytes().decode("ascii") for row in self.grid[l])
                 for l in range(self.num_layers)
             ]
         )
 
     def _random_fill_interior(self):
-        random_mask = np.random.random((self.num_layers, self.num_rows, self.num_cols))
-        interior = np.where(
-            random_mask > self.fill_fraction, self.empty_cell, self.wall_cell
-        )
-        self.grid = interior
+        flat = self.grid.reshape(-1)
+        for start in range(0, flat.size, _FILL_BLOCK_CELLS):
+            _fill_block(
+                flat[start : start + _FILL_BLOCK_CELLS],
+                self.rng,
+                self.fill_fraction,
+                ord(self.empty_cell),
+                ord(self.wall_cell),
+            )
 
     def _place_targets(self, n_targets):
-        empty_cells = self.get_empty_cells()
-        if len(empty_cells) < n_targets:
+        if self.connectivity is not None:
+            from lib.components import label_components
+
+            is_empty = self.get_cell_mask(self.empty_cell)
+            labels = label_components(is_empty, self.connectivity)
+            empty_mask, num_empty = _pick_region(self.rng, labels, n_targets)
+        else:
+            empty_mask = self.get_cell_mask(self.empty_cell).ravel()
+            num_empty = int(np.count_nonzero(empty_mask))
+        if num_empty < n_targets:
             raise ValueError(
-                f"Warning: Only {len(empty_cells)} empty cells available for {n_targets} targets."
+                f"Warning: Only {num_empty} empty cells available for {n_targets} targets."
             )
 
-        selected_cells = random.sample(empty_cells, n_targets)
-        for l, r, c in selected_cells:
-            self.grid[l, r, c] = self.target_cell
+        selected_cells = _sample_flat_indices(
+            self.rng, empty_mask, num_empty, n_targets
+        )
+        self.grid.reshape(-1)[selected_cells] = ord(self.target_cell)
+
+    def get_cell_mask(self, cell_type: str) -> np.ndarray:
+        return self.grid == ord(cell_type)
+
+    def _get_cell_type(self, cell_type: str) -> list[tuple[int, int, int]]:
+        return list(
+            zip(*(idx.tolist() for idx in np.nonzero(self.get_cell_mask(cell_type))))
+        )
 
     def get_empty_cells(self):
-        return list(zip(*np.where(self.grid == self.empty_cell)))
+        return self._get_cell_type(self.empty_cell)
 
     def get_target_cells(self):
-        return list(zip(*np.where(self.grid == self.target_cell)))
+        return self._get_cell_type(self.target_cell)
 
     def get_wall_cells(self):
-        return list(zip(*np.where(self.grid == self.wall_cell)))
+        return self._get_cell_type(self.wall_cell)
 
     def plot_3d_maze(self):
         """
         Plots the 3D maze using matplotlib.
         """
+        import matplotlib.pyplot as plt
+
         wall_cells = self.get_wall_cells()
         empty_cells = self.get_empty_cells()
         target_cells = self.get_target_cells()
@@ -117,8 +177,15 @@ if __name__ == "__main__":
 
     num_elements = maze3d.num_layers * maze3d.num_rows * maze3d.num_cols
 
-    print(f"Empty cells fraction: {len(maze3d.get_empty_cells()) / num_elements:.2%}")
-    print(f"Wall cells fraction: {len(maze3d.get_wall_cells()) / num_elements:.2%}")
+    empty_count = np.count_nonzero(maze3d.get_cell_mask(maze3d.empty_cell))
+    wall_count = np.count_nonzero(maze3d.get_cell_mask(maze3d.wall_cell))
+    print(f"Empty cells fraction: {empty_count / num_elements:.2%}")
+    print(f"Wall cells fraction: {wall_count / num_elements:.2%}")
+
+    from lib.solver import GridSolver
+
+    best_cell, best_dist_sum = GridSolver(maze3d).find_optimal_point()
+    print("Best cell:", best_cell, "with sum of distances =", best_dist_sum)
 
     # Plot the 3D maze
     # maze3d.plot_3d_maze()
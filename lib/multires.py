@@ -0,0 +1,329 @@
+"""
+Approximate distance-sum solving for very large mazes, coarse to fine.
+
+The maze is downsampled into a pyramid of grids, a block being open when any
+of its cells is. The distance-sum problem is solved exactly on the coarsest
+grid, then at each finer level only inside a window around the best cell of
+the level above, with BFS seeded on the window's border from the coarser
+distances. The cell found is then checked with full BFS runs: each gives
+its exact sum and, by the triangle inequality, a lower bound on the sum of
+every other cell, until no cell can beat it or the check budget runs out.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from lib.distance import (
+    UNREACHABLE,
+    DistanceCalculator,
+    GridDistanceCalculator,
+    best_candidate,
+    neighbour_offsets,
+    seeded_bfs,
+)
+from lib.instrument import phase
+from lib.maze import Maze
+
+
+def downsample(mask: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Returns the grid of factor x factor blocks of mask, True where any cell
+    of the block is. Blocks on the bottom and right edges may be partial.
+    """
+    rows, cols = mask.shape
+    padded = np.zeros((-(-rows // factor) * factor, -(-cols // factor) * factor), bool)
+    padded[:rows, :cols] = mask
+    blocks = padded.reshape(padded.shape[0] // factor, factor, -1, factor)
+    return blocks.any(axis=(1, 3))
+
+
+@dataclass
+class MultiResResult:
+    # The cell found and its exact sum of distances, ((-1, -1), inf) if no
+    # cell checked reaches every target.
+    cell: tuple[int, int]
+    distance_sum: float
+    # No cell has a smaller sum than this.
+    lower_bound: float
+    # True when the check proved cell is the one `MazeSolver` returns.
+    exact: bool
+    # Full BFS runs spent on the check.
+    checks: int
+
+    @property
+    def error_bound(self) -> float:
+        return self.distance_sum - self.lower_bound
+
+
+class MultiResolutionSolver:
+    def __init__(
+        self,
+        maze: Maze,
+        factor: int = 4,
+        coarse_cells: int = 1 << 16,
+        window: int = 4,
+        max_checks: int = 4,
+        stats=None,
+    ):
+        """
+        :param maze: The maze to solve, 8-connected.
+        :param factor: Downsampling factor between pyramid levels.
+        :param coarse_cells: Levels are added until one has at most this
+                             many cells.
+        :param window: Cells added on every side of the refined block at
+                       each finer level. Wider windows follow the coarse
+                       solution less blindly, at more cost.
+        :param max_checks: Most full BFS runs spent checking the result,
+                           at least 1. More checks tighten the lower bound
+                           and, if enough, prove the answer exact.
+        :param stats: Optional `SolverStats` timing every stage.
+        """
+        if max_checks < 1:
+            raise ValueError("max_checks must be at least 1.")
+        self.maze = maze
+        self.factor = factor
+        self.window = window
+        self.max_checks = max_checks
+        self.stats = stats
+        self.directions = neighbour_offsets(2, 8)
+
+        with phase(stats, "pyramid"):
+            self.is_open = [maze.grid != ord(maze.wall_cell)]
+            self.is_empty = [maze.get_cell_mask(maze.empty_cell)]
+            while (
+                self.is_open[-1].size > coarse_cells and min(self.is_open[-1].shape) > 1
+            ):
+                self.is_open.append(downsample(self.is_open[-1], factor))
+                self.is_empty.append(downsample(self.is_empty[-1], factor))
+
+    @property
+    def levels(self) -> int:
+        return len(self.is_open)
+
+    def find_optimal_point(self) -> MultiResResult:
+        targets = np.array(self.maze.get_target_cells(), dtype=np.int64).reshape(-1, 2)
+        if targets.size == 0:
+            # Every empty cell has an (empty) sum of 0.
+            zeros = np.zeros(self.maze.grid.shape, dtype=np.int64)
+            cell, total = best_candidate(zeros, self.is_empty[0])
+            return MultiResResult(cell, total, total, True, 0)
+        with phase(self.stats, "coarse_to_fine", levels=self.levels):
+            start = self._coarse_to_fine(targets)
+        with phase(self.stats, "check"):
+            return self._check(start, targets)
+
+    def _coarse_to_fine(self, targets: np.ndarray) -> tuple[int, int] | None:
+        """
+        Returns the cell with the smallest estimated sum in the finest
+        window, or None if no window holds a candidate.
+        """
+        top = self.levels - 1
+        scale = self.factor**top
+        calculator = GridDistanceCalculator(self.is_open[top], 8)
+        fields = np.stack(
+            [
+                calculator.bfs_distance_array(tuple(t))[0].astype(np.int64)
+                for t in targets // scale
+            ]
+        )
+        # Per level, the window's origin and the targets' distances in it.
+        windows = {top: (0, 0, fields)}
+        best = self._best_in_window(top, windows[top])
+
+        for level in range(top - 1, -1, -1):
+            if best is None:
+                return None
+            scale //= self.factor
+            grow = self.window
+            while True:
+                windows[level] = self._refine(
+                    level, best, grow, targets // scale, windows
+                )
+                cell = self._best_in_window(level, windows[level])
+                _, _, fields = windows[level]
+                covers_level = fields.shape[1:] == self.is_open[level].shape
+                if cell is not None or covers_level:
+                    break
+                grow *= 2
+            best = cell
+        return best
+
+    def _refine(
+        self,
+        level: int,
+        coarse_cell: tuple[int, int],
+        grow: int,
+        targets: np.ndarray,
+        windows: dict,
+    ) -> tuple[int, int, np.ndarray]:
+        """
+        Returns (r0, c0, fields) for the window over the block of coarse_cell
+        at level grown by grow cells, fields holding each target's distances
+        from a BFS inside the window seeded on the ring around it with the
+        coarser estimates (and at the target itself if inside).
+        """
+        rows, cols = self.is_open[level].shape
+        r0 = max(coarse_cell[0] * self.factor - grow, 0)
+        c0 = max(coarse_cell[1] * self.factor - grow, 0)
+        r1 = min((coarse_cell[0] + 1) * self.factor + grow, rows)
+        c1 = min((coarse_cell[1] + 1) * self.factor + grow, cols)
+
+        # The window, its seed ring and one more closed ring so offsets stay
+        # in bounds, as in `TiledDistanceCalculator`.
+        shape = (r1 - r0 + 4, c1 - c0 + 4)
+        is_open = np.zeros(shape, dtype=bool)
+        rr0, rr1 = max(r0 - 2, 0), min(r1 + 2, rows)
+        cc0, cc1 = max(c0 - 2, 0), min(c1 + 2, cols)
+        is_open[rr0 - r0 + 2 : rr1 - r0 + 2, cc0 - c0 + 2 : cc1 - c0 + 2] = (
+            self.is_open[level][rr0:rr1, cc0:cc1]
+        )
+        is_open[[0, -1], :] = False
+        is_open[:, [0, -1]] = False
+        updatable = np.zeros_like(is_open)
+        updatable[2:-2, 2:-2] = is_open[2:-2, 2:-2]
+        ring = is_open & ~updatable
+
+        ring_rows, ring_cols = np.nonzero(ring)
+        estimates = self._estimate(
+            level + 1,
+            (ring_rows + r0 - 2) // self.factor,
+            (ring_cols + c0 - 2) // self.factor,
+            windows,
+        )
+        estimates = np.where(
+            estimates == UNREACHABLE, UNREACHABLE, estimates * self.factor
+        )
+
+        width = shape[1]
+        offsets = [dr * width + dc for dr, dc in self.directions]
+        ring_idx = ring_rows * width + ring_cols
+        fields = np.empty((len(targets), r1 - r0, c1 - c0), dtype=np.int64)
+        for t, (tr, tc) in enumerate(targets):
+            dist = np.full(shape, UNREACHABLE, dtype=np.int64)
+            flat = dist.reshape(-1)
+            flat[ring_idx] = estimates[t]
+            seeds = ring_idx[estimates[t] != UNREACHABLE]
+            if r0 <= tr < r1 and c0 <= tc < c1 and is_open[tr - r0 + 2, tc - c0 + 2]:
+                dist[tr - r0 + 2, tc - c0 + 2] = 0
+                seeds = np.append(seeds, (tr - r0 + 2) * width + tc - c0 + 2)
+            seeded_bfs(flat, updatable.reshape(-1), seeds, offsets)
+            fields[t] = dist[2:-2, 2:-2]
+        return r0, c0, fields
+
+    def _estimate(
+        self, level: int, rows: np.ndarray, cols: np.ndarray, windows: dict
+    ) -> np.ndarray:
+        """
+        Returns the (k, n) distances of the targets to cells of level, from
+        its window where it covers them and scaled up from coarser levels
+        elsewhere.
+        """
+        r0, c0, fields = windows[level]
+        h, w = fields.shape[1:]
+        inside = (rows >= r0) & (rows < r0 + h) & (cols >= c0) & (cols < c0 + w)
+        estimates = np.empty((len(fields), rows.size), dtype=np.int64)
+        estimates[:, inside] = fields[:, rows[inside] - r0, cols[inside] - c0]
+        if not inside.all():
+            coarse = self._estimate(
+                level + 1,
+                rows[~inside] // self.factor,
+                cols[~inside] // self.factor,
+                windows,
+            )
+            estimates[:, ~inside] = np.where(
+                coarse == UNREACHABLE, UNREACHABLE, coarse * self.factor
+            )
+        return estimates
+
+    def _best_in_window(
+        self, level: int, window: tuple[int, int, np.ndarray]
+    ) -> tuple[int, int] | None:
+        r0, c0, fields = window
+        h, w = fields.shape[1:]
+        candidates = self.is_empty[level][r0 : r0 + h, c0 : c0 + w].copy()
+        candidates &= (fields != UNREACHABLE).all(axis=0)
+        cell, total = best_candidate(fields.sum(axis=0), candidates)
+        if total == float("inf"):
+            return None
+        return cell[0] + r0, cell[1] + c0
+
+    def _check(
+        self, start: tuple[int, int] | None, targets: np.ndarray
+    ) -> MultiResResult:
+        """
+        Runs full BFS from start and then from the most promising unchecked
+        cells, as in `MazeSolver._pruned_search`: a BFS from cell c gives c's
+        exact sum and, since d(t, x) >= |d(t, c) - d(c, x)|, a lower bound
+        sum_t |d(t, c) - d(c, x)| for every cell x, kept if it beats the sum
+        of Chebyshev distances. Stops when no cell can beat, or tie earlier
+        than, the best sum found.
+        """
+        shape = self.maze.grid.shape
+        size = self.maze.grid.size
+        candidates = self.is_empty[0].copy()
+        lower_bound = np.zeros(shape, dtype=np.int64)
+        row_idx, col_idx = np.arange(shape[0]), np.arange(shape[1])
+        for tr, tc in targets:
+            lower_bound += np.maximum(
+                np.abs(row_idx - tr)[:, None], np.abs(col_idx - tc)[None, :]
+            )
+        cell_idx = np.arange(size).reshape(shape)
+        calculator = DistanceCalculator(self.maze, stats=self.stats)
+
+        best_sum, best_idx = float("inf"), -1
+        checks = 0
+        if start is None:
+            start = self._most_promising(lower_bound, cell_idx, candidates)
+        while start is not None and checks < self.max_checks:
+            dist, _ = calculator.bfs_distance_array(*start)
+            checks += 1
+            to_targets = dist[targets[:, 0], targets[:, 1]].astype(np.int64)
+            if (to_targets == UNREACHABLE).any():
+                # Nothing start reaches can reach every target.
+                candidates &= dist == UNREACHABLE
+            else:
+                total, idx = int(to_targets.sum()), int(cell_idx[start])
+                if total < best_sum or (total == best_sum and idx < best_idx):
+                    best_sum, best_idx = total, idx
+                # Only cells start reaches can reach every target.
+                candidates &= dist != UNREACHABLE
+                # sum_t |a_t - D| for every distance D, from sorted a_t.
+                a = np.sort(to_targets)
+                prefix = np.concatenate([[0], np.cumsum(a)])
+                d = np.arange(int(dist.max()) + 1)
+                below = np.searchsorted(a, d, side="right")
+                spread = (
+                    d * below
+                    - prefix[below]
+                    + (prefix[-1] - prefix[below])
+                    - d * (len(a) - below)
+                )
+                np.maximum(lower_bound, spread[np.maximum(dist, 0)], out=lower_bound)
+            # A later cell has to be strictly better to replace the best.
+            candidates &= (lower_bound < best_sum) | (
+                (lower_bound == best_sum) & (cell_idx < best_idx)
+            )
+            start = self._most_promising(lower_bound, cell_idx, candidates)
+
+        cell = np.unravel_index(best_idx, shape) if best_idx >= 0 else (-1, -1)
+        cell = tuple(int(x) for x in cell)
+        if start is None:
+            return MultiResResult(cell, best_sum, best_sum, True, checks)
+        bound = min(best_sum, int(lower_bound[candidates].min()))
+        return MultiResResult(cell, best_sum, bound, False, checks)
+
+    @staticmethod
+    def _most_promising(
+        lower_bound: np.ndarray, cell_idx: np.ndarray, candidates: np.ndarray
+    ) -> tuple[int, int] | None:
+        """
+        Returns the candidate with the smallest (lower bound, row-major
+        index), or None without candidates.
+        """
+        cells = np.flatnonzero(candidates)
+        if cells.size == 0:
+            return None
+        keys = lower_bound.reshape(-1)[cells] * lower_bound.size + cells
+        r, c = np.unravel_index(cells[np.argmin(keys)], lower_bound.shape)
+        return int(r), int(c)
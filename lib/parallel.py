@@ -0,0 +1,128 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from lib.maze import Maze
+from lib.distance import UNREACHABLE, DistanceCalculator
+
+# Worker-side state set up once per process by `_init_worker`.
+_worker_shm = None
+_worker_calculator = None
+
+
+def _init_worker(shm_name: str, shape: tuple[int, int], wall_cell: str) -> None:
+    global _worker_shm, _worker_calculator
+    # Keep a reference to the segment, the grid below is a view into it.
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    grid = np.ndarray(shape, dtype=np.uint8, buffer=_worker_shm.buf)
+    _worker_calculator = DistanceCalculator(Maze.from_grid(grid, wall_cell=wall_cell))
+
+
+def _chunk_distance_sum(
+    sources: list[tuple[int, int]],
+) -> tuple[np.ndarray, np.ndarray]:
+    shape = _worker_calculator.maze.grid.shape
+    dist_sum = np.zeros(shape, dtype=np.int64)
+    reached_count = np.zeros(shape, dtype=np.int32)
+    for r, c in sources:
+        dist, _ = _worker_calculator.bfs_distance_array(r, c)
+        is_reached = dist != UNREACHABLE
+        np.add(dist_sum, dist, out=dist_sum, where=is_reached)
+        reached_count += is_reached
+    return dist_sum, reached_count
+
+
+def split_sources(
+    sources: list[tuple[int, int]], n_chunks: int
+) -> list[list[tuple[int, int]]]:
+    """
+    Splits sources into at most n_chunks contiguous, near equal, non-empty chunks.
+    """
+    n_chunks = max(1, min(n_chunks, len(sources)))
+    bounds = np.linspace(0, len(sources), n_chunks + 1).astype(int)
+    return [sources[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def parallel_distance_sum(
+    maze: Maze, sources: list[tuple[int, int]], workers: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Same result as `DistanceCalculator.multi_source_distance_sum`, with the
+    sources split across a pool of `workers` processes.
+
+    The grid is placed in shared memory once and mapped by every worker.
+    Each worker runs one wavefront BFS per source of its chunk and returns
+    the chunk's distance sum, the partial sums are added up in the parent as
+    they complete so the per-source distance maps are never all alive at once.
+
+    The single-process bit-parallel engine costs about the same for 1 to 64
+    sources, so the pool pays off once there are more workers than
+    (bit-parallel time / single BFS time), see `measure_speedup`.
+    """
+    if not sources:
+        return DistanceCalculator(maze).multi_source_distance_sum(sources)
+
+    dist_sum = np.zeros(maze.grid.shape, dtype=np.int64)
+    reached_count = np.zeros(maze.grid.shape, dtype=np.int32)
+
+    shm = shared_memory.SharedMemory(create=True, size=maze.grid.nbytes)
+    try:
+        np.ndarray(maze.grid.shape, dtype=np.uint8, buffer=shm.buf)[...] = maze.grid
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shm.name, maze.grid.shape, maze.wall_cell),
+        ) as pool:
+            futures = [
+                pool.submit(_chunk_distance_sum, chunk)
+                for chunk in split_sources(sources, workers)
+            ]
+            for future in as_completed(futures):
+                chunk_sum, chunk_reached = future.result()
+                dist_sum += chunk_sum
+                reached_count += chunk_reached
+    finally:
+        shm.close()
+        shm.unlink()
+    return dist_sum, reached_count
+
+
+def measure_speedup(
+    maze: Maze, max_workers: int | None = None, repeats: int = 3
+) -> list[dict]:
+    """
+    Times `find_optimal_point` for 1 to max_workers processes.
+    Returns one record per worker count with the best wall time in seconds
+    and the speedup relative to the serial solver.
+    """
+    from lib.solver import MazeSolver
+
+    max_workers = max_workers or os.cpu_count() or 1
+    records = []
+    serial_time = None
+    for workers in range(1, max_workers + 1):
+        solver = MazeSolver(maze, workers=None if workers == 1 else workers)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            solver.find_optimal_point()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        serial_time = serial_time or best
+        records.append(
+            {"workers": workers, "seconds": best, "speedup": serial_time / best}
+        )
+    return records
+
+
+if __name__ == "__main__":
+    maze = Maze(rows=400, cols=400, n_targets=64, fill_fraction=0.25, random_seed=0)
+    print(f"{maze!r}, {os.cpu_count()} cores")
+    for record in measure_speedup(maze):
+        print(
+            f"workers={record['workers']:>3}  "
+            f"time={record['seconds']:.3f}s  speedup={record['speedup']:.2f}x"
+        )
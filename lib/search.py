@@ -0,0 +1,250 @@
+"""
+Heap-based searches on a maze with per-cell traversal costs: Dijkstra for
+distance fields, and A* and bidirectional Dijkstra for single-pair queries.
+
+Stepping into a cell costs that cell's cost, times diagonal_cost for
+diagonal steps. With unit costs and diagonal_cost=1 distances are the BFS
+distances of `DistanceCalculator`.
+"""
+
+from dataclasses import dataclass
+from heapq import heappop, heappush
+from math import inf
+
+import numpy as np
+
+from lib.distance import NO_PARENT, neighbour_offsets
+from lib.instrument import phase
+from lib.maze import Maze
+
+
+@dataclass
+class SearchResult:
+    # Total cost of the path, inf if the goal cannot be reached.
+    cost: float
+    # Cells (row, col) from source to goal, empty if unreachable.
+    path: list[tuple[int, int]]
+    # Number of cells taken off the heap(s) and expanded.
+    expanded: int
+
+
+class SearchEngine:
+    def __init__(
+        self,
+        maze: Maze,
+        costs: np.ndarray | None = None,
+        connectivity: int = 8,
+        diagonal_cost: float = 1.0,
+        stats=None,
+    ):
+        """
+        :param maze: The maze to search, walls are never entered.
+        :param costs: Optional (rows, cols) cost of stepping into each cell,
+                      positive on open cells. Cells with an infinite cost are
+                      treated as walls. Defaults to 1 everywhere.
+        :param connectivity: 4 or 8 neighbours per cell.
+        :param diagonal_cost: Factor on the cost of diagonal steps, between
+                              1 (A* uses the Chebyshev heuristic) and 2
+                              (sqrt(2) gives the octile heuristic).
+        :param stats: Optional `SolverStats` timing every search and counting
+                      the nodes expanded.
+        """
+        if not 1 <= diagonal_cost <= 2:
+            raise ValueError("diagonal_cost must be between 1 and 2.")
+        self.maze = maze
+        self.connectivity = connectivity
+        self.diagonal_cost = diagonal_cost
+        self.stats = stats
+        self.directions = neighbour_offsets(2, connectivity)
+
+        rows, cols = maze.grid.shape
+        is_open = maze.grid != ord(maze.wall_cell)
+        if costs is None:
+            costs = np.ones((rows, cols))
+        costs = np.asarray(costs, dtype=float)
+        is_open &= np.isfinite(costs)
+        if (costs[is_open] <= 0).any():
+            raise ValueError("Costs of open cells must be positive.")
+        self.min_cost = float(costs[is_open].min()) if is_open.any() else 1.0
+
+        # Padded by one wall cell on every side, as in lib.kernels, so that
+        # neighbours are flat offsets without bounds checks. Python lists
+        # are faster to index one cell at a time than arrays.
+        self.width = cols + 2
+        padded_open = np.zeros((rows + 2, cols + 2), dtype=bool)
+        padded_open[1:-1, 1:-1] = is_open
+        padded_costs = np.zeros((rows + 2, cols + 2))
+        padded_costs[1:-1, 1:-1][is_open] = costs[is_open]
+        self._open = padded_open.reshape(-1).tolist()
+        self._costs = padded_costs.reshape(-1).tolist()
+        self._offsets = [dr * self.width + dc for dr, dc in self.directions]
+        self._steps = [
+            diagonal_cost if dr and dc else 1.0 for dr, dc in self.directions
+        ]
+
+    def dijkstra(
+        self,
+        source: tuple[int, int],
+        targets: list[tuple[int, int]] | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, int]:
+        """
+        Dijkstra from source, over the whole maze or until every target is
+        settled.
+        Returns:
+            distances, parent_dirs, expanded
+        where distances is a (rows, cols) float array (inf where not
+        reached), parent_dirs an int8 array of indices into self.directions
+        that `reconstruct_path` accepts with directions=self.directions, and
+        expanded the number of cells expanded.
+        """
+        with phase(self.stats, "dijkstra", source=source):
+            start = self._node(source)
+            pending = {self._node(t) for t in targets} if targets is not None else None
+            size = len(self._open)
+            dist = [inf] * size
+            parent_dirs = [NO_PARENT] * size
+            dist[start] = 0.0
+            heap = [(0.0, start)]
+            expanded = 0
+            while heap:
+                d, u = heappop(heap)
+                if d > dist[u]:
+                    continue
+                expanded += 1
+                if pending is not None:
+                    pending.discard(u)
+                    if not pending:
+                        break
+                for k, offset in enumerate(self._offsets):
+                    v = u + offset
+                    if not self._open[v]:
+                        continue
+                    nd = d + self._costs[v] * self._steps[k]
+                    if nd < dist[v]:
+                        dist[v] = nd
+                        parent_dirs[v] = k
+                        heappush(heap, (nd, v))
+            self._count(expanded)
+
+        shape = (len(self._open) // self.width, self.width)
+        distances = np.array(dist).reshape(shape)[1:-1, 1:-1]
+        parents = np.array(parent_dirs, dtype=np.int8).reshape(shape)[1:-1, 1:-1]
+        return distances.copy(), parents.copy(), expanded
+
+    def astar(self, source: tuple[int, int], goal: tuple[int, int]) -> SearchResult:
+        """
+        A* from source to goal. The heuristic is the cheapest possible cost
+        of the remaining steps: octile distance (Chebyshev when
+        diagonal_cost is 1) with 8 neighbours, Manhattan distance with 4,
+        times the smallest cell cost. It never overestimates, so the path
+        is optimal.
+        """
+        with phase(self.stats, "astar", source=source, goal=goal):
+            start, end = self._node(source), self._node(goal)
+            goal_r, goal_c = divmod(end, self.width)
+            scale = self.min_cost
+            diagonal = self.diagonal_cost - 1 if self.connectivity == 8 else 1.0
+
+            def heuristic(node):
+                r, c = divmod(node, self.width)
+                dr, dc = abs(r - goal_r), abs(c - goal_c)
+                return scale * (max(dr, dc) + diagonal * min(dr, dc))
+
+            dist = {start: 0.0}
+            parent = {start: -1}
+            heap = [(heuristic(start), start)]
+            closed = set()
+            expanded = 0
+            while heap:
+                _, u = heappop(heap)
+                if u in closed:
+                    continue
+                closed.add(u)
+                expanded += 1
+                if u == end:
+                    break
+                d = dist[u]
+                for k, offset in enumerate(self._offsets):
+                    v = u + offset
+                    if not self._open[v] or v in closed:
+                        continue
+                    nd = d + self._costs[v] * self._steps[k]
+                    if nd < dist.get(v, inf):
+                        dist[v] = nd
+                        parent[v] = u
+                        heappush(heap, (nd + heuristic(v), v))
+            self._count(expanded)
+
+        if end not in closed:
+            return SearchResult(inf, [], expanded)
+        return SearchResult(dist[end], self._chain(parent, end)[::-1], expanded)
+
+    def bidirectional(
+        self, source: tuple[int, int], goal: tuple[int, int]
+    ) -> SearchResult:
+        """
+        Dijkstra from both ends at once, always growing the side with the
+        smaller heap, until the two smallest heap keys add up to at least the
+        best meeting cost found. On long corridors each side only explores
+        around half of the path.
+        """
+        with phase(self.stats, "bidirectional", source=source, goal=goal):
+            start, end = self._node(source), self._node(goal)
+            # Side 0 searches forward from source, side 1 backward from goal.
+            dist = [{start: 0.0}, {end: 0.0}]
+            parent = [{start: -1}, {end: -1}]
+            heaps = [[(0.0, start)], [(0.0, end)]]
+            best, meet = (0.0, start) if start == end else (inf, -1)
+            expanded = 0
+            while heaps[0] and heaps[1]:
+                if heaps[0][0][0] + heaps[1][0][0] >= best:
+                    break
+                side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+                d, u = heappop(heaps[side])
+                if d > dist[side][u]:
+                    continue
+                expanded += 1
+                own, other = dist[side], dist[1 - side]
+                for k, offset in enumerate(self._offsets):
+                    v = u + offset
+                    if not self._open[v]:
+                        continue
+                    # The step always enters the cell nearer to the goal.
+                    entered = v if side == 0 else u
+                    nd = d + self._costs[entered] * self._steps[k]
+                    if nd < own.get(v, inf):
+                        own[v] = nd
+                        parent[side][v] = u
+                        heappush(heaps[side], (nd, v))
+                        if v in other and nd + other[v] < best:
+                            best, meet = nd + other[v], v
+            self._count(expanded)
+
+        if meet < 0:
+            return SearchResult(inf, [], expanded)
+        path = self._chain(parent[0], meet)[::-1] + self._chain(parent[1], meet)[1:]
+        return SearchResult(best, path, expanded)
+
+    def _node(self, cell: tuple[int, int]) -> int:
+        r, c = cell
+        node = (r + 1) * self.width + c + 1
+        if not 0 <= r < self.maze.num_rows or not 0 <= c < self.maze.num_cols:
+            raise ValueError(f"Cell {cell} is outside the maze.")
+        if not self._open[node]:
+            raise ValueError(f"Cell {cell} is a wall.")
+        return node
+
+    def _chain(self, parent: dict, node: int) -> list[tuple[int, int]]:
+        """
+        Returns the cells from node back to the root of a parent dict.
+        """
+        cells = []
+        while node >= 0:
+            r, c = divmod(node, self.width)
+            cells.append((r - 1, c - 1))
+            node = parent[node]
+        return cells
+
+    def _count(self, expanded: int) -> None:
+        if self.stats is not None:
+            self.stats.count("nodes_expanded", expanded)
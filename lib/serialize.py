@@ -0,0 +1,174 @@
+"""
+Versioned binary format for mazes (2D `Maze` or `Maze3D`) and their
+solutions.
+
+Layout: the magic bytes, a uint32 header length, a JSON header and then the
+data sections, each starting on a 64 byte boundary so they can be memory
+mapped in place. The header records the version, shape, connectivity, cell
+characters, the distance sum and, per section, its offset, dtype and shape.
+
+Sections:
+    walls     bit-packed wall mask of the grid, row-major
+    targets   (k, ndim) int64 target cells
+    cell      (ndim,) int64 optimal cell, with a solution
+    dist_sum  int64 distance-sum field shaped like the grid, optional
+    paths     (n, ndim) int64 path cells, optional
+"""
+
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from lib.maze import Maze
+from lib.maze3d import Maze3D
+
+MAGIC = b"\x93MAZE"
+VERSION = 1
+_ALIGN = 64
+
+
+@dataclass
+class Solution:
+    cell: tuple[int, ...]
+    distance_sum: float
+    # Per-cell sum of distances to the targets.
+    dist_sum_field: np.ndarray | None = None
+    # Cells on the shortest paths from `cell` to the targets.
+    path_cells: np.ndarray | None = None
+
+
+@dataclass
+class MazeFile:
+    maze: Maze | Maze3D
+    connectivity: int
+    solution: Solution | None = None
+    version: int = VERSION
+
+
+def save_maze(
+    path: str,
+    maze: Maze | Maze3D,
+    connectivity: int | None = None,
+    solution: Solution | None = None,
+) -> None:
+    """
+    Writes the maze, and optionally its solution, to path. Cells other than
+    walls and targets are stored as empty. connectivity defaults to all
+    3**ndim - 1 neighbours.
+    """
+    grid = maze.grid
+    sections = {
+        "walls": np.packbits(grid == ord(maze.wall_cell)),
+        "targets": np.argwhere(grid == ord(maze.target_cell)).astype(np.int64),
+    }
+    header = {
+        "version": VERSION,
+        "shape": list(grid.shape),
+        "connectivity": connectivity or 3**grid.ndim - 1,
+        "wall_cell": maze.wall_cell,
+        "empty_cell": maze.empty_cell,
+        "target_cell": maze.target_cell,
+        "fill_fraction": maze.fill_fraction,
+        "distance_sum": None,
+    }
+    if solution is not None:
+        header["distance_sum"] = solution.distance_sum
+        sections["cell"] = np.array(solution.cell, dtype=np.int64)
+        if solution.dist_sum_field is not None:
+            sections["dist_sum"] = np.asarray(solution.dist_sum_field, np.int64)
+        if solution.path_cells is not None:
+            paths = np.asarray(solution.path_cells, np.int64)
+            sections["paths"] = paths.reshape(-1, grid.ndim)
+
+    # Offsets depend on the header length, which depends on the offsets, so
+    # lay the sections out from a header size rounded up generously.
+    header["sections"] = {
+        name: {"offset": 0, "dtype": a.dtype.str, "shape": list(a.shape)}
+        for name, a in sections.items()
+    }
+    start = _aligned(len(MAGIC) + 4 + len(json.dumps(header)) + 32 * len(sections))
+    offset = start
+    for name, array in sections.items():
+        header["sections"][name]["offset"] = offset
+        offset = _aligned(offset + array.nbytes)
+    encoded = json.dumps(header).encode()
+    assert len(MAGIC) + 4 + len(encoded) <= start
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint32(len(encoded)).tobytes())
+        f.write(encoded)
+        for name, array in sections.items():
+            f.seek(header["sections"][name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(offset)
+    os.replace(tmp_path, path)
+
+
+def load_maze(path: str, mmap: bool = True) -> MazeFile:
+    """
+    Reads a file written by `save_maze`. With mmap, the solution arrays are
+    read-only views into the memory mapped file, nothing is copied until
+    used. The grid itself is unpacked from the wall bits into a new array.
+    """
+    header, sections = _read(path, mmap)
+    shape = tuple(header["shape"])
+    wall, empty, target = (
+        header["wall_cell"],
+        header["empty_cell"],
+        header["target_cell"],
+    )
+
+    is_wall = np.unpackbits(sections["walls"], count=int(np.prod(shape)))
+    # empty if not a wall else wall, as in `_fill_block`.
+    grid = is_wall * np.uint8(ord(empty) ^ ord(wall))
+    grid ^= np.uint8(ord(empty))
+    grid = grid.reshape(shape)
+    targets = sections["targets"]
+    grid[tuple(targets.T)] = ord(target)
+
+    maze_cls = Maze if len(shape) == 2 else Maze3D
+    maze = maze_cls.from_grid(grid, wall, empty, target)
+    maze.fill_fraction = header["fill_fraction"]
+
+    solution = None
+    if "cell" in sections:
+        solution = Solution(
+            cell=tuple(int(x) for x in sections["cell"]),
+            distance_sum=header["distance_sum"],
+            dist_sum_field=sections.get("dist_sum"),
+            path_cells=sections.get("paths"),
+        )
+    return MazeFile(maze, header["connectivity"], solution, header["version"])
+
+
+def _read(path: str, mmap: bool) -> tuple[dict, dict[str, np.ndarray]]:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a maze file.")
+        (length,) = np.frombuffer(f.read(4), dtype=np.uint32)
+        header = json.loads(f.read(int(length)))
+        if header["version"] > VERSION:
+            raise ValueError(
+                f"{path} has format version {header['version']}, "
+                f"newer than the supported {VERSION}."
+            )
+        sections = {}
+        for name, spec in header["sections"].items():
+            dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+            if mmap and int(np.prod(shape)) > 0:
+                sections[name] = np.memmap(
+                    path, dtype, "r", offset=spec["offset"], shape=shape
+                )
+            else:
+                f.seek(spec["offset"])
+                count = int(np.prod(shape))
+                sections[name] = np.fromfile(f, dtype, count).reshape(shape)
+    return header, sections
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
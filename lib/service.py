@@ -0,0 +1,285 @@
+"""
+A long-running solver service on a Unix domain socket, keeping mazes, their
+graph indexes and distance fields warm between requests.
+
+    python -m lib.service /tmp/maze.sock --workers 4
+
+Requests and replies are single lines of JSON. Every request has an "op":
+
+    {"op": "load", "path": "maze.bin"}          -> {"maze": id, ...}
+    {"op": "generate", "rows": 25, "cols": 60, "targets": 16,
+     "fill": 0.25, "seed": 0, "connectivity": 8}
+                                                -> {"maze": id, ...}
+    {"op": "solve", "maze": id, "top_k": 0}     -> {"cell": [r, c], ...}
+    {"op": "path", "maze": id, "cell": [r, c]}  -> {"cells": [[r, c], ...]}
+    {"op": "edit", "maze": id, "cells": [[r, c], ...], "value": "#"}
+                                                -> {"version": n}
+    {"op": "drop", "maze": id}                  -> {}
+    {"op": "ping"}                              -> {"mazes": n, ...}
+
+Replies carry "ok": true, or "ok": false, an "error" message and the
+"type" of the exception behind it. Sums and distances are null where the
+targets cannot all be reached, as JSON has no infinity. Loading or
+generating the same maze twice returns the same id. Solves and paths run on
+a thread pool (NumPy and the numba BFS release the GIL) one at a time per
+maze, and identical requests arriving while one is computed wait for its
+result instead of computing it again.
+"""
+
+import asyncio
+import json
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from lib.cache import DistanceFieldCache
+from lib.maze import Maze
+from lib.solver import MazeSolver
+
+
+@dataclass
+class _Entry:
+    maze: Maze
+    solver: MazeSolver
+    # Bumped by every edit, results of older versions are dropped.
+    version: int = 0
+    results: dict = field(default_factory=dict)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class SolverService:
+    def __init__(self, workers: int = 4, cache_bytes: int = 256 * 1024**2):
+        """
+        :param workers: Threads solving requests, mazes are solved in
+                        parallel but each one by a single thread at a time.
+        :param cache_bytes: Budget of the distance field cache of each maze.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.cache_bytes = cache_bytes
+        self.mazes: dict[str, _Entry] = {}
+        # (maze id, version, request) -> task computing it.
+        self._in_flight: dict[tuple, asyncio.Task] = {}
+        self._opening: dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def handle(self, request: dict) -> dict:
+        """
+        Answers one request, see the module docstring.
+        """
+        op = request.get("op")
+        try:
+            if op == "ping":
+                return {
+                    "ok": True,
+                    "mazes": len(self.mazes),
+                    "coalesced": self.coalesced,
+                }
+            if op in ("load", "generate"):
+                return {"ok": True, **await self._open(request)}
+            if op not in ("solve", "path", "edit", "drop"):
+                raise ValueError(f"Unknown op {op!r}.")
+            entry = self._entry(request)
+            if op in ("solve", "path"):
+                return {"ok": True, **await self._coalesced(entry, request)}
+            if op == "edit":
+                return {"ok": True, **await self._edit(entry, request)}
+            del self.mazes[request["maze"]]
+            return {"ok": True}
+        except Exception as e:
+            # Any failure answers this request only, the service keeps going.
+            return {
+                "ok": False,
+                "error": f"{type(e).__name__}: {e}",
+                "type": type(e).__name__,
+            }
+
+    async def serve(self, path: str) -> None:
+        """
+        Serves requests on a Unix socket at path until cancelled.
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(self._client, path=path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _client(self, reader, writer) -> None:
+        # Requests of one connection are answered in order.
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    reply = {"ok": False, "error": f"Bad request: {e}"}
+                else:
+                    reply = await self.handle(request)
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _open(self, request: dict) -> dict:
+        if request["op"] == "load":
+            path = os.path.abspath(request["path"])
+            maze_id = f"file:{path}:{os.stat(path).st_mtime_ns}"
+        else:
+            params = [
+                int(request["rows"]),
+                int(request["cols"]),
+                int(request.get("targets", 16)),
+                float(request.get("fill", 0.25)),
+                int(request.get("seed", 0)),
+                request.get("connectivity"),
+            ]
+            maze_id = "gen:" + ":".join(str(p) for p in params)
+        if maze_id not in self.mazes:
+            # Concurrent opens of the same maze share one load.
+            task = self._opening.get(maze_id)
+            if task is None:
+                task = asyncio.ensure_future(self._run(_open_maze, request))
+                self._opening[maze_id] = task
+                task.add_done_callback(lambda _: self._opening.pop(maze_id, None))
+            maze = await asyncio.shield(task)
+            if maze_id not in self.mazes:
+                cache = DistanceFieldCache(max_bytes=self.cache_bytes)
+                self.mazes[maze_id] = _Entry(maze, MazeSolver(maze, cache=cache))
+        maze = self.mazes[maze_id].maze
+        return {"maze": maze_id, "rows": maze.num_rows, "cols": maze.num_cols}
+
+    def _entry(self, request: dict) -> _Entry:
+        try:
+            return self.mazes[request["maze"]]
+        except KeyError:
+            raise KeyError(f"No maze {request.get('maze')!r}, load it first.")
+
+    async def _coalesced(self, entry: _Entry, request: dict) -> dict:
+        key = (request["maze"], entry.version, json.dumps(request, sort_keys=True))
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(entry, request))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # A cancelled client must not cancel the others waiting.
+        return await asyncio.shield(task)
+
+    async def _compute(self, entry: _Entry, request: dict) -> dict:
+        async with entry.lock:
+            if request["op"] == "solve":
+                top_k = int(request.get("top_k", 0))
+                key = ("solve", top_k)
+                if key not in entry.results:
+                    entry.results[key] = await self._run(_solve, entry.solver, top_k)
+                return entry.results[key]
+            cell = request.get("cell")
+            if cell is None:
+                if ("solve", 0) not in entry.results:
+                    entry.results["solve", 0] = await self._run(_solve, entry.solver, 0)
+                cell = entry.results["solve", 0]["cell"]
+            return await self._run(_paths, entry.solver, tuple(cell))
+
+    async def _edit(self, entry: _Entry, request: dict) -> dict:
+        maze = entry.maze
+        value = request["value"]
+        if value not in (maze.wall_cell, maze.empty_cell, maze.target_cell):
+            raise ValueError("Cells can only be set to walls, empty or targets.")
+        cells = [(int(r), int(c)) for r, c in request["cells"]]
+        for r, c in cells:
+            if not (0 <= r < maze.num_rows and 0 <= c < maze.num_cols):
+                raise ValueError(f"Cell {(r, c)} is outside the maze.")
+        async with entry.lock:
+            for r, c in cells:
+                maze.grid[r, c] = ord(value)
+            maze.invalidate_caches()
+            entry.version += 1
+            entry.results.clear()
+        return {"version": entry.version}
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, fn, *args
+        )
+
+
+def _open_maze(request: dict) -> Maze:
+    if request["op"] == "load":
+        from lib.serialize import load_maze
+
+        maze = load_maze(request["path"]).maze
+        if not isinstance(maze, Maze):
+            raise ValueError("The service only solves 2D mazes.")
+        return maze
+    return Maze(
+        rows=int(request["rows"]),
+        cols=int(request["cols"]),
+        n_targets=int(request.get("targets", 16)),
+        fill_fraction=float(request.get("fill", 0.25)),
+        random_seed=int(request.get("seed", 0)),
+        connectivity=request.get("connectivity"),
+    )
+
+
+def _solve(solver: MazeSolver, top_k: int) -> dict:
+    if top_k == 0:
+        cell, total = solver.find_optimal_point()
+        return {"cell": list(cell), "distance_sum": _finite(total)}
+    # One pass over the targets' distance fields gives the best cell too.
+    objectives = solver.distance_objectives(top_k)
+    (cell, total), (minimax_cell, worst) = objectives.best, objectives.minimax
+    return {
+        "cell": list(cell),
+        "distance_sum": _finite(total),
+        "minimax": [list(minimax_cell), _finite(worst)],
+        "top_cells": objectives.top_cells.tolist(),
+        "top_sums": objectives.top_sums.tolist(),
+    }
+
+
+def _finite(value: float) -> float | None:
+    return None if value == float("inf") else value
+
+
+def _paths(solver: MazeSolver, cell: tuple[int, int]) -> dict:
+    return {"cells": solver.get_paths_from_point(cell, from_fields=True).tolist()}
+
+
+def request(path: str, message: dict, timeout: float | None = None) -> dict:
+    """
+    Sends one request to a service listening at path and returns its reply.
+    Blocking and without asyncio, for thin clients.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        with sock.makefile("rb") as reply:
+            return json.loads(reply.readline())
+
+
+def serve(path: str, workers: int = 4) -> None:
+    """
+    Runs a `SolverService` on a Unix socket at path until interrupted.
+    """
+    try:
+        asyncio.run(SolverService(workers).serve(path))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve maze solves on a socket.")
+    parser.add_argument("socket", help="Path of the Unix socket to listen on.")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    serve(args.socket, args.workers)
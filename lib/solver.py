@@ -1,38 +1,383 @@
+from dataclasses import dataclass
+
+import numpy as np
+
 from lib.maze import Maze
-from lib.distance import DistanceCalculator, reconstruct_path
-from rich.console import Console
+from lib.distance import (
+    UNREACHABLE,
+    NO_PARENT,
+    DistanceCalculator,
+    GridDistanceCalculator,
+    best_candidate,
+    path_tree,
+    reconstruct_path,
+)
+from lib.instrument import phase
+
+
+@dataclass
+class DistanceObjectives:
+    """
+    Placement objectives over all cells, see `MazeSolver.distance_objectives`.
+    """
+
+    # (rows, cols) int64 sum of distances to the targets, and int32 largest
+    # distance to a target, UNREACHABLE where some target cannot be reached.
+    dist_sum: np.ndarray
+    max_dist: np.ndarray
+    # The cell with the smallest sum, as returned by `find_optimal_point`.
+    best: tuple[tuple[int, int], float]
+    # The cell with the smallest largest distance, ties broken by sum.
+    minimax: tuple[tuple[int, int], float]
+    # (k, 2) cells with the k smallest sums and those sums, in increasing
+    # order of (sum, row-major index).
+    top_cells: np.ndarray
+    top_sums: np.ndarray
 
 
 class MazeSolver:
-    def __init__(self, maze: Maze):
+    # Candidates ranked per batch in pruned mode, enough that most solves
+    # stop within the first one.
+    pruned_batch_size = 1024
+
+    def __init__(
+        self,
+        maze: Maze,
+        workers: int | None = None,
+        cache=None,
+        stats=None,
+        pruned: bool = False,
+    ):
+        """
+        :param maze: The maze to solve.
+        :param workers: If given, spread the target distance computations of
+                        `find_optimal_point` over this many processes.
+                        Ignored with a cache, whose fields are computed and
+                        kept in this process.
+        :param cache: Optional `DistanceFieldCache`. When given, distance
+                      fields are computed per target and per path source
+                      through the cache, so repeated solves of the same walls
+                      skip the BFS.
+        :param stats: Optional `SolverStats` collecting the time spent in each
+                      phase (grid_scan, bfs or multi_source_bfs, reduction,
+                      reconstruct_path) and the BFS counters. Workers' BFS
+                      runs are timed as a whole, not counted.
+        :param pruned: If True, `find_optimal_point` ranks candidates by a
+                       Chebyshev lower bound and evaluates them one by one
+                       with bounded BFS instead of computing every target's
+                       distance field, falling back to that once the bounded
+                       BFS have reached as many cells as it would. workers
+                       and cache are only used by the fallback.
+                       `distance_objectives` needs every cell's sum and
+                       always computes every field.
+        """
         self.maze = maze
-        self.distance_calculator = DistanceCalculator(maze)
-        self.targets = maze.get_target_cells()
-        self.empty_cells = maze.get_empty_cells()
+        self.workers = workers
+        self.cache = cache
+        self.stats = stats
+        self.pruned = pruned
+        # (key, view) of `_component_view`.
+        self._view = None
+        # (key, fields): the targets' distance fields of the last solve that
+        # computed them without a cache, reused by `get_path_tree`.
+        self._fields = None
+        self.distance_calculator = DistanceCalculator(maze, cache=cache, stats=stats)
+
+    @property
+    def targets(self) -> list[tuple[int, int]]:
+        # Read from the maze on every use, so edits to the maze are seen.
+        return self.maze.get_target_cells()
+
+    @property
+    def empty_cells(self) -> list[tuple[int, int]]:
+        with phase(self.stats, "grid_scan"):
+            return self.maze.get_empty_cells()
 
     def find_optimal_point(self) -> tuple[tuple[int, int], float]:
         """
         Returns (best_row, best_col, min_sum_of_distances).
+        Targets in different connected components share no reachable cell,
+        which is reported as ((-1, -1), inf) without running any BFS.
+        Otherwise BFS and candidate scan are cropped to the bounding box of
+        the targets' component.
+        """
+        with phase(self.stats, "grid_scan"):
+            targets = self.targets
+            if not targets:
+                # Every empty cell has an (empty) sum of 0.
+                return best_candidate(
+                    np.zeros(self.maze.grid.shape, dtype=np.int64),
+                    self.maze.get_cell_mask(self.maze.empty_cell),
+                )
+            view = self._component_view(targets)
+            if view is None:
+                return (-1, -1), float("inf")
+            maze, window, in_component = view
+            r0, c0 = window[0].start, window[1].start
+            targets = [(r - r0, c - c0) for r, c in targets]
+        calculator = DistanceCalculator(maze, cache=self.cache, stats=self.stats)
+
+        with phase(self.stats, "grid_scan"):
+            candidates = maze.get_cell_mask(maze.empty_cell)
+            candidates &= in_component
+        key = self._fields_key(window)
+        if self.pruned:
+            cell, best = self._pruned_search(calculator, targets, candidates, key)
+        else:
+            cell, best = self._exhaustive_search(calculator, targets, candidates, key)
+        if best == float("inf"):
+            return cell, best
+        return (cell[0] + r0, cell[1] + c0), best
+
+    def _component_view(
+        self, targets: list[tuple[int, int]]
+    ) -> tuple[Maze, tuple[slice, slice], np.ndarray] | None:
+        """
+        Returns (maze, window, in_component): the maze cropped to the bounding
+        box of the targets' connected component, the window it was cropped
+        to and a mask of the component's cells within it. Returns None when
+        the targets lie in different components.
+        The view is kept until the walls or targets change, so the cropped
+        maze keeps its own caches (graph index, content hash) across solves.
+        """
+        key = self.maze.content_hash(), tuple(targets)
+        if self._view is None or self._view[0] != key:
+            self._view = key, self._crop_to_component(targets)
+        return self._view[1]
+
+    def _crop_to_component(
+        self, targets: list[tuple[int, int]]
+    ) -> tuple[Maze, tuple[slice, slice], np.ndarray] | None:
+        if self.distance_calculator.backend == "numba":
+            # One compiled BFS from a target finds its component much faster
+            # than labelling all of them.
+            distances, _ = DistanceCalculator(self.maze).bfs_distance_array(*targets[0])
+            in_component = distances != UNREACHABLE
+        else:
+            components = self.maze.components(len(self.distance_calculator.directions))
+            in_component = components.labels == components.label_of(targets[0])
+        if not all(in_component[t] for t in targets):
+            return None
+        rows = np.flatnonzero(in_component.any(axis=1))
+        cols = np.flatnonzero(in_component.any(axis=0))
+        window = (
+            slice(int(rows[0]), int(rows[-1]) + 1),
+            slice(int(cols[0]), int(cols[-1]) + 1),
+        )
+        if self.maze.grid[window].shape == self.maze.grid.shape:
+            # Keep the maze's own caches (graph index, content hash).
+            maze = self.maze
+        else:
+            maze = Maze.from_grid(
+                self.maze.grid[window],
+                self.maze.wall_cell,
+                self.maze.empty_cell,
+                self.maze.target_cell,
+            )
+        return maze, window, in_component[window]
+
+    def _fields_key(self, window: tuple[slice, slice]) -> tuple:
+        # Distances only depend on the walls, the window and the targets.
+        bounds = tuple(x for s in window for x in (s.start, s.stop))
+        return self.maze.content_hash(), bounds, tuple(self.targets)
+
+    def _exhaustive_search(
+        self,
+        calculator: DistanceCalculator,
+        targets: list[tuple[int, int]],
+        candidates: np.ndarray,
+        fields_key: tuple,
+    ) -> tuple[tuple[int, int], float]:
+        maze = calculator.maze
+        parallel = self.workers is not None and self.workers > 1
+        if self.cache is not None or (calculator.backend == "numba" and not parallel):
+            # One compiled BFS per target beats the bit-parallel BFS on
+            # numpy masks by far. Cached fields must be computed here, so
+            # workers are ignored with a cache.
+            dist_sum, _, reached = self._streamed_distance_sums(
+                calculator, targets, fields_key
+            )
+        elif parallel:
+            from lib.parallel import parallel_distance_sum
+
+            with phase(self.stats, "parallel_bfs", workers=self.workers):
+                dist_sum, reached = parallel_distance_sum(maze, targets, self.workers)
+        else:
+            dist_sum, reached = calculator.multi_source_distance_sum(targets)
+
+        with phase(self.stats, "reduction"):
+            # Only empty cells reached from every target have a finite sum.
+            candidates &= reached == len(targets)
+            return best_candidate(dist_sum, candidates)
+
+    def _pruned_search(
+        self,
+        calculator: DistanceCalculator,
+        targets: list[tuple[int, int]],
+        candidates: np.ndarray,
+        fields_key: tuple,
+    ) -> tuple[tuple[int, int], float]:
+        """
+        Branch and bound over the candidates: on an 8-connected grid the sum
+        of Chebyshev distances to the targets never exceeds the sum of BFS
+        distances, so candidates are visited in increasing (bound, row-major
+        index) order and the search stops at the first one whose bound shows
+        it cannot beat, or tie earlier than, the best exact sum found.
+        Once the bounded BFS have reached as many cells as one BFS per target
+        would, the bound is not cutting enough, as on mazes with many walls,
+        and the exhaustive search finishes instead.
+        Returns the same cell as the exhaustive search.
         """
-        best_cell = (-1, -1)
-        best_dist_sum = float("inf")
-
-        all_dist_maps = []
-        for tr, tc in self.targets:
-            dist_map, _ = self.distance_calculator.bfs_distance_with_parents(tr, tc)
-            all_dist_maps.append(dist_map)
-
-        # Now iterate over *all* possible empty cells:
-        for r, c in self.empty_cells:
-            # Sum distances from each target's dist_map
-            dist_sum = 0
-            for dist_map in all_dist_maps:
-                d = dist_map.get((r, c), float("inf"))
-                dist_sum += d
-            if dist_sum < best_dist_sum:
-                best_dist_sum = dist_sum
-                best_cell = (r, c)
-        return best_cell, best_dist_sum
+        rows, cols = candidates.shape
+        target_array = np.array(targets)
+        with phase(self.stats, "lower_bound"):
+            lower_bound = np.zeros(candidates.shape, dtype=np.int64)
+            row_idx, col_idx = np.arange(rows), np.arange(cols)
+            for tr, tc in target_array:
+                lower_bound += np.maximum(
+                    np.abs(row_idx - tr)[:, None], np.abs(col_idx - tc)[None, :]
+                )
+            cells = np.flatnonzero(candidates)
+            # One sortable key per candidate: bound first, then row-major index.
+            keys = lower_bound.reshape(-1)[cells] * candidates.size + cells
+
+        budget = calculator.bounded_cells_reached + len(targets) * (
+            len(cells) + len(targets)
+        )
+        best_sum, best_idx = float("inf"), -1
+        while keys.size:
+            if keys.size > self.pruned_batch_size:
+                batch = keys[np.argpartition(keys, self.pruned_batch_size)]
+                batch = np.sort(batch[: self.pruned_batch_size])
+            else:
+                batch = np.sort(keys)
+            keys = keys[keys > batch[-1]]
+
+            for key in batch:
+                bound, idx = divmod(int(key), candidates.size)
+                if bound > best_sum or (bound == best_sum and idx > best_idx):
+                    return _cell_of(best_idx, cols), best_sum
+                if calculator.bounded_cells_reached > budget:
+                    return self._exhaustive_search(
+                        calculator, targets, candidates, fields_key
+                    )
+                # A later cell has to be strictly better to replace the best.
+                limit = best_sum if idx < best_idx else best_sum - 1
+                r, c = divmod(idx, cols)
+                if self.stats is not None:
+                    self.stats.count("candidates_evaluated", 1)
+                total = calculator.bounded_distance_sum(r, c, target_array, limit)
+                if total is not None and total <= limit:
+                    best_sum, best_idx = total, idx
+        return _cell_of(best_idx, cols), best_sum
+
+    def _streamed_distance_sums(
+        self,
+        calculator: DistanceCalculator,
+        targets: list[tuple[int, int]],
+        fields_key: tuple,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Folds the targets' distance fields one at a time into the sum, the
+        largest distance and the number of targets reaching each cell, each
+        field being read once. Without a cache, which keeps them otherwise,
+        the fields are also kept under fields_key for `get_path_tree`.
+        """
+        shape = calculator.maze.grid.shape
+        dist_sum = np.zeros(shape, dtype=np.int64)
+        max_dist = np.zeros(shape, dtype=np.int32)
+        reached = np.zeros(shape, dtype=np.int32)
+        fields = None
+        if self.cache is None:
+            self._fields = None
+            fields = np.empty((len(targets), *shape), dtype=np.int32)
+        for i, (tr, tc) in enumerate(targets):
+            dist, parents = calculator.bfs_distance_array(tr, tc)
+            if fields is not None:
+                fields[i] = dist
+            with phase(self.stats, "reduction"):
+                is_reached = dist != UNREACHABLE
+                np.add(dist_sum, dist, out=dist_sum, where=is_reached)
+                # UNREACHABLE is negative and never raises the maximum.
+                np.maximum(max_dist, dist, out=max_dist)
+                reached += is_reached
+            if self.stats is not None:
+                self.stats.peak(
+                    "bytes_held",
+                    dist_sum.nbytes
+                    + max_dist.nbytes
+                    + reached.nbytes
+                    + dist.nbytes
+                    + parents.nbytes
+                    + (0 if fields is None else fields.nbytes),
+                )
+        if fields is not None:
+            self._fields = fields_key, fields
+        return dist_sum, max_dist, reached
+
+    def distance_objectives(self, top_k: int = 10) -> DistanceObjectives:
+        """
+        Computes the distance-sum heatmap, the largest distance to any target
+        per cell, the best cell for the sum (as `find_optimal_point`), the
+        minimax cell and the top_k cells by sum, all from one pass over the
+        targets' distance fields. As in `find_optimal_point`, only empty cells
+        reached from every target are candidates and the work is cropped to
+        the targets' component, outside of which both arrays hold
+        UNREACHABLE. Without candidates the cells are (-1, -1) with an inf
+        value and top_cells is empty. pruned does not apply, every target's
+        distance field is needed.
+        """
+        shape = self.maze.grid.shape
+        dist_sum = np.full(shape, UNREACHABLE, dtype=np.int64)
+        max_dist = np.full(shape, UNREACHABLE, dtype=np.int32)
+        no_cell = ((-1, -1), float("inf"))
+        result = DistanceObjectives(
+            dist_sum,
+            max_dist,
+            no_cell,
+            no_cell,
+            np.empty((0, 2), np.int64),
+            np.empty(0, np.int64),
+        )
+        targets = self.targets
+        with phase(self.stats, "grid_scan"):
+            if targets:
+                view = self._component_view(targets)
+                if view is None:
+                    return result
+            else:
+                # Every open cell has an (empty) sum of 0.
+                view = (self.maze, (slice(None), slice(None)), np.ones(shape, bool))
+            maze, window, in_component = view
+            r0, c0 = window[0].start or 0, window[1].start or 0
+            targets = [(r - r0, c - c0) for r, c in targets]
+        calculator = DistanceCalculator(maze, cache=self.cache, stats=self.stats)
+        sums, worst, reached = self._streamed_distance_sums(
+            calculator, targets, self._fields_key(window)
+        )
+
+        with phase(self.stats, "reduction"):
+            complete = (reached == len(targets)) & in_component
+            complete &= maze.grid != ord(maze.wall_cell)
+            dist_sum[window][complete] = sums[complete]
+            max_dist[window][complete] = worst[complete]
+            candidates = complete & maze.get_cell_mask(maze.empty_cell)
+            if not candidates.any():
+                return result
+
+            def shifted(cell):
+                return cell[0] + r0, cell[1] + c0
+
+            cell, best = best_candidate(sums, candidates)
+            result.best = shifted(cell), best
+            least_worst = worst[candidates].min()
+            cell, _ = best_candidate(sums, candidates & (worst == least_worst))
+            result.minimax = shifted(cell), int(least_worst)
+            top = _top_k_candidates(sums, candidates, top_k)
+            result.top_cells = np.column_stack(np.unravel_index(top, sums.shape))
+            result.top_cells += (r0, c0)
+            result.top_sums = sums.reshape(-1)[top]
+        return result
 
     def mark_point(self, given_point: tuple[int, int], marking_cell_type="X") -> None:
         """
@@ -41,46 +386,235 @@ class MazeSolver:
         r, c = given_point
         self.maze[r][c] = marking_cell_type
 
-    def get_paths_from_point(
+    def get_path_tree(
         self, given_point: tuple[int, int]
-    ) -> list[tuple[int, int]]:
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the shortest paths from the given point to every target as a
+        tree of (cells, parents) arrays, see `path_tree`, found by walking
+        the targets' distance fields downhill. These are the fields
+        `find_optimal_point` or `distance_objectives` already computed, from
+        the cache or kept by the solver, so no new search runs. Otherwise,
+        as after a pruned or multi-source search, one BFS per target
+        computes them.
+        """
+        targets = self.targets
+        view = self._component_view(targets) if targets else None
+        if view is None:
+            maze, origin = self.maze, (0, 0)
+            window = tuple(slice(0, n) for n in self.maze.grid.shape)
+        else:
+            maze, window, _ = view
+            origin = (window[0].start, window[1].start)
+        start = (given_point[0] - origin[0], given_point[1] - origin[1])
+        if not targets or not all(0 <= x < n for x, n in zip(start, maze.grid.shape)):
+            return np.array([given_point]), np.array([NO_PARENT], dtype=np.int32)
+
+        key = self._fields_key(window)
+        if self._fields is not None and self._fields[0] == key:
+            fields = self._fields[1]
+        else:
+            calculator = DistanceCalculator(maze, cache=self.cache, stats=self.stats)
+            fields = np.stack(
+                [
+                    calculator.bfs_distance_array(r - origin[0], c - origin[1])[0]
+                    for r, c in targets
+                ]
+            )
+        with phase(self.stats, "reconstruct_path"):
+            cells, parents = path_tree(fields, start)
+        return cells + origin, parents
+
+    def get_paths_from_point(
+        self, given_point: tuple[int, int], from_fields: bool = False
+    ) -> list[tuple[int, int]] | np.ndarray:
         """
         Return the shortest paths from the given point to targets.
+        With from_fields, the cells come from `get_path_tree`: an (n, 2) array
+        holding each empty cell of the paths once. Otherwise a list of
+        (row, col) with cells shared by several paths repeated.
+        There are no paths from a wall or from outside the maze, such as the
+        (-1, -1) `find_optimal_point` returns when targets are disconnected.
         """
-        (start_r, start_c) = given_point
-        _, parent_map = self.distance_calculator.bfs_distance_with_parents(
-            start_r, start_c
-        )
+        r, c = given_point
+        if not (
+            0 <= r < self.maze.num_rows and 0 <= c < self.maze.num_cols
+        ) or self.maze.grid[r, c] == ord(self.maze.wall_cell):
+            return np.empty((0, 2), dtype=np.intp) if from_fields else []
+
+        if from_fields:
+            cells, _ = self.get_path_tree(given_point)
+            cells = cells[1:]
+            is_empty = self.maze.grid[cells[:, 0], cells[:, 1]] == ord(
+                self.maze.empty_cell
+            )
+            return cells[is_empty]
+
+        start_r, start_c = given_point
+        if self.cache is not None:
+            _, parents = self.distance_calculator.bfs_distance_array(start_r, start_c)
+            graph = None
+        else:
+            _, parents = self.distance_calculator.bfs_distance_graph(start_r, start_c)
+            graph = self.distance_calculator.graph
 
         paths = []
-        for tr, tc in self.targets:
-            path = reconstruct_path(parent_map, given_point, (tr, tc))
-            for r, c in path:
-                if self.maze[r][c] == self.maze.empty_cell and (r, c) != given_point:
-                    paths.append((r, c))
+        with phase(self.stats, "reconstruct_path"):
+            for tr, tc in self.targets:
+                path = reconstruct_path(parents, given_point, (tr, tc), graph=graph)
+                for r, c in path:
+                    if (
+                        self.maze[r][c] == self.maze.empty_cell
+                        and (r, c) != given_point
+                    ):
+                        paths.append((r, c))
         return paths
 
     def mark_paths_from_point(
-        self, given_point: tuple[int, int], marking_cell_type="."
+        self,
+        given_point: tuple[int, int],
+        marking_cell_type=".",
+        from_fields: bool = False,
     ) -> None:
         """
         Mark the shortest paths from the given point to targets.
         """
+        if from_fields:
+            cells = self.get_paths_from_point(given_point, from_fields=True)
+            self.maze.grid[cells[:, 0], cells[:, 1]] = ord(marking_cell_type)
+            self.maze.invalidate_caches()
+            return
 
         paths = self.get_paths_from_point(given_point)
         for path in paths:
             self.mark_point(path, marking_cell_type)
 
 
-if __name__ == "__main__":
-    maze = Maze(rows=25, cols=60, n_targets=16, fill_fraction=0.25, random_seed=None)
+class GridSolver:
+    """
+    MazeSolver counterpart for grids of any dimension, e.g. a Maze3D, with a
+    configurable connectivity (6, 18 or 26 neighbours in 3D).
+    """
+
+    # Up to this many cells, one bit-parallel sweep over the whole grid beats
+    # one sparse BFS per target.
+    bit_parallel_max_cells = 1 << 18
+
+    def __init__(self, maze, connectivity: int | None = None):
+        """
+        :param maze: A Maze or Maze3D, anything with a uint8 `grid` of ASCII
+                     cells and the wall/empty/target cell characters.
+        :param connectivity: Neighbours per cell, defaults to all of them.
+        """
+        self.maze = maze
+        self.distance_calculator = GridDistanceCalculator(
+            maze.grid != ord(maze.wall_cell), connectivity
+        )
+
+    @property
+    def targets(self) -> list[tuple[int, ...]]:
+        return self.maze.get_target_cells()
+
+    def find_optimal_point(self) -> tuple[tuple[int, ...], float]:
+        """
+        Returns (best_cell, min_sum_of_distances).
+        """
+        targets = self.targets
+        if self.maze.grid.size <= self.bit_parallel_max_cells:
+            dist_sum, reached = self.distance_calculator.multi_source_distance_sum(
+                targets
+            )
+        else:
+            dist_sum, reached = self.distance_calculator.distance_sum(targets)
+        candidates = self.maze.get_cell_mask(self.maze.empty_cell)
+        candidates &= reached == len(targets)
+        return best_candidate(dist_sum, candidates)
+
+    def mark_point(self, given_point: tuple[int, ...], marking_cell_type="X") -> None:
+        """
+        Mark the given point with the given cell type.
+        """
+        self.maze.grid[tuple(given_point)] = ord(marking_cell_type)
+        if hasattr(self.maze, "invalidate_caches"):
+            self.maze.invalidate_caches()
+
+    def get_paths_from_point(
+        self, given_point: tuple[int, ...]
+    ) -> list[tuple[int, ...]]:
+        """
+        Return the shortest paths from the given point to targets.
+        """
+        _, parent_dirs = self.distance_calculator.bfs_distance_array(given_point)
+        empty = ord(self.maze.empty_cell)
+
+        paths = []
+        for target in self.targets:
+            path = reconstruct_path(
+                parent_dirs,
+                given_point,
+                target,
+                directions=self.distance_calculator.directions,
+            )
+            for cell in path:
+                if self.maze.grid[cell] == empty and cell != tuple(given_point):
+                    paths.append(cell)
+        return paths
+
 
-    solver = MazeSolver(maze)
-    best_cell, best_dist_sum = solver.find_optimal_point()
+def _cell_of(flat_idx: int, cols: int) -> tuple[int, int]:
+    if flat_idx < 0:
+        return -1, -1
+    return divmod(flat_idx, cols)
+
+
+def _top_k_candidates(values: np.ndarray, candidates: np.ndarray, k: int) -> np.ndarray:
+    """
+    Returns the flat indices of the k candidates with the smallest values,
+    ordered by (value, flat index). Only those k are sorted, after
+    argpartition picks them out of all candidates.
+    """
+    cells = np.flatnonzero(candidates)
+    # One sortable key per candidate: value first, then row-major index.
+    keys = values.reshape(-1)[cells].astype(np.int64) * values.size + cells
+    if k < keys.size:
+        keys = keys[np.argpartition(keys, k)[:k]]
+    return np.sort(keys) % values.size
+
+
+def _print_solution(
+    maze: Maze,
+    stats=None,
+    pruned: bool = False,
+    save: str | None = None,
+    top_k: int = 0,
+) -> None:
+    solver = MazeSolver(maze, stats=stats, pruned=pruned)
+    objectives = None
+    if top_k > 0 or save is not None:
+        # One pass over the targets' distance fields gives the best cell too.
+        objectives = solver.distance_objectives(top_k)
+        best_cell, best_dist_sum = objectives.best
+    else:
+        best_cell, best_dist_sum = solver.find_optimal_point()
     print("Best cell:", best_cell, "with sum of distances =", best_dist_sum)
+    if top_k > 0:
+        cell, worst = objectives.minimax
+        print("Minimax cell:", cell, "with largest distance =", worst)
+        for rank, (cell, total) in enumerate(
+            zip(objectives.top_cells.tolist(), objectives.top_sums.tolist()), 1
+        ):
+            print(f"{rank}. {tuple(cell)} with sum of distances = {total}")
+    if save is not None:
+        from lib.serialize import Solution, save_maze
+
+        paths = solver.get_paths_from_point(best_cell, from_fields=True)
+        solution = Solution(best_cell, best_dist_sum, objectives.dist_sum, paths)
+        save_maze(save, maze, solution=solution)
 
     solver.mark_point(given_point=best_cell, marking_cell_type="X")
     solver.mark_paths_from_point(best_cell, marking_cell_type=".")
+    from rich.console import Console
+
     console = Console()
 
     maze_str = str(maze)
@@ -92,3 +626,178 @@ if __name__ == "__main__":
     maze_str = maze_str.replace(".", f"[bold blue].[/]")
 
     console.print(maze_str)
+    if stats is not None:
+        print(stats)
+
+
+def _print_remote_solution(args) -> None:
+    from lib.service import request
+
+    if args.load is not None:
+        message = {"op": "load", "path": args.load}
+    else:
+        message = {
+            "op": "generate",
+            "rows": args.rows[0],
+            "cols": args.cols[0],
+            "targets": args.targets[0],
+            "fill": args.fill[0],
+            "seed": args.base_seed,
+            "connectivity": args.connected,
+        }
+    reply = request(args.connect, message)
+    if reply["ok"]:
+        reply = request(
+            args.connect, {"op": "solve", "maze": reply["maze"], "top_k": args.top_k}
+        )
+    if not reply["ok"]:
+        raise SystemExit(reply["error"])
+
+    def value(x):
+        # The service sends null for unreachable, print it as a local solve.
+        return float("inf") if x is None else x
+
+    print(
+        "Best cell:",
+        tuple(reply["cell"]),
+        "with sum of distances =",
+        value(reply["distance_sum"]),
+    )
+    if args.top_k > 0:
+        cell, worst = reply["minimax"]
+        worst = value(worst)
+        print("Minimax cell:", tuple(cell), "with largest distance =", worst)
+        for rank, (cell, total) in enumerate(
+            zip(reply["top_cells"], reply["top_sums"]), 1
+        ):
+            print(f"{rank}. {tuple(cell)} with sum of distances = {total}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Solve random mazes.")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Solve every combination of the parameters below and stream results.",
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=[25])
+    parser.add_argument("--cols", type=int, nargs="+", default=[60])
+    parser.add_argument("--targets", type=int, nargs="+", default=[16])
+    parser.add_argument("--fill", type=float, nargs="+", default=[0.25])
+    parser.add_argument("--seeds", type=int, default=1, help="Mazes per combination.")
+    parser.add_argument("--base-seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--out", default=None, help="Output .jsonl or .parquet file (default stdout)."
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print per-phase timings and BFS counters of the solve.",
+    )
+    parser.add_argument(
+        "--pruned",
+        action="store_true",
+        help="Use the branch-and-bound search, faster on mostly open mazes and"
+        " at most about twice as slow otherwise.",
+    )
+    parser.add_argument(
+        "--save",
+        default=None,
+        help="Write the maze and its solution to this binary maze file.",
+    )
+    parser.add_argument(
+        "--load",
+        default=None,
+        help="Solve the maze stored in this binary maze file instead of a random one.",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=0,
+        help="Also print the minimax cell and the k cells with the smallest sums.",
+    )
+    parser.add_argument(
+        "--approx",
+        type=int,
+        default=0,
+        metavar="CHECKS",
+        help="Solve coarse to fine instead, checking the result with at most "
+        "CHECKS full BFS runs, for very large mazes.",
+    )
+    parser.add_argument(
+        "--connected",
+        action="store_const",
+        const=8,
+        help="Place all targets of random mazes in one connected region.",
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="SOCKET",
+        help="Run a solver service on this Unix socket, see lib.service.",
+    )
+    parser.add_argument(
+        "--connect",
+        metavar="SOCKET",
+        help="Solve through the service on this socket, keeping the maze warm "
+        "there for the next call. Random mazes use --base-seed.",
+    )
+    args = parser.parse_args()
+    if args.pruned and (args.top_k > 0 or args.save is not None):
+        parser.error("--pruned cannot be combined with --top-k or --save.")
+
+    if args.serve is not None:
+        from lib.service import serve
+
+        serve(args.serve, workers=args.workers)
+    elif args.connect is not None:
+        _print_remote_solution(args)
+    elif args.batch:
+        from lib.batch import expand_configs, run_batch
+
+        configs = expand_configs(
+            args.rows,
+            args.cols,
+            args.targets,
+            args.fill,
+            args.seeds,
+            args.base_seed,
+            args.connected,
+        )
+        run_batch(configs, out=args.out, workers=args.workers)
+    else:
+        if args.load is not None:
+            from lib.serialize import load_maze
+
+            maze = load_maze(args.load).maze
+        else:
+            maze = Maze(
+                rows=args.rows[0],
+                cols=args.cols[0],
+                n_targets=args.targets[0],
+                fill_fraction=args.fill[0],
+                random_seed=None,
+                connectivity=args.connected,
+            )
+        from lib.instrument import SolverStats
+
+        stats = SolverStats() if args.stats else None
+        if args.approx:
+            from lib.multires import MultiResolutionSolver
+
+            result = MultiResolutionSolver(
+                maze, max_checks=args.approx, stats=stats
+            ).find_optimal_point()
+            print(
+                "Cell:",
+                result.cell,
+                "with sum of distances =",
+                result.distance_sum,
+                "(exact)" if result.exact else f"(at most {result.error_bound} over)",
+            )
+            if stats is not None:
+                print(stats)
+        else:
+            _print_solution(maze, stats, args.pruned, args.save, args.top_k)
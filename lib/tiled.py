@@ -0,0 +1,506 @@
+import heapq
+import json
+import os
+
+import numpy as np
+
+from lib.distance import UNREACHABLE, best_candidate, neighbour_offsets, seeded_bfs
+from lib.maze import Maze, _fill_block
+
+
+class TiledArray:
+    """
+    A 2D array stored on disk tile by tile: one raw file holding
+    (tile_rows, tile_cols, tile, tile) blocks, memory mapped so that only the
+    tiles in use are paged in. The last tiles of each axis are padded past
+    the array's edge.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        shape: tuple[int, int],
+        tile: int,
+        dtype,
+        mode: str = "r",
+        fill=None,
+    ):
+        """
+        :param path: File holding the tiles.
+        :param shape: (rows, cols) of the array.
+        :param tile: Side of the square tiles.
+        :param mode: np.memmap mode, "w+" creates (or overwrites) the file.
+        :param fill: If given, every cell is set to it, one tile row at a time.
+        """
+        self.path = path
+        self.shape = tuple(shape)
+        self.tile = tile
+        self.dtype = np.dtype(dtype)
+        self.tiles_shape = (-(-self.shape[0] // tile), -(-self.shape[1] // tile))
+        self.data = np.memmap(
+            path, self.dtype, mode, shape=self.tiles_shape + (tile, tile)
+        )
+        if fill is not None:
+            for i in range(self.tiles_shape[0]):
+                self.data[i] = fill
+
+    def tile_origin(self, i: int, j: int) -> tuple[int, int]:
+        return i * self.tile, j * self.tile
+
+    def read(self, r0: int, r1: int, c0: int, c1: int, fill) -> np.ndarray:
+        """
+        Returns a copy of the cells [r0:r1, c0:c1], which may reach past the
+        array's edges, where cells are set to fill.
+        """
+        out = np.full((r1 - r0, c1 - c0), fill, dtype=self.dtype)
+        for (rs, cs), (ts_r, ts_c), (i, j) in self._overlaps(r0, r1, c0, c1):
+            out[rs, cs] = self.data[i, j][ts_r, ts_c]
+        return out
+
+    def write(self, r0: int, c0: int, block: np.ndarray) -> None:
+        """
+        Writes block at (r0, c0), cells past the array's edges are dropped.
+        """
+        r1, c1 = r0 + block.shape[0], c0 + block.shape[1]
+        for (rs, cs), (ts_r, ts_c), (i, j) in self._overlaps(r0, r1, c0, c1):
+            self.data[i, j][ts_r, ts_c] = block[rs, cs]
+
+    def _overlaps(self, r0: int, r1: int, c0: int, c1: int):
+        # Yields (slices into the window, slices into the tile, tile index)
+        # for every tile the in-bounds part of the window touches.
+        top, bottom = max(r0, 0), min(r1, self.shape[0])
+        left, right = max(c0, 0), min(c1, self.shape[1])
+        if top >= bottom or left >= right:
+            return
+        t = self.tile
+        for i in range(top // t, (bottom - 1) // t + 1):
+            for j in range(left // t, (right - 1) // t + 1):
+                rr0, rr1 = max(top, i * t), min(bottom, (i + 1) * t)
+                cc0, cc1 = max(left, j * t), min(right, (j + 1) * t)
+                yield (
+                    (slice(rr0 - r0, rr1 - r0), slice(cc0 - c0, cc1 - c0)),
+                    (slice(rr0 - i * t, rr1 - i * t), slice(cc0 - j * t, cc1 - j * t)),
+                    (i, j),
+                )
+
+    def to_array(self) -> np.ndarray:
+        return self.read(0, self.shape[0], 0, self.shape[1], 0)
+
+    def flush(self) -> None:
+        self.data.flush()
+
+
+class TiledMaze:
+    """
+    A maze too large for memory, stored in a directory as a tiled uint8 grid
+    of ASCII cells (grid.u8, see `TiledArray`) and its metadata (maze.json).
+    Generation, BFS and solving work one tile at a time.
+    """
+
+    def __init__(self, path: str, mode: str = "r"):
+        """
+        Opens the maze stored in the directory path, mode "r+" allows edits.
+        """
+        with open(os.path.join(path, "maze.json")) as f:
+            meta = json.load(f)
+        self.path = path
+        self.num_rows, self.num_cols = meta["rows"], meta["cols"]
+        self.tile = meta["tile"]
+        self.fill_fraction = meta["fill_fraction"]
+        self.wall_cell = meta["wall_cell"]
+        self.empty_cell = meta["empty_cell"]
+        self.target_cell = meta["target_cell"]
+        self.targets = [tuple(t) for t in meta["targets"]]
+        self.n_targets = len(self.targets)
+        self.grid = TiledArray(
+            os.path.join(path, "grid.u8"),
+            (self.num_rows, self.num_cols),
+            self.tile,
+            np.uint8,
+            mode,
+        )
+
+    def __repr__(self) -> str:
+        return f"TiledMaze(path={self.path!r}, rows={self.num_rows}, cols={self.num_cols}, tile={self.tile}, n_targets={self.n_targets})"
+
+    @staticmethod
+    def _write_meta(path, rows, cols, tile, fill_fraction, cells, targets) -> None:
+        wall_cell, empty_cell, target_cell = cells
+        meta = {
+            "rows": rows,
+            "cols": cols,
+            "tile": tile,
+            "fill_fraction": fill_fraction,
+            "wall_cell": wall_cell,
+            "empty_cell": empty_cell,
+            "target_cell": target_cell,
+            "targets": [list(t) for t in targets],
+        }
+        with open(os.path.join(path, "maze.json"), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def generate(
+        cls,
+        path: str,
+        rows: int,
+        cols: int,
+        n_targets: int = 4,
+        fill_fraction: float = 0.3,
+        tile: int = 1024,
+        wall_cell="#",
+        empty_cell=" ",
+        target_cell="*",
+        random_seed=None,
+    ) -> "TiledMaze":
+        """
+        Generates a maze like `Maze` into the directory path, one tile at a
+        time. Every tile draws from its own stream derived from random_seed
+        and its position, so the result does not depend on the order tiles
+        are written in (but differs from an in-memory `Maze` of the same
+        seed).
+        """
+        os.makedirs(path, exist_ok=True)
+        wall, empty = ord(wall_cell), ord(empty_cell)
+        grid = TiledArray(
+            os.path.join(path, "grid.u8"), (rows, cols), tile, np.uint8, "w+"
+        )
+        root = np.random.SeedSequence(random_seed)
+
+        empty_counts = np.zeros(grid.tiles_shape, dtype=np.int64)
+        for i, j in np.ndindex(*grid.tiles_shape):
+            block = grid.data[i, j]
+            rng = np.random.default_rng(
+                np.random.SeedSequence(root.entropy, spawn_key=(0, i, j))
+            )
+            _fill_block(block, rng, fill_fraction, empty, wall)
+            # Boundary cells and the padding past the edges are walls.
+            r0, c0 = grid.tile_origin(i, j)
+            cell_rows = np.arange(r0, r0 + tile)[:, None]
+            cell_cols = np.arange(c0, c0 + tile)[None, :]
+            outer = (cell_rows <= 0) | (cell_rows >= rows - 1)
+            outer = outer | (cell_cols <= 0) | (cell_cols >= cols - 1)
+            block[outer] = wall
+            empty_counts[i, j] = np.count_nonzero(block == empty)
+
+        # Targets are the empty cells of n ranks drawn from all empty cells.
+        total = int(empty_counts.sum())
+        if total < n_targets:
+            raise ValueError(f"Warning: Only {total} empty cells available.")
+        rng = np.random.default_rng(
+            np.random.SeedSequence(root.entropy, spawn_key=(1,))
+        )
+        ranks = np.sort(rng.choice(total, n_targets, replace=False))
+        ends = np.cumsum(empty_counts.reshape(-1))
+        tile_of_rank = np.searchsorted(ends, ranks, side="right")
+        targets = []
+        for k in np.unique(tile_of_rank).tolist():
+            i, j = divmod(k, grid.tiles_shape[1])
+            block = grid.data[i, j]
+            # Map all of the tile's ranks before writing any target, which
+            # would shift the empty cells after it.
+            local = ranks[tile_of_rank == k] - (ends[k] - empty_counts[i, j])
+            cells = np.flatnonzero(block == empty)[local]
+            block.reshape(-1)[cells] = ord(target_cell)
+            r0, c0 = grid.tile_origin(i, j)
+            for cell in cells.tolist():
+                r, c = divmod(cell, tile)
+                targets.append((r0 + r, c0 + c))
+        grid.flush()
+
+        cls._write_meta(
+            path,
+            rows,
+            cols,
+            tile,
+            fill_fraction,
+            (wall_cell, empty_cell, target_cell),
+            sorted(targets),
+        )
+        return cls(path)
+
+    @classmethod
+    def from_maze(cls, maze: Maze, path: str, tile: int = 1024) -> "TiledMaze":
+        """
+        Stores an in-memory maze in the tiled format.
+        """
+        os.makedirs(path, exist_ok=True)
+        grid = TiledArray(
+            os.path.join(path, "grid.u8"),
+            (maze.num_rows, maze.num_cols),
+            tile,
+            np.uint8,
+            "w+",
+            fill=ord(maze.wall_cell),
+        )
+        grid.write(0, 0, maze.grid)
+        grid.flush()
+        cls._write_meta(
+            path,
+            maze.num_rows,
+            maze.num_cols,
+            tile,
+            maze.fill_fraction,
+            (maze.wall_cell, maze.empty_cell, maze.target_cell),
+            maze.get_target_cells(),
+        )
+        return cls(path)
+
+    def to_maze(self) -> Maze:
+        """
+        Loads the whole maze into memory.
+        """
+        return Maze.from_grid(
+            self.grid.to_array(), self.wall_cell, self.empty_cell, self.target_cell
+        )
+
+    def get_target_cells(self) -> list[tuple[int, int]]:
+        return list(self.targets)
+
+    def write_text(self, file) -> None:
+        """
+        Writes the maze as text, like str(Maze), one strip of tiles at a time.
+        """
+        for i in range(self.grid.tiles_shape[0]):
+            r0 = i * self.tile
+            r1 = min(r0 + self.tile, self.num_rows)
+            strip = np.empty((r1 - r0, self.num_cols + 1), dtype=np.uint8)
+            strip[:, :-1] = self.grid.read(r0, r1, 0, self.num_cols, 0)
+            strip[:, -1] = ord("\n")
+            text = strip.tobytes().decode("ascii")
+            file.write(text if r1 < self.num_rows else text[:-1])
+
+
+class TiledDistanceCalculator:
+    """
+    BFS distances on a `TiledMaze` with one tile (and a one cell halo) in
+    memory at a time, results are written to `TiledArray` files.
+
+    A tile is relaxed by a BFS seeded with the current distances of its halo,
+    each seed entering at its own level, which only ever lowers distances.
+    When a tile's border cells improve, the neighbouring tiles that see them
+    in their halo are queued again, smallest improved distance first. When
+    the queue is empty no tile can improve, so every distance is the exact
+    shortest path length, equal to the in-memory engines.
+    """
+
+    def __init__(self, maze: TiledMaze, work_dir: str, connectivity: int = 8):
+        """
+        :param maze: The tiled maze.
+        :param work_dir: Directory for the distance files.
+        :param connectivity: Neighbours per cell, 4 or 8.
+        """
+        self.maze = maze
+        self.work_dir = work_dir
+        self.directions = neighbour_offsets(2, connectivity)
+        os.makedirs(work_dir, exist_ok=True)
+
+    def _new_array(self, name: str, dtype, fill) -> TiledArray:
+        return TiledArray(
+            os.path.join(self.work_dir, name),
+            (self.maze.num_rows, self.maze.num_cols),
+            self.maze.tile,
+            dtype,
+            "w+",
+            fill=fill,
+        )
+
+    def bfs_distance(
+        self, source: tuple[int, int], name: str = "dist.i32"
+    ) -> TiledArray:
+        """
+        Returns a TiledArray of int32 BFS distances from source, UNREACHABLE
+        for walls and cells that cannot be reached, stored as name in
+        work_dir.
+        """
+        distances = self._new_array(name, np.int32, UNREACHABLE)
+        self._bfs(source, distances)
+        distances.flush()
+        return distances
+
+    def _bfs(self, source: tuple[int, int], distances: TiledArray) -> set:
+        # Returns the tiles that were relaxed, the only ones holding distances.
+        r, c = source
+        if self.maze.grid.read(r, r + 1, c, c + 1, 0)[0, 0] == ord(self.maze.wall_cell):
+            raise ValueError(f"Cell {source} is a wall.")
+
+        t = self.maze.tile
+        start = (r // t, c // t)
+        pending = {start: 0}
+        heap = [(0, start)]
+        touched = set()
+        first = True
+        while heap:
+            key, tile = heapq.heappop(heap)
+            if pending.get(tile) != key:
+                continue
+            del pending[tile]
+            touched.add(tile)
+            improved = self._relax_tile(tile, distances, source if first else None)
+            first = False
+            for neighbour, d in improved.items():
+                if d < pending.get(neighbour, np.inf):
+                    pending[neighbour] = d
+                    heapq.heappush(heap, (d, neighbour))
+        return touched
+
+    def _relax_tile(self, tile, distances: TiledArray, source=None) -> dict:
+        """
+        Runs the seeded BFS on one tile and writes back the distances that
+        improved. Returns {neighbour tile: smallest improved distance on the
+        border it sees}.
+        """
+        i, j = tile
+        t = self.maze.tile
+        rows, cols = self.maze.num_rows, self.maze.num_cols
+        r0, c0 = i * t, j * t
+        r1, c1 = min(r0 + t, rows), min(c0 + t, cols)
+        # The tile, its halo and one more closed ring so offsets stay in bounds.
+        window = (r0 - 2, r1 + 2, c0 - 2, c1 + 2)
+        is_open = self.maze.grid.read(*window, ord(self.maze.wall_cell))
+        is_open = is_open != ord(self.maze.wall_cell)
+        is_open[[0, -1], :] = False
+        is_open[:, [0, -1]] = False
+        dist = distances.read(*window, UNREACHABLE)
+        old = dist[2:-2, 2:-2].copy()
+
+        updatable = np.zeros_like(is_open)
+        updatable[2:-2, 2:-2] = is_open[2:-2, 2:-2]
+        seeds = is_open & (dist != UNREACHABLE)
+        seeds[2:-2, 2:-2] = False
+        if source is not None:
+            dist[source[0] - r0 + 2, source[1] - c0 + 2] = 0
+            seeds[source[0] - r0 + 2, source[1] - c0 + 2] = True
+
+        width = dist.shape[1]
+        offsets = [dr * width + dc for dr, dc in self.directions]
+        seeded_bfs(
+            dist.reshape(-1), updatable.reshape(-1), np.flatnonzero(seeds), offsets
+        )
+
+        new = dist[2:-2, 2:-2]
+        changed = new != old
+        if not changed.any():
+            return {}
+        distances.write(r0, c0, new)
+
+        # Border cells that improved are in the halo of these neighbours.
+        improved = {}
+        border = {
+            (-1, 0): changed[0, :],
+            (1, 0): changed[-1, :],
+            (0, -1): changed[:, 0],
+            (0, 1): changed[:, -1],
+        }
+        values = {
+            (-1, 0): new[0, :],
+            (1, 0): new[-1, :],
+            (0, -1): new[:, 0],
+            (0, 1): new[:, -1],
+        }
+        for (di, dj), mask in border.items():
+            if mask.any():
+                improved[(i + di, j + dj)] = int(values[(di, dj)][mask].min())
+        for di, dj in ((-1, -1), (-1, 1), (1, -1), (1, 1)):
+            r = 0 if di < 0 else -1
+            c = 0 if dj < 0 else -1
+            if changed[r, c]:
+                improved[(i + di, j + dj)] = int(new[r, c])
+        n_i, n_j = distances.tiles_shape
+        return {
+            (a, b): d for (a, b), d in improved.items() if 0 <= a < n_i and 0 <= b < n_j
+        }
+
+    def distance_sum(
+        self, sources: list[tuple[int, int]]
+    ) -> tuple[TiledArray, TiledArray]:
+        """
+        Returns (dist_sum, reached_count) TiledArrays (int64 and int32) with
+        the same meaning as `DistanceCalculator.multi_source_distance_sum`.
+        One BFS runs per source into a scratch file and is folded into the
+        sums tile by tile.
+        """
+        dist_sum = self._new_array("dist_sum.i64", np.int64, 0)
+        reached_count = self._new_array("reached.i32", np.int32, 0)
+        scratch = self._new_array("scratch.i32", np.int32, UNREACHABLE)
+        for source in sources:
+            touched = self._bfs(source, scratch)
+            for i, j in touched:
+                dist = scratch.data[i, j]
+                is_reached = dist != UNREACHABLE
+                np.add(
+                    dist_sum.data[i, j], dist, out=dist_sum.data[i, j], where=is_reached
+                )
+                reached_count.data[i, j] += is_reached
+                # Reset for the next source.
+                dist[...] = UNREACHABLE
+        dist_sum.flush()
+        reached_count.flush()
+        return dist_sum, reached_count
+
+
+class TiledMazeSolver:
+    """
+    MazeSolver counterpart for a `TiledMaze`, keeping one tile in memory at
+    a time.
+    """
+
+    def __init__(self, maze: TiledMaze, work_dir: str, connectivity: int = 8):
+        self.maze = maze
+        self.distance_calculator = TiledDistanceCalculator(maze, work_dir, connectivity)
+
+    @property
+    def targets(self) -> list[tuple[int, int]]:
+        return self.maze.get_target_cells()
+
+    def find_optimal_point(self) -> tuple[tuple[int, int], float]:
+        """
+        Returns (best_cell, min_sum_of_distances), the same cell as
+        `MazeSolver` on the in-memory maze.
+        """
+        targets = self.targets
+        dist_sum, reached = self.distance_calculator.distance_sum(targets)
+        best_cell, best_sum = (-1, -1), float("inf")
+        empty = ord(self.maze.empty_cell)
+        for i, j in np.ndindex(*dist_sum.tiles_shape):
+            candidates = self.maze.grid.data[i, j] == empty
+            candidates &= reached.data[i, j] == len(targets)
+            (r, c), tile_sum = best_candidate(dist_sum.data[i, j], candidates)
+            if tile_sum == float("inf"):
+                continue
+            r0, c0 = dist_sum.tile_origin(i, j)
+            # Ties go to the first cell in row-major order of the whole grid.
+            if (tile_sum, r0 + r, c0 + c) < (best_sum,) + best_cell:
+                best_cell, best_sum = (r0 + r, c0 + c), tile_sum
+        return best_cell, best_sum
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate and solve a tiled maze.")
+    parser.add_argument("path", help="Directory of the maze, created if needed.")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--cols", type=int, default=10_000)
+    parser.add_argument("--targets", type=int, default=4)
+    parser.add_argument("--fill", type=float, default=0.25)
+    parser.add_argument("--tile", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if os.path.exists(os.path.join(args.path, "maze.json")):
+        maze = TiledMaze(args.path)
+    else:
+        maze = TiledMaze.generate(
+            args.path,
+            args.rows,
+            args.cols,
+            n_targets=args.targets,
+            fill_fraction=args.fill,
+            tile=args.tile,
+            random_seed=args.seed,
+        )
+    print(maze)
+    solver = TiledMazeSolver(maze, os.path.join(args.path, "work"))
+    best_cell, best_dist_sum = solver.find_optimal_point()
+    print("Best cell:", best_cell, "with sum of distances =", best_dist_sum)
@@ -1,14 +1,69 @@
+import os
+
+import numpy as np
 from manim import *
 from lib.maze import Maze
+from lib.serialize import load_maze
 from lib.solver import MazeSolver
 
 
+def cell_centers(rows: int, cols: int, width: float, height: float) -> np.ndarray:
+    """
+    Returns the (rows, cols, 3) centres of a grid of width x height cells
+    centred on the origin, row 0 at the top, as laid out by
+    `arrange_in_grid(buff=0, flow_order="rd")`.
+    """
+    centers = np.zeros((rows, cols, 3))
+    centers[:, :, 0] = (np.arange(cols) - (cols - 1) / 2) * width
+    centers[:, :, 1] = ((rows - 1) / 2 - np.arange(rows))[:, None] * height
+    return centers
+
+
+class CellGlyphs(VMobject):
+    """
+    A single VMobject drawing the glyph of a template (e.g. a `Text`) at many
+    cells, instead of one mobject per cell. The glyphs are kept in the order
+    of the cells' flat indices so that a prefix of them can be shown.
+    """
+
+    def __init__(self, template: VMobject, centers: np.ndarray, cells: np.ndarray):
+        """
+        :param template: Mobject whose points and style are copied.
+        :param centers: (rows, cols, 3) cell centres, see `cell_centers`.
+        :param cells: (n,) ascending flat indices of the cells to draw at.
+        """
+        super().__init__()
+        glyph = template.family_members_with_points()
+        points = np.concatenate([m.points for m in glyph]) - template.get_center()
+        self.points_per_glyph = len(points)
+        self.cells = cells
+        at = centers.reshape(-1, 3)[cells]
+        self.all_points = (at[:, None, :] + points[None, :, :]).reshape(-1, 3)
+        self.match_style(glyph[0], family=False)
+        self.show_cells_before(centers.shape[0] * centers.shape[1])
+
+    def show_cells_before(self, flat_idx: int) -> "CellGlyphs":
+        """
+        Shows only the glyphs of cells whose flat index is below flat_idx.
+        """
+        n = int(np.searchsorted(self.cells, flat_idx))
+        self.set_points(self.all_points[: n * self.points_per_glyph])
+        return self
+
+
 class AnimateMaze(Scene):
 
     def setup(self):
-        self.maze = Maze(
-            rows=25, cols=60, n_targets=16, fill_fraction=0.25, random_seed=None
-        )
+        # MAZE_FILE names a maze saved by `lib.solver --save`, whose stored
+        # solution is used instead of solving again.
+        self.solution = None
+        if os.environ.get("MAZE_FILE"):
+            stored = load_maze(os.environ["MAZE_FILE"])
+            self.maze, self.solution = stored.maze, stored.solution
+        else:
+            self.maze = Maze(
+                rows=25, cols=60, n_targets=16, fill_fraction=0.25, random_seed=None
+            )
         self.maze_solver = MazeSolver(self.maze)
 
     def construct(self):
@@ -32,50 +87,66 @@ class AnimateMaze(Scene):
 
         # 2. Maze Generation
 
+        # One merged mobject per cell type, empty cells draw nothing.
+        wall_glyph = Text(self.maze.wall_cell, color=WHITE).scale(0.5)
+        target_glyph = Text(self.maze.target_cell, color=RED).scale(0.5)
+        path_glyph = Text(
+            "+", font_size=32, color=BLUE, stroke_width=0, weight=BOLD
+        ).scale(0.5)
+        rows, cols = self.maze.num_rows, self.maze.num_cols
+        # Shrink large mazes to fit the frame.
+        fit = min(
+            1.0,
+            0.95 * config.frame_width / (cols * wall_glyph.width),
+            0.95 * config.frame_height / (rows * wall_glyph.height),
+        )
+        for glyph in (wall_glyph, target_glyph, path_glyph):
+            glyph.scale(fit)
+        centers = cell_centers(rows, cols, wall_glyph.width, wall_glyph.height)
+
+        flat_grid = self.maze.grid.reshape(-1)
         boxes = VGroup(
             *[
-                Text(
-                    s,
-                    t2c={self.maze.wall_cell: WHITE, self.maze.target_cell: RED},  # type: ignore
-                ).scale(0.5)
-                for s in self.maze.get_all_cell_values()
+                CellGlyphs(glyph, centers, np.flatnonzero(flat_grid == ord(cell)))
+                for glyph, cell in (
+                    (wall_glyph, self.maze.wall_cell),
+                    (target_glyph, self.maze.target_cell),
+                )
             ]
         )
-        boxes.arrange_in_grid(
-            buff=(0.0, 0.0),
-            rows=self.maze.num_rows,
-            cols=self.maze.num_cols,
-            flow_order="rd",
-        )
-        self.play(ShowIncreasingSubsets(boxes), run_time=5)
+
+        # Reveal the cells in row-major order, as ShowIncreasingSubsets did
+        # with one mobject per cell.
+        def reveal(group, alpha):
+            for cell_glyphs in group:
+                cell_glyphs.show_cells_before(int(alpha * rows * cols))
+
+        reveal(boxes, 0.0)
+        self.add(boxes)
+        self.play(UpdateFromAlphaFunc(boxes, reveal), run_time=5)
         self.wait(1)
 
         # 3. Optimal Point
-        optimal_point, min_dist = self.maze_solver.find_optimal_point()
-
-        def get_box_coordinates(grid_row, grid_col) -> tuple[float, float, float]:
-            top_left_corner = boxes[0].get_center()
-            delta_x = boxes[1].get_center()[0] - top_left_corner[0]
-            delta_y = boxes[self.maze.num_cols].get_center()[1] - top_left_corner[1]
-            new_point_x = top_left_corner[0] + (grid_col * delta_x)
-            new_point_y = top_left_corner[1] + (grid_row * delta_y)
-            return [new_point_x, new_point_y, 0.0]  # type: ignore
+        if self.solution is not None:
+            optimal_point, min_dist = self.solution.cell, self.solution.distance_sum
+        else:
+            optimal_point, min_dist = self.maze_solver.find_optimal_point()
 
         optimal_mark = Cross(
-            stroke_color=GREEN, scale_factor=0.125, stroke_width=8
-        ).move_to(get_box_coordinates(*optimal_point))
+            stroke_color=GREEN, scale_factor=0.125 * fit, stroke_width=8
+        ).move_to(centers[optimal_point])
         self.play(Indicate(optimal_mark), run_time=1)
         self.wait(1)
 
         # 4. Path Animation
-        paths = self.maze_solver.get_paths_from_point(optimal_point)
-        path_points = VGroup(
-            *[
-                Text("+", font_size=32, color=BLUE, stroke_width=0, weight=BOLD)
-                .move_to(get_box_coordinates(*point))
-                .scale(0.5)
-                for point in paths
-            ]
+        if self.solution is not None and self.solution.path_cells is not None:
+            paths = np.asarray(self.solution.path_cells)
+        else:
+            paths = self.maze_solver.get_paths_from_point(
+                optimal_point, from_fields=True
+            )
+        path_points = CellGlyphs(
+            path_glyph, centers, np.sort(np.ravel_multi_index(paths.T, (rows, cols)))
         )
         self.add(path_points)
         self.play(Write(path_points), run_time=4)
@@ -94,7 +165,7 @@ class AnimateMaze(Scene):
             .arrange(direction=DOWN)
             .next_to(conclusion_text, DOWN)
         )
-        self.play(FadeOut(*boxes, optimal_mark, path_points, optimal_mark))
+        self.play(FadeOut(boxes, optimal_mark, path_points))
         self.play(Write(conclusion_text))
         self.play(FadeIn(summary))
         self.wait(2)
@@ -1,5 +1,8 @@
+import os
+
 from manim import *
 from lib.maze3d import Maze3D
+from lib.serialize import load_maze
 from dataclasses import dataclass
 import numpy as np
 
@@ -21,34 +24,30 @@ class MazeConfig:
         self.n_targets = int(self.n_targets * self.scale_factor)
 
 
-def maze_idx_to_coords(
-    idx: tuple, maze: Maze3D, side_length: float
-) -> tuple[float, float, float]:
+# Consider the maze to be centered at the origin, we want the maze 0th cell to be at the front facing top-left corner.
+# i.e [0, 0, 0] ~ negative X-axis, positive Y-axis, positive Z-axis
+# rows => Y-axis, cols => X-axis, layers => Z-axis
+# World direction of a step along each grid axis (layers, rows, cols).
+GRID_AXIS_TO_WORLD = np.array([[0, 0, -1], [0, -1, 0], [1, 0, 0]])
 
-    # Consider the maze to be centered at the origin, we want the maze 0th cell to be at the front facing top-left corner.
-    # i.e [0, 0, 0] ~ negative X-axis, positive Y-axis, positive Z-axis
-    # rows => Y-axis, cols => X-axis, layers => Z-axis
 
-    l, r, c = idx
+def maze_cell_centers(maze: Maze3D, side_length: float) -> np.ndarray:
+    """
+    Returns the (layers, rows, cols, 3) centres of all cells in one pass.
+    """
+    shape = np.array(maze.grid.shape)
+    idx = np.indices(maze.grid.shape, dtype=float)
+    # Offset of every index from the middle of its axis, in cell units.
+    offsets = idx - ((shape - 1) / 2)[:, None, None, None]
+    return np.einsum("a...,aw->...w", offsets, GRID_AXIS_TO_WORLD) * side_length
 
-    row_centers = np.linspace(
-        side_length * (maze.num_rows - 1) / 2,
-        -side_length * (maze.num_rows - 1) / 2,
-        maze.num_rows,
-    )
-    col_centers = np.linspace(
-        -side_length * (maze.num_cols - 1) / 2,
-        side_length * (maze.num_cols - 1) / 2,
-        maze.num_cols,
-    )
-    layer_centers = np.linspace(
-        side_length * (maze.num_layers - 1) / 2,
-        -side_length * (maze.num_layers - 1) / 2,
-        maze.num_layers,
-    )
 
-    center = (float(col_centers[c]), float(row_centers[r]), float(layer_centers[l]))
-    return center
+def maze_idx_to_coords(
+    idx: tuple, maze: Maze3D, side_length: float
+) -> tuple[float, float, float]:
+    offsets = np.array(idx) - (np.array(maze.grid.shape) - 1) / 2
+    center = offsets @ GRID_AXIS_TO_WORLD * side_length
+    return tuple(float(x) for x in center)
 
 
 class AnimateMaze3d(ThreeDScene):
@@ -57,14 +56,18 @@ class AnimateMaze3d(ThreeDScene):
 
         self.maze_config = MazeConfig(scale_factor=1.0, side_length=0.25)
 
-        self.maze = Maze3D(
-            layers=self.maze_config.layers,
-            rows=self.maze_config.rows,
-            cols=self.maze_config.cols,
-            n_targets=self.maze_config.n_targets,
-            fill_fraction=self.maze_config.fill_fraction,
-            random_seed=None,
-        )
+        # MAZE_FILE names a saved maze to show instead of a random one.
+        if os.environ.get("MAZE_FILE"):
+            self.maze = load_maze(os.environ["MAZE_FILE"]).maze
+        else:
+            self.maze = Maze3D(
+                layers=self.maze_config.layers,
+                rows=self.maze_config.rows,
+                cols=self.maze_config.cols,
+                n_targets=self.maze_config.n_targets,
+                fill_fraction=self.maze_config.fill_fraction,
+                random_seed=None,
+            )
         self.color_fill = {
             self.maze.wall_cell: WHITE,
             self.maze.target_cell: RED,
@@ -76,45 +79,38 @@ class AnimateMaze3d(ThreeDScene):
             self.maze.empty_cell: 0.0,
         }
 
-    def _get_maze_cell(self, idx: tuple, cell_type: str) -> Cube:
-        return Cube(
-            side_length=(
-                (2 / 3) * self.maze_config.side_length
-                if cell_type != self.maze.wall_cell
-                else (1 / 3) * self.maze_config.side_length
-            ),
+    def _cell_cubes(self, cell_type: str, size: float) -> dict[int, Cube]:
+        """
+        Returns a `Cube` at every cell of a type, by flat index. Each one is a
+        copy of one styled cube moved into place, cheaper than building a
+        `Cube` per cell, and still six separately filled faces that the
+        ThreeDCamera depth-sorts, so translucent faces stack as before.
+        """
+        opacity = self.opacity_fill[cell_type]
+        template = Cube(
+            side_length=size,
             fill_color=self.color_fill[cell_type],
-            fill_opacity=self.opacity_fill[cell_type],
-            stroke_opacity=self.opacity_fill[cell_type],
-            background_stroke_opacity=self.opacity_fill[cell_type],
-        ).move_to(
-            maze_idx_to_coords(
-                idx,
-                self.maze,
-                self.maze_config.side_length,
-            )
+            fill_opacity=opacity,
+            stroke_opacity=opacity,
+            background_stroke_opacity=opacity,
         )
+        centers = self.centers.reshape(-1, 3)
+        return {
+            int(idx): template.copy().move_to(centers[idx])
+            for idx in np.flatnonzero(self.maze.get_cell_mask(cell_type))
+        }
 
     def construct(self):
         self.set_camera_orientation(phi=75 * DEGREES, theta=30 * DEGREES)
 
         # 1. Setup the maze on the screen
-        walls = VGroup(
-            *[
-                self._get_maze_cell(idx, self.maze.wall_cell)
-                for idx in self.maze.get_wall_cells()
-            ]
-        )
-
-        targets = VGroup(
-            *[
-                self._get_maze_cell(idx, self.maze.target_cell)
-                for idx in self.maze.get_target_cells()
-            ]
-        )
-
-        full_graph = VGroup(walls, targets)
+        side_length = self.maze_config.side_length
+        self.centers = maze_cell_centers(self.maze, side_length)
+        cubes = self._cell_cubes(self.maze.wall_cell, (1 / 3) * side_length)
+        cubes.update(self._cell_cubes(self.maze.target_cell, (2 / 3) * side_length))
 
+        # Reveal the cells in flat index order, one cell at a time.
+        full_graph = VGroup(*[cubes[idx] for idx in sorted(cubes)])
         self.play(ShowIncreasingSubsets(full_graph), run_time=2)
 
         # 2. Rotate the camera to view the maze from different angles.
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from lib.cache import DistanceFieldCache
+from lib.distance import DistanceCalculator
+from lib.maze import Maze
+
+
+def _arrays(value: int) -> tuple[np.ndarray, np.ndarray]:
+    # 100 bytes per entry.
+    return np.full(20, value, dtype=np.int32), np.full(20, value, dtype=np.int8)
+
+
+def test_evicts_least_recently_used_first():
+    cache = DistanceFieldCache(max_bytes=300)
+    for key in "abc":
+        cache.put(key, _arrays(ord(key)))
+    assert cache.get("a") is not None
+    cache.put("d", _arrays(0))
+    # b was used least recently, a was read after c was put.
+    assert cache.get("b") is None
+    assert [k for k in "acd" if cache.get(k) is not None] == list("acd")
+    assert len(cache) == 3 and cache.nbytes == 300
+    assert (cache.hits, cache.misses) == (4, 1)
+
+
+def test_entries_larger_than_the_budget_are_not_kept():
+    cache = DistanceFieldCache(max_bytes=50)
+    cache.put("a", _arrays(1))
+    assert len(cache) == 0 and cache.get("a") is None
+
+
+def test_cached_arrays_are_read_only():
+    cache = DistanceFieldCache()
+    cache.put("a", _arrays(1))
+    distances, _ = cache.get("a")
+    with pytest.raises(ValueError):
+        distances[0] = 0
+
+
+def test_spilled_entries_reload_after_eviction(tmp_path):
+    cache = DistanceFieldCache(max_bytes=100, spill_dir=str(tmp_path))
+    cache.put("a", _arrays(1))
+    cache.put("b", _arrays(2))
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "a.0.npy",
+        "a.1.npy",
+        "b.0.npy",
+        "b.1.npy",
+    ]
+    assert len(cache) == 1
+
+    distances, parent_dirs = cache.get("a")
+    assert cache.disk_hits == 1
+    assert np.array_equal(distances, _arrays(1)[0])
+    assert np.array_equal(parent_dirs, _arrays(1)[1])
+    # Reloaded into memory, evicting b, so the next read is a memory hit.
+    assert cache.get("a") is not None
+    assert (cache.hits, cache.disk_hits) == (1, 1)
+    assert cache.get("b") is not None and cache.disk_hits == 2
+
+
+def test_another_cache_reads_the_spill_dir(tmp_path):
+    maze = Maze(rows=15, cols=20, n_targets=2, fill_fraction=0.3, random_seed=0)
+    source = maze.get_target_cells()[0]
+    first = DistanceFieldCache(spill_dir=str(tmp_path))
+    expected = DistanceCalculator(maze, cache=first).bfs_distance_array(*source)
+
+    second = DistanceFieldCache(spill_dir=str(tmp_path))
+    result = DistanceCalculator(maze, cache=second).bfs_distance_array(*source)
+    assert second.disk_hits == 1 and second.misses == 0
+    for a, b in zip(result, expected):
+        assert np.array_equal(a, b)
@@ -0,0 +1,77 @@
+from collections import deque
+from itertools import product
+
+import numpy as np
+import pytest
+
+from lib.components import ComponentIndex, label_components
+from lib.distance import neighbour_offsets
+from lib.maze import Maze
+
+
+def _flood_fill(is_open: np.ndarray, connectivity: int) -> np.ndarray:
+    """
+    Labels components one BFS at a time, numbered in row-major order of
+    their first cell.
+    """
+    directions = neighbour_offsets(is_open.ndim, connectivity)
+    labels = np.full(is_open.shape, -1, dtype=np.int32)
+    count = 0
+    for start in product(*(range(n) for n in is_open.shape)):
+        if not is_open[start] or labels[start] >= 0:
+            continue
+        labels[start] = count
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            for delta in directions:
+                nbr = tuple(x + d for x, d in zip(cell, delta))
+                inside = all(0 <= x < n for x, n in zip(nbr, is_open.shape))
+                if inside and is_open[nbr] and labels[nbr] < 0:
+                    labels[nbr] = count
+                    queue.append(nbr)
+        count += 1
+    return labels
+
+
+@pytest.mark.parametrize(
+    "shape, connectivity",
+    [((30, 40), 4), ((30, 40), 8), ((8, 9, 10), 6), ((8, 9, 10), 26)],
+)
+def test_labels_match_flood_fill(shape, connectivity):
+    rng = np.random.default_rng(0)
+    for fill in (0.2, 0.4, 0.6):
+        is_open = rng.random(shape) > fill
+        labels = label_components(is_open, connectivity)
+        assert np.array_equal(labels, _flood_fill(is_open, connectivity))
+
+
+def test_component_index_queries():
+    is_open = np.ones((5, 7), dtype=bool)
+    is_open[:, 3] = False
+    index = ComponentIndex(is_open, connectivity=8)
+    assert index.count == 2
+    assert index.sizes.tolist() == [15, 15]
+    assert index.same_component([(0, 0), (4, 2)])
+    assert not index.same_component([(0, 0), (0, 4)])
+    assert not index.same_component([(0, 3)])
+    assert index.bounding_box(1) == (slice(0, 5), slice(4, 7))
+
+
+@pytest.mark.parametrize("connectivity", [4, 8])
+def test_connected_targets_share_a_component_with_an_empty_cell(connectivity):
+    for fill in [0.2, 0.4, 0.6]:
+        for seed in range(10):
+            maze = Maze(
+                rows=15,
+                cols=20,
+                n_targets=6,
+                fill_fraction=fill,
+                random_seed=seed,
+                connectivity=connectivity,
+            )
+            labels = maze.components(connectivity).labels
+            target_labels = set(labels[maze.get_cell_mask(maze.target_cell)])
+            assert len(target_labels) == 1
+            empty = maze.get_cell_mask(maze.empty_cell)
+            assert (labels[empty] == target_labels.pop()).any()
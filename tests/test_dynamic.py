@@ -0,0 +1,37 @@
+import numpy as np
+
+from lib.distance import UNREACHABLE, DistanceCalculator
+from lib.dynamic import DynamicMazeSolver
+from lib.maze import Maze
+from lib.solver import MazeSolver
+
+
+def _reference_field(maze: Maze, source: tuple[int, int]) -> np.ndarray:
+    distance_map, _ = DistanceCalculator(maze).bfs_distance_with_parents(*source)
+    field = np.full(maze.grid.shape, UNREACHABLE, dtype=np.int32)
+    for cell, d in distance_map.items():
+        field[cell] = d
+    return field
+
+
+def test_edits_match_full_recomputation():
+    rng = np.random.default_rng(0)
+    for seed in range(4):
+        maze = Maze(rows=14, cols=20, n_targets=4, fill_fraction=0.3, random_seed=seed)
+        solver = DynamicMazeSolver(maze)
+        for _ in range(60):
+            r = int(rng.integers(1, maze.num_rows - 1))
+            c = int(rng.integers(1, maze.num_cols - 1))
+            cell = chr(maze.grid[r, c])
+            if cell == maze.wall_cell:
+                solver.remove_wall((r, c))
+            elif cell == maze.empty_cell and rng.random() < 0.7:
+                solver.add_wall((r, c))
+            elif cell == maze.empty_cell:
+                old = solver.targets[int(rng.integers(len(solver.targets)))]
+                solver.move_target(old, (r, c))
+
+            for target, field in zip(solver.targets, solver.fields):
+                assert np.array_equal(field, _reference_field(maze, target))
+            fresh = Maze.from_grid(maze.grid.copy())
+            assert solver.find_optimal_point() == MazeSolver(fresh).find_optimal_point()
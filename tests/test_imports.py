@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on demand only: plotting, pretty-printing and process pools.
+HEAVY = ("matplotlib", "rich", "multiprocessing", "concurrent.futures.process")
+
+# Seconds a core module may take to import on top of NumPy, the default
+# --import-budget of benchmarks/suite.py.
+IMPORT_BUDGET = 0.05
+
+
+@pytest.mark.parametrize(
+    "module", ["lib.maze", "lib.maze3d", "lib.distance", "lib.solver"]
+)
+def test_core_modules_import_lightly(module):
+    code = f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    loaded = json.loads(proc.stdout)
+    heavy = [
+        name
+        for name in loaded
+        if any(name == h or name.startswith(h + ".") for h in HEAVY)
+    ]
+    assert heavy == []
+
+
+def _import_seconds(module: str) -> float:
+    """
+    Seconds spent importing module after NumPy in a fresh interpreter, from
+    -X importtime.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import numpy, {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1e6
+    raise AssertionError(f"No import time reported for {module}.")
+
+
+@pytest.mark.parametrize(
+    "module", ["lib.maze", "lib.maze3d", "lib.distance", "lib.solver"]
+)
+def test_core_modules_import_within_budget(module):
+    # Best of three, to ignore a busy machine.
+    assert min(_import_seconds(module) for _ in range(3)) <= IMPORT_BUDGET
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from lib.distance import DistanceCalculator
+from lib.kernels import check_backends, compiled_bfs_kernel
+from lib.maze import Maze
+
+
+def _random_mazes(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        rows, cols = rng.integers(4, 40, size=2)
+        yield Maze(
+            rows=int(rows),
+            cols=int(cols),
+            n_targets=1,
+            fill_fraction=float(rng.uniform(0.0, 0.6)),
+            random_seed=int(rng.integers(2**32)),
+        )
+
+
+@pytest.mark.parametrize(
+    "backend",
+    [
+        pytest.param(
+            "numba",
+            marks=pytest.mark.skipif(
+                compiled_bfs_kernel() is None, reason="numba is not installed"
+            ),
+        ),
+        "python",
+    ],
+)
+def test_backends_match_numpy(backend):
+    for maze in _random_mazes(30, seed=1):
+        source = maze.get_target_cells()[0]
+        want = DistanceCalculator(maze, backend="numpy").bfs_distance_array(*source)
+        got = DistanceCalculator(maze, backend=backend).bfs_distance_array(*source)
+        assert np.array_equal(want[0], got[0])
+        assert np.array_equal(want[1], got[1])
+
+
+def test_check_backends_finds_no_mismatch():
+    assert check_backends(n_mazes=10) == []
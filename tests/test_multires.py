@@ -0,0 +1,43 @@
+import numpy as np
+
+from lib.maze import Maze
+from lib.multires import MultiResolutionSolver
+from lib.solver import MazeSolver
+
+
+def test_bounds_hold_and_exact_means_equal():
+    exact = 0
+    for seed in range(40):
+        maze = Maze(rows=48, cols=64, n_targets=6, fill_fraction=0.25, random_seed=seed)
+        objectives = MazeSolver(maze).distance_objectives(top_k=0)
+        best_cell, best_sum = objectives.best
+        for max_checks in (1, 4):
+            result = MultiResolutionSolver(
+                maze, factor=2, coarse_cells=256, max_checks=max_checks
+            ).find_optimal_point()
+            assert result.checks <= max_checks
+            # The reported sum brackets the optimum, both may be inf.
+            assert result.lower_bound <= best_sum <= result.distance_sum
+            if result.distance_sum != float("inf"):
+                # It is the cell's true sum.
+                assert result.distance_sum == objectives.dist_sum[result.cell]
+            if result.exact:
+                assert (result.cell, result.distance_sum) == (best_cell, best_sum)
+                exact += 1
+    assert exact > 0
+
+
+def test_disconnected_targets_are_proven_unsolvable():
+    # A wall column splits the maze, with targets on both sides.
+    grid = np.full((40, 60), ord(" "), dtype=np.uint8)
+    grid[0, :] = grid[-1, :] = grid[:, 0] = grid[:, -1] = grid[:, 30] = ord("#")
+    for cell in [(5, 5), (30, 20), (10, 45), (35, 55)]:
+        grid[cell] = ord("*")
+    maze = Maze.from_grid(grid)
+    assert MazeSolver(maze).find_optimal_point() == ((-1, -1), float("inf"))
+
+    result = MultiResolutionSolver(
+        maze, factor=2, coarse_cells=256, max_checks=2
+    ).find_optimal_point()
+    assert (result.cell, result.distance_sum) == ((-1, -1), float("inf"))
+    assert result.exact
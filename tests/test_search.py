@@ -0,0 +1,122 @@
+from heapq import heappop, heappush
+from math import inf, isclose, sqrt
+
+import numpy as np
+
+from lib.distance import UNREACHABLE, GridDistanceCalculator, reconstruct_path
+from lib.maze import Maze
+from lib.search import SearchEngine
+
+
+def _dijkstra(maze, costs, directions, diagonal_cost, source):
+    """
+    Textbook Dijkstra on cells, the cost of a step being that of the cell
+    entered, times diagonal_cost on diagonals.
+    """
+    is_open = (maze.grid != ord(maze.wall_cell)) & np.isfinite(costs)
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        d, (r, c) = heappop(heap)
+        if d > dist[r, c]:
+            continue
+        for dr, dc in directions:
+            nbr = (r + dr, c + dc)
+            if not (0 <= nbr[0] < maze.num_rows and 0 <= nbr[1] < maze.num_cols):
+                continue
+            if not is_open[nbr]:
+                continue
+            nd = d + costs[nbr] * (diagonal_cost if dr and dc else 1.0)
+            if nd < dist.get(nbr, inf):
+                dist[nbr] = nd
+                heappush(heap, (nd, nbr))
+    distances = np.full(maze.grid.shape, inf)
+    for cell, d in dist.items():
+        distances[cell] = d
+    return distances
+
+
+def _path_cost(engine, costs, path):
+    total = 0.0
+    for (r0, c0), (r1, c1) in zip(path, path[1:]):
+        assert (r1 - r0, c1 - c0) in engine.directions
+        assert np.isfinite(costs[r1, c1])
+        total += costs[r1, c1] * (engine.diagonal_cost if r1 - r0 and c1 - c0 else 1)
+    return total
+
+
+def _check_pair_searches(engine, costs, reference, source):
+    open_cells = [
+        tuple(cell)
+        for cell in np.argwhere(engine.maze.grid != ord(engine.maze.wall_cell))
+        if np.isfinite(costs[tuple(cell)])
+    ]
+    for goal in open_cells[:: max(1, len(open_cells) // 15)]:
+        expected = reference[goal]
+        for result in [engine.astar(source, goal), engine.bidirectional(source, goal)]:
+            if expected == inf:
+                assert result.cost == inf and result.path == []
+                continue
+            assert isclose(result.cost, expected)
+            assert result.path[0] == source and result.path[-1] == goal
+            assert isclose(_path_cost(engine, costs, result.path), expected)
+
+
+def _mazes():
+    for seed in range(6):
+        yield Maze(rows=12, cols=16, n_targets=3, fill_fraction=0.35, random_seed=seed)
+
+
+def test_unit_costs_match_bfs():
+    for maze in _mazes():
+        is_open = maze.grid != ord(maze.wall_cell)
+        costs = np.ones(maze.grid.shape)
+        source = maze.get_target_cells()[0]
+        for connectivity in [4, 8]:
+            engine = SearchEngine(maze, connectivity=connectivity)
+            bfs, _ = GridDistanceCalculator(is_open, connectivity).bfs_distance_array(
+                source
+            )
+            reference = np.where(bfs == UNREACHABLE, inf, bfs.astype(float))
+
+            distances, parent_dirs, _ = engine.dijkstra(source)
+            assert np.array_equal(distances, reference)
+            for goal in maze.get_target_cells():
+                path = reconstruct_path(
+                    parent_dirs, source, goal, directions=engine.directions
+                )
+                if reference[goal] == inf:
+                    assert path == []
+                else:
+                    assert len(path) - 1 == reference[goal]
+            _check_pair_searches(engine, costs, reference, source)
+
+
+def test_random_costs_match_plain_dijkstra():
+    rng = np.random.default_rng(0)
+    for maze in _mazes():
+        costs = rng.uniform(0.5, 3.0, size=maze.grid.shape)
+        # Some open cells are blocked by an infinite cost.
+        costs[rng.random(maze.grid.shape) < 0.1] = inf
+        source = maze.get_target_cells()[0]
+        costs[source] = 1.0
+        for connectivity, diagonal_cost in [(4, 1.0), (8, 1.0), (8, sqrt(2))]:
+            engine = SearchEngine(
+                maze, costs, connectivity=connectivity, diagonal_cost=diagonal_cost
+            )
+            reference = _dijkstra(maze, costs, engine.directions, diagonal_cost, source)
+            distances, _, _ = engine.dijkstra(source)
+            assert np.allclose(distances, reference)
+            _check_pair_searches(engine, costs, reference, source)
+
+
+def test_unreachable_goal():
+    grid = np.full((5, 7), ord(" "), dtype=np.uint8)
+    grid[:, 3] = ord("#")
+    maze = Maze.from_grid(grid)
+    engine = SearchEngine(maze)
+    distances, _, _ = engine.dijkstra((2, 0))
+    assert np.isinf(distances[:, 4:]).all()
+    assert engine.dijkstra((2, 0), targets=[(2, 1)])[0][2, 1] == 1
+    for result in [engine.astar((2, 0), (2, 6)), engine.bidirectional((2, 0), (2, 6))]:
+        assert result.cost == inf and result.path == []
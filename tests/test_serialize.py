@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from lib.maze import Maze
+from lib.maze3d import Maze3D
+from lib.serialize import Solution, load_maze, save_maze
+from lib.solver import MazeSolver
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip_with_solution(tmp_path, mmap):
+    maze = Maze(rows=25, cols=60, n_targets=16, fill_fraction=0.25, random_seed=3)
+    solver = MazeSolver(maze)
+    objectives = solver.distance_objectives(top_k=0)
+    cell, total = objectives.best
+    paths = solver.get_paths_from_point(cell, from_fields=True)
+    path = str(tmp_path / "maze.bin")
+    save_maze(path, maze, solution=Solution(cell, total, objectives.dist_sum, paths))
+
+    stored = load_maze(path, mmap=mmap)
+    assert np.array_equal(stored.maze.grid, maze.grid)
+    assert stored.maze.fill_fraction == maze.fill_fraction
+    assert stored.connectivity == 8
+    assert stored.solution.cell == cell
+    assert stored.solution.distance_sum == total
+    assert np.array_equal(stored.solution.dist_sum_field, objectives.dist_sum)
+    assert np.array_equal(stored.solution.path_cells, paths)
+    assert MazeSolver(stored.maze).find_optimal_point() == (cell, total)
+
+
+def test_round_trip_3d_without_solution(tmp_path):
+    maze = Maze3D(5, 6, 7, n_targets=4, fill_fraction=0.3, random_seed=1)
+    path = str(tmp_path / "maze3d.bin")
+    save_maze(path, maze, connectivity=6)
+
+    stored = load_maze(path)
+    assert isinstance(stored.maze, Maze3D)
+    assert np.array_equal(stored.maze.grid, maze.grid)
+    assert stored.connectivity == 6
+    assert stored.solution is None
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a maze")
+    with pytest.raises(ValueError):
+        load_maze(str(path))
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import tempfile
+
+from lib.maze import Maze
+from lib.service import SolverService, request
+from lib.solver import MazeSolver
+
+GENERATE = {
+    "op": "generate",
+    "rows": 60,
+    "cols": 80,
+    "targets": 8,
+    "fill": 0.25,
+    "seed": 5,
+}
+
+
+def _maze() -> Maze:
+    return Maze(rows=60, cols=80, n_targets=8, fill_fraction=0.25, random_seed=5)
+
+
+def _solution(maze: Maze) -> list:
+    cell, total = MazeSolver(maze).find_optimal_point()
+    return [list(cell), total]
+
+
+def test_solve_edit_and_coalescing():
+    async def run():
+        service = SolverService(workers=2)
+        opened = await service.handle(GENERATE)
+        assert opened["ok"]
+        assert (await service.handle(GENERATE))["maze"] == opened["maze"]
+        solve = {"op": "solve", "maze": opened["maze"]}
+
+        replies = await asyncio.gather(*[service.handle(solve) for _ in range(6)])
+        assert service.coalesced == 5
+        assert all(reply == replies[0] for reply in replies)
+        maze = _maze()
+        assert [replies[0]["cell"], replies[0]["distance_sum"]] == _solution(maze)
+
+        path = await service.handle({"op": "path", "maze": opened["maze"]})
+        assert path["ok"] and len(path["cells"]) > 0
+
+        # Walling the optimal cell moves the optimum.
+        edit = {"op": "edit", "maze": opened["maze"], "cells": [replies[0]["cell"]]}
+        edited = await service.handle({**edit, "value": "#"})
+        assert edited == {"ok": True, "version": 1}
+        maze.grid[tuple(replies[0]["cell"])] = ord("#")
+        maze.invalidate_caches()
+        reply = await service.handle(solve)
+        assert [reply["cell"], reply["distance_sum"]] == _solution(maze)
+
+        bad = await service.handle({**edit, "cells": [[0, 999]], "value": "#"})
+        assert not bad["ok"]
+        assert not (await service.handle({"op": "solve", "maze": "nope"}))["ok"]
+        assert not (await service.handle({"op": "bogus"}))["ok"]
+        service.executor.shutdown()
+
+    asyncio.run(run())
+
+
+def test_socket_round_trip():
+    async def run(path):
+        service = SolverService(workers=2)
+        server = asyncio.ensure_future(service.serve(path))
+        while not os.path.exists(path):
+            await asyncio.sleep(0.01)
+        loop = asyncio.get_running_loop()
+        opened = await loop.run_in_executor(None, request, path, GENERATE, 10)
+        message = {"op": "solve", "maze": opened["maze"], "top_k": 2}
+        reply = await loop.run_in_executor(None, request, path, message, 10)
+        server.cancel()
+        return reply
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "maze.sock")
+        reply = asyncio.run(run(path))
+        assert not os.path.exists(path)
+    assert reply["ok"]
+    assert [reply["cell"], reply["distance_sum"]] == _solution(_maze())
+    assert len(reply["top_cells"]) == 2
+
+
+def test_unsolvable_mazes_and_failures_reply_in_standard_json():
+    async def run():
+        service = SolverService(workers=1)
+        opened = await service.handle(GENERATE)
+        maze_id = opened["maze"]
+        # A wall across the maze leaves targets on both sides.
+        maze = _maze()
+        cells = [[r, 40] for r in range(maze.num_rows)]
+        await service.handle(
+            {"op": "edit", "maze": maze_id, "cells": cells, "value": "#"}
+        )
+        left = [[5, 5], [5, 6]]
+        right = [[5, 70]]
+        await service.handle(
+            {"op": "edit", "maze": maze_id, "cells": left + right, "value": "*"}
+        )
+        for top_k in [0, 2]:
+            reply = await service.handle(
+                {"op": "solve", "maze": maze_id, "top_k": top_k}
+            )
+            assert reply["ok"] and reply["distance_sum"] is None
+            if top_k:
+                assert reply["minimax"][1] is None
+            json.dumps(reply, allow_nan=False)
+
+        def fail():
+            raise RuntimeError("boom")
+
+        service.mazes[maze_id].solver.find_optimal_point = fail
+        # An empty edit drops the results computed so far.
+        await service.handle({"op": "edit", "maze": maze_id, "cells": [], "value": " "})
+        reply = await service.handle({"op": "solve", "maze": maze_id})
+        assert reply == {
+            "ok": False,
+            "error": "RuntimeError: boom",
+            "type": "RuntimeError",
+        }
+        assert (await service.handle({"op": "ping"}))["ok"]
+        service.executor.shutdown()
+
+    asyncio.run(run())
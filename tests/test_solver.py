@@ -0,0 +1,155 @@
+import numpy as np
+
+from lib.distance import UNREACHABLE, DistanceCalculator
+from lib.instrument import SolverStats
+from lib.maze import Maze
+from lib.solver import MazeSolver
+
+
+def _disconnected_maze() -> Maze:
+    # A wall column splits the maze, one target on each side.
+    grid = np.full((7, 9), ord(" "), dtype=np.uint8)
+    grid[0, :] = grid[-1, :] = grid[:, 0] = grid[:, -1] = grid[:, 4] = ord("#")
+    grid[3, 2] = grid[3, 6] = ord("*")
+    return Maze.from_grid(grid)
+
+
+def test_disconnected_targets_have_no_optimal_point():
+    solver = MazeSolver(_disconnected_maze())
+    assert solver.find_optimal_point() == ((-1, -1), float("inf"))
+
+
+def test_no_paths_from_outside_the_maze_or_a_wall():
+    solver = MazeSolver(_disconnected_maze())
+    for cell in [(-1, -1), (0, 0), (2, 4)]:
+        assert solver.get_paths_from_point(cell) == []
+        assert solver.get_paths_from_point(cell, from_fields=True).shape == (0, 2)
+
+
+def test_marking_an_unsolvable_maze_does_not_crash():
+    maze = _disconnected_maze()
+    solver = MazeSolver(maze)
+    best_cell, _ = solver.find_optimal_point()
+    before = maze.grid.copy()
+    solver.mark_paths_from_point(best_cell, marking_cell_type=".")
+    solver.mark_paths_from_point(best_cell, ".", from_fields=True)
+    assert np.array_equal(maze.grid, before)
+
+
+def test_pruned_search_matches_exhaustive_search():
+    # From mazes where the bound cuts early to ones with so many walls that
+    # the search falls back to the exhaustive one.
+    for rows, cols, fill in [(30, 40, 0.0), (30, 40, 0.05), (60, 60, 0.4)]:
+        for seed in range(5):
+            maze = Maze(
+                rows=rows,
+                cols=cols,
+                n_targets=8,
+                fill_fraction=fill,
+                random_seed=seed,
+            )
+            expected = MazeSolver(maze).find_optimal_point()
+            assert MazeSolver(maze, pruned=True).find_optimal_point() == expected
+
+
+def test_bounded_distance_sum_backends_agree():
+    rng = np.random.default_rng(0)
+    for seed in range(5):
+        maze = Maze(rows=20, cols=30, n_targets=6, fill_fraction=0.3, random_seed=seed)
+        targets = np.array(maze.get_target_cells())
+        # A repeated target counts twice.
+        targets = np.vstack([targets, targets[:1]])
+        compiled = DistanceCalculator(maze, backend="numba")
+        graph = DistanceCalculator(maze, backend="numpy")
+        open_cells = np.argwhere(maze.grid != ord(maze.wall_cell))
+        for r, c in open_cells[rng.choice(len(open_cells), 20)]:
+            for bound in [0, 50, 150, float("inf")]:
+                assert compiled.bounded_distance_sum(
+                    r, c, targets, bound
+                ) == graph.bounded_distance_sum(r, c, targets, bound)
+
+
+def test_path_extraction_reuses_the_solve_fields():
+    maze = Maze(rows=20, cols=30, n_targets=6, fill_fraction=0.2, random_seed=0)
+    expected = MazeSolver(maze).get_paths_from_point((5, 5), from_fields=True)
+    for solve in ["find_optimal_point", "distance_objectives"]:
+        stats = SolverStats()
+        solver = MazeSolver(maze, stats=stats)
+        getattr(solver, solve)()
+        n_bfs = stats.calls["bfs"]
+        assert n_bfs == len(solver.targets)
+        paths = solver.get_paths_from_point((5, 5), from_fields=True)
+        assert stats.calls["bfs"] == n_bfs
+        assert np.array_equal(paths, expected)
+
+
+def test_component_view_backends_agree_and_view_is_kept():
+    for seed in range(5):
+        maze = Maze(rows=30, cols=40, n_targets=4, fill_fraction=0.45, random_seed=seed)
+        solver = MazeSolver(maze)
+        labelled = MazeSolver(maze)
+        labelled.distance_calculator = DistanceCalculator(maze, backend="numpy")
+        targets = solver.targets
+        view = solver._component_view(targets)
+        expected = labelled._component_view(targets)
+        if expected is None:
+            assert view is None
+            continue
+        assert view[1] == expected[1]
+        assert np.array_equal(view[2], expected[2])
+        # The cropped maze and its caches are reused by the next solve.
+        assert solver._component_view(targets)[0] is view[0]
+
+
+def _brute_force_objectives(maze: Maze):
+    """
+    Sums and largest distances from one reference BFS per target, and the
+    empty cells reached by every target ranked by (sum, row-major index).
+    """
+    shape = maze.grid.shape
+    dist_sum = np.zeros(shape, dtype=np.int64)
+    max_dist = np.zeros(shape, dtype=np.int64)
+    reached = np.zeros(shape, dtype=np.int64)
+    calculator = DistanceCalculator(maze)
+    for target in maze.get_target_cells():
+        distances, _ = calculator.bfs_distance_with_parents(*target)
+        for cell, d in distances.items():
+            dist_sum[cell] += d
+            max_dist[cell] = max(max_dist[cell], d)
+            reached[cell] += 1
+    complete = reached == len(maze.get_target_cells())
+    dist_sum[~complete] = UNREACHABLE
+    max_dist[~complete] = UNREACHABLE
+    ranked = sorted(
+        (int(dist_sum[cell]), cell)
+        for cell in map(tuple, np.argwhere(complete))
+        if maze.grid[cell] == ord(maze.empty_cell)
+    )
+    return dist_sum, max_dist, ranked
+
+
+def test_distance_objectives_match_brute_force():
+    mazes = [_disconnected_maze()] + [
+        Maze(rows=15, cols=20, n_targets=5, fill_fraction=0.35, random_seed=seed)
+        for seed in range(8)
+    ]
+    for maze in mazes:
+        dist_sum, max_dist, ranked = _brute_force_objectives(maze)
+        for top_k in [0, 3, 1000]:
+            objectives = MazeSolver(maze).distance_objectives(top_k)
+            assert np.array_equal(objectives.dist_sum, dist_sum)
+            assert np.array_equal(objectives.max_dist, max_dist)
+            top = ranked[:top_k]
+            assert objectives.top_cells.tolist() == [list(cell) for _, cell in top]
+            assert objectives.top_sums.tolist() == [total for total, _ in top]
+            if not ranked:
+                assert objectives.best == ((-1, -1), float("inf"))
+                assert objectives.minimax == ((-1, -1), float("inf"))
+                continue
+            best_sum, best_cell = ranked[0]
+            assert objectives.best == (best_cell, best_sum)
+            assert objectives.best == MazeSolver(maze).find_optimal_point()
+            worst, _, cell = min(
+                (max_dist[cell], total, cell) for total, cell in ranked
+            )
+            assert objectives.minimax == (cell, worst)
@@ -0,0 +1,38 @@
+import numpy as np
+
+from lib.distance import GridDistanceCalculator
+from lib.maze import Maze
+from lib.solver import MazeSolver
+from lib.tiled import TiledDistanceCalculator, TiledMaze, TiledMazeSolver
+
+
+def test_generate_places_every_target(tmp_path):
+    for seed in range(20):
+        path = str(tmp_path / f"maze-{seed}")
+        maze = TiledMaze.generate(
+            path, 300, 300, n_targets=64, fill_fraction=0.3, tile=64, random_seed=seed
+        )
+        grid = maze.to_maze().grid
+        targets = maze.get_target_cells()
+        assert len(set(targets)) == 64
+        assert np.count_nonzero(grid == ord(maze.target_cell)) == 64
+        assert all(grid[r, c] == ord(maze.target_cell) for r, c in targets)
+
+
+def test_tiled_matches_in_memory(tmp_path):
+    for seed in range(6):
+        maze = Maze(rows=45, cols=70, n_targets=5, fill_fraction=0.35, random_seed=seed)
+        path = str(tmp_path / f"maze-{seed}")
+        tiled = TiledMaze.from_maze(maze, path, tile=16)
+        for connectivity in (4, 8):
+            work_dir = str(tmp_path / f"work-{seed}-{connectivity}")
+            calculator = TiledDistanceCalculator(tiled, work_dir, connectivity)
+            is_open = maze.grid != ord(maze.wall_cell)
+            reference = GridDistanceCalculator(is_open, connectivity)
+            for target in maze.get_target_cells():
+                want, _ = reference.bfs_distance_array(target)
+                got = calculator.bfs_distance(target).to_array()
+                assert np.array_equal(got, want)
+
+        solver = TiledMazeSolver(tiled, str(tmp_path / f"solve-{seed}"))
+        assert solver.find_optimal_point() == MazeSolver(maze).find_optimal_point()